@@ -0,0 +1,220 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+# Checkpoint manifest with a retention policy
+#
+# The training loop used to be the only index of its checkpoints: files were
+# found by globbing models/ and parsing "episode_<N>.keras" names, and every
+# checkpoint was kept forever. The manifest (models/_checkpoints.json)
+# records each checkpoint's episode, kind, rolling score stats, size and
+# SHA-256, and after every save the retention policy deletes checkpoints
+# that are none of:
+#
+#   - the last `keep_last` of their kind
+#   - a multiple of `keep_every` episodes
+#   - among the `keep_best` by average score
+#
+# Checkpoints found on disk when the manifest is first built (saved before
+# it existed) are marked legacy and never pruned: the policy only deletes
+# what it has recorded itself. Nor are they hashed by read-only views
+# (build=False), which the GUI uses on its UI thread.
+#
+# The manifest is rewritten atomically, so the GUI can read it while a
+# training process is saving. Checkpoints that can't be deleted (the GUI
+# may be loading one) stay in the manifest and are retried at the next
+# prune.
+
+MANIFEST_NAME = "_checkpoints.json"
+MANIFEST_VERSION = 1
+REMOVE_RETRIES = 3       # Attempts at deleting a checkpoint in one prune
+REMOVE_RETRY_DELAY = 0.1  # Seconds between them
+
+_ENTRY_KEYS = {"episode", "kind", "file"}
+_FILE_PATTERNS = {
+    "episode": re.compile(r"^episode_(\d+)\.keras$"),
+    "consistent": re.compile(r"^consistent_ep_(\d+)\.keras$"),
+}
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CheckpointManifest:
+
+    '''Index of the checkpoints in a models directory
+
+    Args:
+        models_dir (str): Directory holding the checkpoints and the manifest
+        keep_last (int): Most recent checkpoints of each kind always kept (at least 1)
+        keep_every (int): Checkpoints at multiples of this episode are kept (0 disables)
+        keep_best (int): Checkpoints with the highest average score kept per kind (0 disables)
+        build (bool): Hash and save a missing or unreadable manifest; False only lists the files
+    '''
+
+    def __init__(self, models_dir, keep_last=5, keep_every=500, keep_best=3, build=True):
+        self.models_dir = models_dir
+        self.path = os.path.join(models_dir, MANIFEST_NAME)
+        self.keep_last = max(1, keep_last)
+        self.keep_every = keep_every
+        self.keep_best = keep_best
+        self.build = build
+        self.entries = []
+        self.reload()
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def reload(self):
+        '''Reads the manifest, rebuilding it from the directory contents if it
+        is missing or unreadable'''
+        entries = None
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and isinstance(data.get("checkpoints"), list):
+                entries = [e for e in data["checkpoints"]
+                           if isinstance(e, dict) and _ENTRY_KEYS <= e.keys()]
+        except (OSError, ValueError):
+            pass
+        if entries is None:
+            # Missing, or not a manifest: index what is on disk
+            entries = self._scan()
+            if entries and self.build:
+                self.entries = entries
+                self.save()
+        self.entries = entries
+        # Checkpoints deleted by hand are simply forgotten
+        self.entries = [e for e in self.entries
+                        if os.path.exists(os.path.join(self.models_dir, e["file"]))]
+
+
+    def _scan(self):
+        '''Legacy entries for checkpoint files saved before the manifest existed'''
+        entries = []
+        for f in glob.glob(os.path.join(self.models_dir, "*.keras")):
+            name = os.path.basename(f)
+            for kind, pattern in _FILE_PATTERNS.items():
+                m = pattern.match(name)
+                if m:
+                    try:
+                        entry = self._entry(int(m.group(1)), f, kind, None, None, hash_file=self.build)
+                    except OSError:
+                        continue  # Unreadable right now; picked up by the next scan
+                    entry["legacy"] = True
+                    entries.append(entry)
+        entries.sort(key=lambda e: (e["kind"], e["episode"]))
+        return entries
+
+
+    def _entry(self, episode, path, kind, avg, max_score, hash_file=True):
+        return dict(episode=episode, kind=kind, file=os.path.basename(path),
+                    avg=avg, max=max_score, size=os.path.getsize(path),
+                    sha256=file_sha256(path) if hash_file else None, saved=time.time())
+
+
+    def save(self):
+        # A unique temporary file, so concurrent writers never share one
+        fd, tmp = tempfile.mkstemp(prefix=MANIFEST_NAME, suffix=".tmp", dir=self.models_dir)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(version=MANIFEST_VERSION, checkpoints=self.entries), f, indent=1)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+
+    def add(self, episode, path, avg=None, max_score=None, kind="episode"):
+        '''Records a checkpoint just written to `path`, then applies the retention policy'''
+        self.entries = [e for e in self.entries
+                        if not (e["kind"] == kind and e["episode"] == episode)]
+        entry = self._entry(episode, path, kind, avg, max_score)
+        self.entries.append(entry)
+        self.entries.sort(key=lambda e: (e["kind"], e["episode"]))
+        self.prune()
+        self.save()
+        return entry
+
+
+    def retained(self, kind):
+        '''Episodes of `kind` that the retention policy keeps'''
+        entries = [e for e in self.entries if e["kind"] == kind]
+        keep = {e["episode"] for e in entries[-self.keep_last:]}
+        if self.keep_every:
+            keep.update(e["episode"] for e in entries if e["episode"] % self.keep_every == 0)
+        if self.keep_best:
+            scored = [e for e in entries if e.get("avg") is not None]
+            scored.sort(key=lambda e: e["avg"], reverse=True)
+            keep.update(e["episode"] for e in scored[:self.keep_best])
+        return keep
+
+
+    def _remove(self, entry):
+        '''Deletes a checkpoint file, retrying briefly; False if it is still there'''
+        path = self.file_path(entry)
+        for attempt in range(REMOVE_RETRIES):
+            try:
+                os.remove(path)
+                return True
+            except FileNotFoundError:
+                return True
+            except OSError:
+                if attempt + 1 < REMOVE_RETRIES:
+                    time.sleep(REMOVE_RETRY_DELAY)
+        return False
+
+
+    def prune(self):
+        '''Deletes checkpoints outside the retention policy; returns the removed entries
+
+        Legacy checkpoints are never deleted. Checkpoints that can't be
+        deleted (e.g. open in another process) are kept in the manifest so a
+        later prune tries again.'''
+        keep = {kind: self.retained(kind) for kind in {e["kind"] for e in self.entries}}
+        removed, failed = [], []
+        for e in self.entries:
+            if not e.get("legacy") and e["episode"] not in keep[e["kind"]]:
+                (removed if self._remove(e) else failed).append(e)
+        if failed:
+            print(f"[WARN] Could not delete {len(failed)} checkpoint(s), retrying at the next "
+                  f"save: {', '.join(e['file'] for e in failed)}")
+        self.entries = [e for e in self.entries if e not in removed]
+        return removed
+
+
+    def episodes(self, kind="episode"):
+        '''Sorted episode numbers of the checkpoints of `kind`'''
+        return [e["episode"] for e in self.entries if e["kind"] == kind]
+
+
+    def latest(self, kind="episode"):
+        '''Entry of the most recent checkpoint of `kind`, or None'''
+        entries = [e for e in self.entries if e["kind"] == kind]
+        return entries[-1] if entries else None
+
+
+    def find(self, episode, kind="episode"):
+        '''Entry of the checkpoint for `episode`, or None'''
+        for e in self.entries:
+            if e["kind"] == kind and e["episode"] == episode:
+                return e
+        return None
+
+
+    def file_path(self, entry):
+        return os.path.join(self.models_dir, entry["file"])
@@ -5,9 +5,11 @@ os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '1')  # Enable oneDNN optimizatio
 os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')   # Suppress ALL TF logs
 
 import tensorflow as tf
-# Configure TensorFlow to use all available CPU cores efficiently
-tf.config.threading.set_intra_op_parallelism_threads(0)  # Auto-detect
-tf.config.threading.set_inter_op_parallelism_threads(0)  # Auto-detect
+# Configure TensorFlow to use all available CPU cores efficiently, unless a
+# thread budget is given (e.g. by sweep.py running several trainings at once)
+_tf_threads = int(os.environ.get('TETRIS_TF_THREADS', '0'))
+tf.config.threading.set_intra_op_parallelism_threads(_tf_threads)  # 0 = auto-detect
+tf.config.threading.set_inter_op_parallelism_threads(1 if _tf_threads else 0)
 
 # Enable GPU if available with memory growth to avoid crashes
 try:
@@ -30,9 +32,10 @@ except Exception:
 
 from keras.models import Sequential, load_model
 from keras.layers import Dense, Input
-from collections import deque
+from collections import deque, OrderedDict
 import numpy as np
 import random
+import time
 
 # Deep Q Learning Agent + Maximin
 #
@@ -59,12 +62,14 @@ class DQNAgent:
         optimizer (obj): Optimizer used
         replay_start_size: Minimum size needed to train
         modelFile: Previously trained model file path to load (arguments such as activations will be ignored)
+        value_cache_size (int): Max predicted values cached per state in best_state (0 disables the cache)
     '''
 
     def __init__(self, state_size, mem_size=10000, discount=0.95,
                  epsilon=1, epsilon_min=0, epsilon_stop_episode=0,
                  n_neurons=[32, 32], activations=['relu', 'relu', 'linear'],
-                 loss='mse', optimizer='adam', replay_start_size=None, modelFile=None):
+                 loss='mse', optimizer='adam', replay_start_size=None, modelFile=None,
+                 value_cache_size=0):
 
         if len(activations) != len(n_neurons) + 1:
             raise ValueError("n_neurons and activations do not match, "
@@ -94,6 +99,17 @@ class DQNAgent:
             replay_start_size = mem_size / 2
         self.replay_start_size = replay_start_size
 
+        # Value cache: state tuple -> (weights_version, value). Entries from an
+        # older version are stale and get recomputed on lookup.
+        self.weights_version = 0
+        self.value_cache_size = value_cache_size
+        self._value_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Loss, Q-value statistics and phase timings of the last train() call
+        self.last_train_stats = None
+
         # load an existing model
         if modelFile is not None:
             self.model = load_model(modelFile, compile=False)
@@ -155,21 +171,81 @@ class DQNAgent:
             return random.choice(list(states))
 
         states_list = list(states)
-        batch = np.array(states_list)
-        predictions = self.model(batch, training=False).numpy()
+        if self.value_cache_size:
+            predictions = self._cached_values(states_list)
+        else:
+            batch = np.array(states_list)
+            predictions = self.model(batch, training=False).numpy()
         best_idx = np.argmax(predictions)
         return states_list[best_idx]
 
 
-    def train(self, batch_size=32, epochs=3):
-        '''Trains the agent'''
+    def _cached_values(self, states_list):
+        '''Predicted values for a list of states, running the model only on cache misses'''
+        cache = self._value_cache
+        version = self.weights_version
+        values = [0.0] * len(states_list)
+        misses = []
+        for i, state in enumerate(states_list):
+            key = tuple(state)
+            entry = cache.get(key)
+            if entry is not None and entry[0] == version:
+                cache.move_to_end(key)
+                values[i] = entry[1]
+            else:
+                misses.append(i)
+        self.cache_hits += len(states_list) - len(misses)
+        self.cache_misses += len(misses)
+
+        if misses:
+            batch = np.array([states_list[i] for i in misses], dtype=np.float32)
+            predicted = self.model(batch, training=False).numpy()[:, 0]
+            for i, value in zip(misses, predicted):
+                value = float(value)
+                values[i] = value
+                cache[tuple(states_list[i])] = (version, value)
+                cache.move_to_end(tuple(states_list[i]))
+            while len(cache) > self.value_cache_size:
+                cache.popitem(last=False)
+        return values
+
+
+    def cache_stats(self):
+        '''Hit rate and size of the value cache'''
+        lookups = self.cache_hits + self.cache_misses
+        return dict(hits=self.cache_hits, misses=self.cache_misses,
+                    hit_rate=self.cache_hits / lookups if lookups else 0.0,
+                    size=len(self._value_cache), version=self.weights_version)
+
+
+    def set_weights(self, weights):
+        '''Replaces the model weights, invalidating cached values'''
+        self.model.set_weights(weights)
+        self.weights_version += 1
+
+
+    def decay_epsilon(self):
+        '''Moves the exploration variable one step towards epsilon_min'''
+        if self.epsilon > self.epsilon_min:
+            self.epsilon -= self.epsilon_decay
+
+
+    def train(self, batch_size=32, epochs=3, decay_epsilon=True):
+        '''Trains the agent.
+
+        Epsilon decays once per call unless `decay_epsilon` is False (for
+        callers that train several times per episode and decay it themselves).
+        Returns a dict with the loss, Q-value statistics and phase timings
+        (also kept in last_train_stats), or None if the memory is too small.'''
         n = len(self.memory)
 
         if n >= self.replay_start_size and n >= batch_size:
 
+            t0 = time.perf_counter()
             batch = random.sample(self.memory, batch_size)
 
             # Get the expected score for the next states, in batch (better performance)
+            t1 = time.perf_counter()
             next_states = np.array([x[1] for x in batch], dtype=np.float32)
             next_qs = [x[0] for x in self.model(next_states, training=False).numpy()]
 
@@ -188,11 +264,27 @@ class DQNAgent:
                 y[i] = new_q
 
             # Fit the model to the given values (workers not needed for numpy arrays)
-            self.model.fit(x, y, batch_size=batch_size, epochs=epochs, verbose=0)
+            t2 = time.perf_counter()
+            history = self.model.fit(x, y, batch_size=batch_size, epochs=epochs, verbose=0)
+            t3 = time.perf_counter()
+            self.weights_version += 1
 
             # Update the exploration variable
-            if self.epsilon > self.epsilon_min:
-                self.epsilon -= self.epsilon_decay
+            if decay_epsilon:
+                self.decay_epsilon()
+
+            losses = history.history.get('loss') or [None]
+            self.last_train_stats = dict(
+                loss=losses[-1],
+                next_q_mean=float(np.mean(next_qs)),
+                next_q_max=float(np.max(next_qs)),
+                target_mean=float(y.mean()),
+                sample_seconds=t1 - t0,
+                target_seconds=t2 - t1,
+                fit_seconds=t3 - t2,
+            )
+            return self.last_train_stats
+        return None
 
 
     def save_model(self, name):
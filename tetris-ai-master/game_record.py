@@ -0,0 +1,281 @@
+import json
+import os
+import struct
+import zlib
+
+from tetris import Tetris
+
+# Compact game recordings
+#
+# A game is stored as its seed plus one byte per placement. Because a seeded
+# Tetris game draws its pieces from the seed alone (see Tetris.reset), the
+# actions are enough to rebuild every board exactly. Periodic keyframes of
+# the full game state let a replay seek to any piece without re-simulating
+# the whole game from the start.
+#
+# A recording file is a flat sequence of chunks, so games (and parts of a
+# game still being played) can simply be appended:
+#
+#   <tag: 1 byte> <payload length: uint32 LE> <payload>
+#
+#   G  start of a game, JSON header (seed, episode, keyframe interval)
+#   A  zlib-compressed action bytes, continuing the current game
+#   K  keyframe: state of the current game before a given piece
+#   E  end of the current game, JSON footer (pieces, score)
+
+FORMAT_VERSION = 1
+
+_CHUNK_HEAD = struct.Struct('<cI')
+# piece index, score, bags drawn, current piece, next piece, bag length
+_KEYFRAME_HEAD = struct.Struct('<IQIBBB')
+_BOARD_BYTES = (Tetris.BOARD_WIDTH * Tetris.BOARD_HEIGHT + 7) // 8
+
+
+def encode_action(x, rotation):
+    '''Packs a play (x >= -2, rotation in degrees) into a single byte'''
+    return (x + 2) * 4 + rotation // 90
+
+
+def decode_action(byte):
+    '''Inverse of encode_action, returning (x, rotation)'''
+    return byte // 4 - 2, (byte % 4) * 90
+
+
+def _pack_board(board):
+    bits = 0
+    for row in board:
+        for cell in row:
+            bits = (bits << 1) | (1 if cell == Tetris.MAP_BLOCK else 0)
+    return bits.to_bytes(_BOARD_BYTES, 'big')
+
+
+def _unpack_board(data):
+    bits = int.from_bytes(data, 'big')
+    n = Tetris.BOARD_WIDTH * Tetris.BOARD_HEIGHT
+    cells = [(bits >> (n - 1 - i)) & 1 for i in range(n)]
+    w = Tetris.BOARD_WIDTH
+    return [cells[r * w:(r + 1) * w] for r in range(Tetris.BOARD_HEIGHT)]
+
+
+def encode_keyframe(env, piece_index):
+    '''Serializes the state of a seeded game before it places piece `piece_index`'''
+    return _KEYFRAME_HEAD.pack(piece_index, env.score, env.bags_drawn,
+                               env.current_piece, env.next_piece, len(env.bag)) \
+        + bytes(env.bag) + _pack_board(env.board)
+
+
+def decode_keyframe(data):
+    '''Returns (piece_index, state dict) for a keyframe payload'''
+    idx, score, bags_drawn, current, nxt, bag_len = _KEYFRAME_HEAD.unpack_from(data)
+    off = _KEYFRAME_HEAD.size
+    bag = list(data[off:off + bag_len])
+    board = _unpack_board(data[off + bag_len:off + bag_len + _BOARD_BYTES])
+    return idx, dict(score=score, bags_drawn=bags_drawn, current_piece=current,
+                     next_piece=nxt, bag=bag, board=board)
+
+
+def _write_chunk(f, tag, payload):
+    f.write(_CHUNK_HEAD.pack(tag, len(payload)))
+    f.write(payload)
+
+
+class GameRecorder:
+
+    '''Appends seeded games to a recording file
+
+    Args:
+        path (str): Recording file, created if missing and appended to otherwise
+        keyframe_every (int): Pieces between keyframes (seek granularity)
+        flush_every (int): Actions buffered in memory before a chunk is written
+    '''
+
+    def __init__(self, path, keyframe_every=1000, flush_every=4096):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.flush_every = flush_every
+        self._file = None
+        self._actions = bytearray()
+        self.pieces = 0
+
+
+    def start(self, env, episode=None):
+        '''Starts recording a game; `env` must have just been reset with a seed'''
+        if env.seed is None:
+            raise ValueError("only seeded games can be recorded")
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, 'ab')
+        self._actions.clear()
+        self.pieces = 0
+        header = dict(version=FORMAT_VERSION, seed=env.seed, episode=episode,
+                      keyframe_every=self.keyframe_every)
+        _write_chunk(self._file, b'G', json.dumps(header).encode())
+
+
+    def record(self, x, rotation, env):
+        '''Records a play; `env` is the game right after `env.play(x, rotation)`'''
+        self._actions.append(encode_action(x, rotation))
+        self.pieces += 1
+        if self.pieces % self.keyframe_every == 0 and not env.game_over:
+            self._flush_actions()
+            _write_chunk(self._file, b'K', encode_keyframe(env, self.pieces))
+        elif len(self._actions) >= self.flush_every:
+            self._flush_actions()
+
+
+    def _flush_actions(self):
+        if self._actions:
+            _write_chunk(self._file, b'A', zlib.compress(bytes(self._actions)))
+            self._actions.clear()
+
+
+    def finish(self, env):
+        '''Writes the remaining actions and the end-of-game footer'''
+        if self._file is None:
+            return
+        self._flush_actions()
+        footer = dict(pieces=self.pieces, score=env.get_game_score())
+        _write_chunk(self._file, b'E', json.dumps(footer).encode())
+        self.close()
+
+
+    def close(self):
+        '''Closes the file; an unfinished game stays replayable up to its last chunk'''
+        if self._file is not None:
+            self._flush_actions()
+            self._file.close()
+            self._file = None
+
+
+def list_games(path):
+    '''Indexes the games in a recording file without reading their actions.
+
+    Returns a list of dicts with the game's file offset, seed, episode and,
+    for finished games, the number of pieces and final score.'''
+    games = []
+    if not os.path.exists(path):
+        return games
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            head = f.read(_CHUNK_HEAD.size)
+            if len(head) < _CHUNK_HEAD.size:
+                break
+            tag, length = _CHUNK_HEAD.unpack(head)
+            if tag == b'G':
+                info = json.loads(f.read(length))
+                games.append(dict(offset=offset, seed=info["seed"],
+                                  episode=info.get("episode"),
+                                  pieces=None, score=None))
+            elif tag == b'E' and games:
+                games[-1].update(json.loads(f.read(length)))
+            else:
+                f.seek(length, os.SEEK_CUR)
+    return games
+
+
+def find_game(path, episode=None):
+    '''Returns the latest recorded game for an episode (or overall), or None'''
+    games = list_games(path)
+    if episode is not None:
+        games = [g for g in games if g["episode"] == episode]
+    return games[-1] if games else None
+
+
+class GameRecord:
+
+    '''A single recorded game loaded in memory'''
+
+    def __init__(self, seed, episode, actions, keyframes, score=None):
+        self.seed = seed
+        self.episode = episode
+        self.actions = actions
+        self.keyframes = keyframes  # piece index -> keyframe payload
+        self.score = score
+
+    def __len__(self):
+        return len(self.actions)
+
+
+def load_game(path, offset):
+    '''Loads the game starting at `offset` (as given by list_games)'''
+    actions = bytearray()
+    keyframes = {}
+    score = None
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        tag, length = _CHUNK_HEAD.unpack(f.read(_CHUNK_HEAD.size))
+        if tag != b'G':
+            raise ValueError(f"no game starts at offset {offset}")
+        header = json.loads(f.read(length))
+        while True:
+            head = f.read(_CHUNK_HEAD.size)
+            if len(head) < _CHUNK_HEAD.size:
+                break
+            tag, length = _CHUNK_HEAD.unpack(head)
+            payload = f.read(length)
+            if tag == b'A':
+                actions += zlib.decompress(payload)
+            elif tag == b'K':
+                keyframes[struct.unpack_from('<I', payload)[0]] = payload
+            elif tag == b'E':
+                score = json.loads(payload).get("score")
+                break
+            elif tag == b'G':
+                break
+    return GameRecord(header["seed"], header.get("episode"), bytes(actions),
+                      keyframes, score)
+
+
+class GameReplay:
+
+    '''Deterministically replays a GameRecord, with keyframe-based seeking'''
+
+    def __init__(self, record):
+        self.record = record
+        self.env = Tetris()
+        self.index = None
+        self.seek(0)
+
+
+    def __len__(self):
+        return len(self.record)
+
+
+    @property
+    def done(self):
+        return self.index >= len(self.record) or self.env.game_over
+
+
+    def seek(self, index):
+        '''Moves the replay to the state before piece `index` is placed'''
+        index = max(0, min(index, len(self.record)))
+        env = self.env
+        start = max((k for k in self.record.keyframes if k <= index), default=0)
+        # Stepping forward from the current position is cheapest unless a
+        # keyframe lies between here and the target
+        if self.index is None or index < self.index or start > self.index:
+            if start:
+                _, state = decode_keyframe(self.record.keyframes[start])
+                env.seed = self.record.seed
+                env.game_over = False
+                env.board = state["board"]
+                env.score = state["score"]
+                env.bags_drawn = state["bags_drawn"]
+                env.bag = state["bag"]
+                env.current_piece = state["current_piece"]
+                env.next_piece = state["next_piece"]
+                env.current_pos = [3, 0]
+                env.current_rotation = 0
+            else:
+                env.reset(seed=self.record.seed)
+            self.index = start
+        while self.index < index and not env.game_over:
+            self.step()
+
+
+    def step(self):
+        '''Places the next recorded piece, returning (reward, game over)'''
+        x, rotation = decode_action(self.record.actions[self.index])
+        self.index += 1
+        return self.env.play(x, rotation)
@@ -0,0 +1,114 @@
+import random
+import time
+
+import numpy as np
+
+from tetris import Tetris
+
+# Weighted-feature heuristic player
+#
+# Scores each candidate placement by a fixed linear combination of the same
+# board features the DQN sees (Tetris._get_board_props: lines cleared,
+# holes, total bumpiness, aggregate height), evaluated for all candidates
+# with one matrix product. It plays hundreds of pieces per game from the
+# start, so it is used to fill the replay memory with useful transitions
+# before training (instead of epsilon=1 random play, which dies after ~20
+# pieces) and as a pieces/second baseline for the engine.
+#
+# Benchmark with:
+#   python heuristic_agent.py --pieces 20000
+
+# lines, holes, bumpiness, height (the well-known weights of a hand-tuned
+# Tetris heuristic, reordered to match the state vector)
+DEFAULT_WEIGHTS = (0.760666, -0.35663, -0.184483, -0.510066)
+
+
+class HeuristicAgent:
+
+    '''Greedy linear-heuristic player with the best_state interface of DQNAgent
+
+    Args:
+        weights (tuple): One weight per state feature
+        epsilon (float): Probability of a random placement (adds variety to prefilled data)
+    '''
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, epsilon=0.0):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.epsilon = epsilon
+
+
+    def predict(self, states):
+        '''Heuristic value of each state in a batch'''
+        return np.asarray(states, dtype=np.float32) @ self.weights
+
+
+    def best_state(self, states):
+        '''Returns the best state for a given collection of states'''
+        states_list = list(states)
+        if self.epsilon and random.random() < self.epsilon:
+            return random.choice(states_list)
+        return states_list[int(np.argmax(self.predict(states_list)))]
+
+
+def prefill_memory(agent, n_transitions, heuristic=None, max_pieces=500, piece_limit=0):
+    '''Adds `n_transitions` heuristic-play transitions to a DQNAgent's memory.
+
+    Games are cut after `max_pieces` so the data also contains game starts
+    and (from the random placements) game overs. Returns (transitions, games,
+    seconds).'''
+    heuristic = heuristic or HeuristicAgent(epsilon=0.05)
+    env = Tetris()
+    added = games = 0
+    start = time.perf_counter()
+    while added < n_transitions:
+        current_state = env.reset()
+        games += 1
+        done = False
+        pieces = 0
+        while not done and pieces < max_pieces and added < n_transitions:
+            if piece_limit > 0 and env.get_game_score() >= piece_limit:
+                break
+            nxt = {tuple(v): k for k, v in env.get_next_states().items()}
+            best = heuristic.best_state(nxt.keys())
+            act = nxt[best]
+            reward, done = env.play(act[0], act[1], render=False, piece_limit=piece_limit)
+            agent.add_to_memory(current_state, best, reward, done)
+            current_state = best
+            pieces += 1
+            added += 1
+    return added, games, time.perf_counter() - start
+
+
+def benchmark(pieces=20000, agent=None, seed=0):
+    '''Plays `pieces` placements and returns a dict with pieces/second and game stats'''
+    agent = agent or HeuristicAgent()
+    env = Tetris()
+    env.reset(seed=seed)
+    games, played, scores = 1, 0, []
+    start = time.perf_counter()
+    while played < pieces:
+        if env.game_over:
+            scores.append(env.get_game_score())
+            games += 1
+            env.reset(seed=seed + games)
+        nxt = {tuple(v): k for k, v in env.get_next_states().items()}
+        act = nxt[agent.best_state(nxt.keys())]
+        env.play(act[0], act[1])
+        played += 1
+    elapsed = time.perf_counter() - start
+    return dict(pieces=played, seconds=elapsed, pieces_per_second=played / elapsed,
+                games_finished=len(scores), mean_score=float(np.mean(scores)) if scores else None,
+                current_score=env.get_game_score())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Heuristic Tetris player throughput baseline")
+    parser.add_argument("--pieces", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    r = benchmark(args.pieces, seed=args.seed)
+    print(f"[INFO] {r['pieces']:,} pieces in {r['seconds']:.1f}s = {r['pieces_per_second']:,.0f} pieces/s")
+    print(f"[INFO] Games finished: {r['games_finished']}, current game score {r['current_score']:,}")
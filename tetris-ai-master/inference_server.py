@@ -0,0 +1,419 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from wire import new_authkey, recv_msg, send_msg
+
+# Local inference service with dynamic micro-batching
+#
+# Visualization, evaluation and training actors normally each load their own
+# copy of a model and run one tiny batch (one game's candidate placements)
+# per move. The server hosts the checkpoints once and merges the requests of
+# every connected client into a single forward pass, waiting at most
+# `max_delay` seconds for more requests to arrive before running a batch.
+#
+# Transport is multiprocessing.connection: by default a Unix socket on
+# POSIX (in a private temporary directory) or a named pipe on Windows, with
+# a random authkey generated for the run. Clients get the address and key
+# from whoever started the server (start_server_process returns both; the
+# CLI prints them). A TCP (host, port) address is only accepted with an
+# explicit authkey, since any local user can reach a TCP port.
+#
+# Messages are pickle-free (see wire.py). Clients can ask the server to
+# load checkpoints, but only from files under its models directory.
+#
+# Run standalone with:
+#   python inference_server.py --model best=models/best.keras
+#   python inference_server.py --model best=models/best.keras --port 6001 --authkey <secret>
+
+MODELS_DIR = os.environ.get("TETRIS_MODELS_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "models")
+
+
+def check_listen_address(address, authkey):
+    '''Raises ValueError for a TCP address without an explicit authkey'''
+    if isinstance(address, tuple) and not authkey:
+        raise ValueError(f"refusing to listen on {address[0]}:{address[1]} without an explicit "
+                         "authkey; pass one or use the default local socket")
+
+
+class InferenceServer:
+
+    '''Hosts one or more value networks and batches requests across clients
+
+    Args:
+        address: Listener address (path, pipe name or (host, port)); None picks a local socket/pipe
+        authkey (bytes): Shared secret clients must present; random if None (required for TCP)
+        max_batch (int): Maximum number of states evaluated in one forward pass
+        max_delay (float): Seconds to wait for more requests after the first one
+        models_dir (str): Directory clients may load checkpoints from
+    '''
+
+    def __init__(self, address=None, authkey=None, max_batch=4096, max_delay=0.002,
+                 models_dir=MODELS_DIR):
+        check_listen_address(address, authkey)
+        self.authkey = authkey or new_authkey()
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.models_dir = os.path.realpath(models_dir)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.models = {}
+        self._models_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._stop = threading.Event()
+        self._serving = threading.Event()
+
+        # Statistics
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests_served = 0
+        self.states_served = 0
+        self.max_batch_seen = 0
+        self.batch_hist = Counter()  # power-of-two bucket of states per batch
+        self.clients = 0
+
+
+    def load(self, name, path):
+        '''Loads (or replaces) the checkpoint served under `name` (any path; see load_request)'''
+        from dqn_agent import load_model
+        model = load_model(path, compile=False)
+        model(np.zeros((1, model.input_shape[-1]), dtype=np.float32), training=False)
+        with self._models_lock:
+            self.models[name] = model
+
+
+    def load_request(self, name, path):
+        '''load() on behalf of a client: `path` (absolute or relative to the
+        models directory) must name a file inside the models directory'''
+        full = os.path.realpath(os.path.join(self.models_dir, path))
+        if os.path.commonpath([full, self.models_dir]) != self.models_dir:
+            raise ValueError(f"{path} is outside the models directory")
+        self.load(name, full)
+
+
+    def stats(self):
+        '''Queue depth and batch-size statistics'''
+        with self._stats_lock:
+            return dict(
+                queue_depth=self._requests.qsize(),
+                clients=self.clients,
+                models=sorted(self.models),
+                batches=self.batches,
+                requests=self.requests_served,
+                states=self.states_served,
+                mean_requests_per_batch=self.requests_served / self.batches if self.batches else 0,
+                mean_batch_size=self.states_served / self.batches if self.batches else 0,
+                max_batch_size=self.max_batch_seen,
+                # String keys, as they arrive over the JSON protocol
+                batch_size_histogram={str(k): v for k, v in sorted(self.batch_hist.items())},
+            )
+
+
+    def serve_forever(self):
+        '''Accepts clients until stop() is called'''
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        self._serving.set()
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn = self.listener.accept()
+                except (AuthenticationError, EOFError) as e:
+                    print(f"[WARN] Rejected inference client: {e}")
+                    continue
+                except OSError:
+                    break
+                if self._stop.is_set():
+                    conn.close()  # stop()'s wake-up connection
+                    break
+                threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+        finally:
+            self._serving.clear()
+            self.listener.close()
+
+
+    def stop(self):
+        self._stop.set()
+        self._requests.put(None)
+        if self._serving.is_set():
+            # Closing a listener does not reliably wake a blocked accept();
+            # a connection of our own does, and serve_forever then closes it
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except (OSError, EOFError, AuthenticationError):
+                pass
+        else:
+            self.listener.close()
+
+
+    def _client_loop(self, conn):
+        '''Reads requests from one client; replies are sent by the batch loop'''
+        with self._stats_lock:
+            self.clients += 1
+        send_lock = threading.Lock()
+        try:
+            while not self._stop.is_set():
+                try:
+                    msg, arrays = recv_msg(conn)
+                except ValueError as e:
+                    self._reply(conn, send_lock, 'error', message=f"malformed request: {e}")
+                    continue
+                kind = msg['kind']
+                if kind == 'predict':
+                    req_id = msg.get('req_id')
+                    states = arrays.get('states')
+                    if states is None or not isinstance(msg.get('model'), str):
+                        self._reply(conn, send_lock, 'error', req_id=req_id,
+                                    message="predict needs a model name and states")
+                        continue
+                    self._requests.put((conn, send_lock, req_id, msg['model'],
+                                        states.astype(np.float32, copy=False)))
+                elif kind == 'load':
+                    name, path = msg.get('name'), msg.get('path')
+                    try:
+                        if not isinstance(name, str) or not isinstance(path, str):
+                            raise ValueError("load needs a model name and a path")
+                        self.load_request(name, path)
+                        self._reply(conn, send_lock, 'ok', name=name)
+                    except Exception as e:
+                        self._reply(conn, send_lock, 'error', message=f"could not load {path}: {e}")
+                elif kind == 'stats':
+                    self._reply(conn, send_lock, 'stats', stats=self.stats())
+                elif kind == 'close':
+                    break
+                else:
+                    self._reply(conn, send_lock, 'error', message=f"unknown request '{kind}'")
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._stats_lock:
+                self.clients -= 1
+            conn.close()
+
+
+    def _collect(self):
+        '''Blocks for one request, then gathers more until the deadline or batch limit'''
+        first = self._requests.get()
+        if first is None:
+            return None
+        pending = [first]
+        size = len(first[4])
+        deadline = time.perf_counter() + self.max_delay
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                req = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                self._stop.set()
+                break
+            pending.append(req)
+            size += len(req[4])
+        return pending
+
+
+    def _batch_loop(self):
+        while not self._stop.is_set():
+            pending = self._collect()
+            if not pending:
+                break
+            by_model = defaultdict(list)
+            for req in pending:
+                by_model[req[3]].append(req)
+
+            for name, reqs in by_model.items():
+                with self._models_lock:
+                    model = self.models.get(name)
+                if model is None:
+                    for conn, send_lock, req_id, _, _ in reqs:
+                        self._reply(conn, send_lock, 'error', req_id=req_id,
+                                    message=f"unknown model '{name}'")
+                    continue
+
+                width = model.input_shape[-1]
+                valid = []
+                for req in reqs:
+                    conn, send_lock, req_id, _, states = req
+                    if states.ndim != 2 or states.shape[1] != width or not len(states):
+                        self._reply(conn, send_lock, 'error', req_id=req_id,
+                                    message=f"expected a non-empty (n, {width}) batch of states, "
+                                            f"got {states.shape}")
+                    else:
+                        valid.append(req)
+                reqs = valid
+                if not reqs:
+                    continue
+                try:
+                    batch = np.concatenate([r[4] for r in reqs])
+                    values = model(batch, training=False).numpy()[:, 0]
+                except Exception as e:
+                    # One bad request must not take the batching thread down
+                    # with it: fail this batch and keep serving
+                    for conn, send_lock, req_id, _, _ in reqs:
+                        self._reply(conn, send_lock, 'error', req_id=req_id,
+                                    message=f"inference failed: {e}")
+                    continue
+                start = 0
+                for conn, send_lock, req_id, _, states in reqs:
+                    v = values[start:start + len(states)]
+                    start += len(states)
+                    self._reply(conn, send_lock, 'result', dict(values=v), req_id=req_id,
+                                best=int(np.argmax(v)))
+
+                with self._stats_lock:
+                    self.batches += 1
+                    self.requests_served += len(reqs)
+                    self.states_served += len(batch)
+                    self.max_batch_seen = max(self.max_batch_seen, len(batch))
+                    self.batch_hist[1 << (len(batch) - 1).bit_length()] += 1
+
+
+    def _reply(self, conn, send_lock, kind, arrays=None, **fields):
+        try:
+            with send_lock:
+                send_msg(conn, kind, arrays, **fields)
+        except (OSError, ValueError):
+            pass  # Client went away; its reader thread cleans up
+
+
+class InferenceClient:
+
+    '''Connection to an InferenceServer with a DQNAgent-like interface
+
+    Args:
+        address: Server address (InferenceServer.address)
+        model (str): Name of the hosted checkpoint to query
+        authkey (bytes): Shared secret of the server (InferenceServer.authkey)
+    '''
+
+    def __init__(self, address, model='default', authkey=None):
+        if not authkey:
+            raise ValueError("the inference server's authkey is required")
+        self.conn = Client(address, authkey=authkey)
+        self.model = model
+        self.epsilon = 0
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+
+    def _call(self, kind, arrays=None, **fields):
+        '''Sends a request and returns the reply; raises RuntimeError on an error reply'''
+        with self._lock:
+            send_msg(self.conn, kind, arrays, **fields)
+            msg, reply_arrays = recv_msg(self.conn)
+        if msg['kind'] == 'error':
+            raise RuntimeError(msg.get('message', "inference server error"))
+        return msg, reply_arrays
+
+
+    def load(self, path, name=None):
+        '''Asks the server to host `path` (inside its models directory) under
+        `name` (defaults to this client's model)'''
+        self._call('load', name=name or self.model, path=path)
+
+
+    def predict(self, states):
+        '''Returns (index of the best state, values of all states)'''
+        self._next_id += 1
+        msg, arrays = self._call('predict', dict(states=np.asarray(states, dtype=np.float32)),
+                                 req_id=self._next_id, model=self.model)
+        return msg['best'], arrays['values']
+
+
+    def best_state(self, states):
+        '''Returns the best state for a given collection of states'''
+        states_list = list(states)
+        best_idx, _ = self.predict(states_list)
+        return states_list[best_idx]
+
+
+    def stats(self):
+        return self._call('stats')[0]['stats']
+
+
+    def close(self):
+        try:
+            send_msg(self.conn, 'close')
+        except OSError:
+            pass
+        self.conn.close()
+
+
+def parse_address(text):
+    '''Parses "host:port" into a TCP address; anything else is a socket path or pipe name'''
+    host, sep, port = text.rpartition(':')
+    if sep and port.isdigit() and not text.startswith('\\\\'):
+        return (host or '127.0.0.1', int(port))
+    return text
+
+
+def run_server(models, address=None, authkey=None, ready=None, **kwargs):
+    '''Process entry point: loads `models` ({name: path}) and serves until killed.
+
+    If `ready` is a multiprocessing queue, (address, authkey) is put on it
+    once the models are loaded.'''
+    server = InferenceServer(address, authkey=authkey, **kwargs)
+    for name, path in models.items():
+        server.load(name, path)
+    print(f"[INFO] Inference server listening on {server.address}")
+    if ready is not None:
+        ready.put((server.address, server.authkey))
+    server.serve_forever()
+
+
+def start_server_process(models, address=None, authkey=None, **kwargs):
+    '''Starts run_server in a child process, returning (process, address, authkey)'''
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    ready = ctx.Queue()
+    proc = ctx.Process(target=run_server, args=(models, address, authkey, ready),
+                       kwargs=kwargs, daemon=True)
+    proc.start()
+    return (proc, *ready.get())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batched inference server for Tetris AI value networks")
+    parser.add_argument("--model", action="append", default=[], metavar="NAME=PATH",
+                        help="checkpoint to host (repeatable); a bare path is served as 'default'")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="TCP port; 0 uses a local socket/pipe")
+    parser.add_argument("--authkey", default=None,
+                        help="shared secret (required for TCP; random for the local socket/pipe)")
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="directory clients may load checkpoints from")
+    parser.add_argument("--max-batch", type=int, default=4096)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    models = {}
+    for spec in args.model:
+        name, sep, path = spec.partition('=')
+        if not sep:
+            name, path = 'default', spec
+        models[name] = os.path.abspath(path)
+    address = (args.host, args.port) if args.port else None
+    authkey = args.authkey.encode() if args.authkey else None
+    try:
+        check_listen_address(address, authkey)
+    except ValueError as e:
+        parser.error(str(e))
+    server = InferenceServer(address, authkey=authkey, max_batch=args.max_batch,
+                             max_delay=args.max_delay_ms / 1000, models_dir=args.models_dir)
+    for name, path in models.items():
+        server.load(name, path)
+    address_text = f"{address[0]}:{address[1]}" if address else server.address
+    print(f"[INFO] Inference server listening on {server.address}; for the GUI:")
+    print(f"  TETRIS_INFERENCE_SERVER={address_text} TETRIS_INFERENCE_AUTHKEY={server.authkey.decode()}")
+    server.serve_forever()
@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+
+# TensorBoard metrics from the training loop
+#
+# The training loop only enqueues (tag, value, step) tuples; a background
+# thread owns the tf.summary file writer and flushes it every `flush_secs`.
+# If the writer falls behind and the queue fills up, new points are dropped
+# (and counted) rather than blocking training.
+#
+# View with:
+#   tensorboard --logdir runs            (add --bind_all to watch from another machine)
+
+
+class MetricsWriter:
+
+    '''Buffered, non-blocking TensorBoard scalar writer
+
+    Args:
+        logdir (str): Directory for the event files of this run
+        flush_secs (float): Seconds between flushes to disk
+        max_queue (int): Points buffered before new ones are dropped
+    '''
+
+    def __init__(self, logdir, flush_secs=10.0, max_queue=100_000):
+        self.logdir = logdir
+        self.flush_secs = flush_secs
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True,
+                                        name="metrics-writer")
+        self._thread.start()
+
+
+    def scalar(self, tag, value, step):
+        try:
+            self._queue.put_nowait((tag, float(value), int(step)))
+        except queue.Full:
+            self.dropped += 1
+
+
+    def scalars(self, values, step, prefix=""):
+        '''Logs every entry of a dict (None values are skipped)'''
+        for tag, value in values.items():
+            if value is not None:
+                self.scalar(prefix + tag, value, step)
+
+
+    def close(self, timeout=10.0):
+        '''Writes everything still queued and stops the writer thread'''
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+    def _write_loop(self):
+        import tensorflow as tf
+        writer = tf.summary.create_file_writer(self.logdir)
+        next_flush = time.monotonic() + self.flush_secs
+        with writer.as_default():
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    tf.summary.scalar(item[0], item[1], step=item[2])
+                if time.monotonic() >= next_flush:
+                    writer.flush()
+                    next_flush = time.monotonic() + self.flush_secs
+        writer.flush()
+        writer.close()
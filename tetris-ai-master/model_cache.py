@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+# In-process cache of loaded checkpoints
+#
+# Loading a .keras checkpoint (load_model + compile) and running its first
+# forward pass takes seconds, which made every switch between checkpoints in
+# the visualization slow. ModelCache keeps the most recently used agents,
+# keyed by (absolute path, mtime) so a checkpoint that is overwritten on disk
+# (e.g. best.keras during training) is loaded again, and loads prefetched
+# checkpoints on a background thread so they are ready when selected.
+#
+# An explicit get() never waits behind the prefetch queue: a checkpoint that
+# is not loaded yet (or whose prefetch has not started) is loaded on the
+# caller's thread, and only a prefetch already in progress is waited for.
+
+# Cached (state -> value) predictions per loaded agent. Playback never
+# changes the weights, so repeated afterstates are lookups; training agents
+# leave the cache off, since every update invalidates it.
+VALUE_CACHE_SIZE = 100_000
+
+
+def load_agent(path, state_size, value_cache_size=VALUE_CACHE_SIZE):
+    '''Loads a checkpoint as a greedy DQNAgent and runs a warm-up forward pass'''
+    from dqn_agent import DQNAgent
+    agent = DQNAgent(state_size, modelFile=path, value_cache_size=value_cache_size)
+    # The first call builds the inference function; pay for it here, not on the first move
+    agent.model(np.zeros((34, agent.state_size), dtype=np.float32), training=False)
+    return agent
+
+
+class ModelCache:
+
+    '''LRU cache of loaded agents keyed by checkpoint path and modification time
+
+    Args:
+        loader (callable): Builds the cached object from a path (e.g. load_agent)
+        capacity (int): Maximum number of loaded checkpoints kept in memory
+    '''
+
+    def __init__(self, loader, capacity=6):
+        self.loader = loader
+        self.capacity = capacity
+        self._entries = OrderedDict()  # (path, mtime) -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-prefetch")
+        self.hits = 0
+        self.misses = 0
+
+
+    @staticmethod
+    def _key(path):
+        path = os.path.abspath(path)
+        return path, os.path.getmtime(path)
+
+
+    def _insert(self, key, future):
+        '''Caches `future` under `key`; call with the lock held'''
+        # Older versions of the same file are never wanted again
+        for stale in [k for k in self._entries if k[0] == key[0]]:
+            self._entries.pop(stale).cancel()
+        self._entries[key] = future
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)[1].cancel()
+
+
+    def get(self, path):
+        '''Returns the loaded object for `path`.
+
+        Waits for a prefetch of it only if that prefetch is already running;
+        otherwise loads it on the calling thread.'''
+        key = self._key(path)
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None and future.cancel():
+                future = None  # Was still queued behind other prefetches
+            if future is None:
+                self.misses += 1
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self._insert(key, future)
+                load = True
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                load = False
+        if load:
+            try:
+                future.set_result(self.loader(key[0]))
+            except Exception as e:
+                future.set_exception(e)
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]  # Don't cache failures
+            raise
+
+
+    def prefetch(self, paths):
+        '''Starts loading `paths` in the background (missing files are skipped)'''
+        with self._lock:
+            for path in paths:
+                try:
+                    key = self._key(path)
+                except OSError:
+                    continue
+                if key not in self._entries:
+                    self._insert(key, self._pool.submit(self.loader, key[0]))
+
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return dict(hits=self.hits, misses=self.misses, size=len(self._entries),
+                        ready=sum(f.done() for f in self._entries.values()),
+                        hit_rate=self.hits / lookups if lookups else 0.0)
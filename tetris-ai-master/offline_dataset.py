@@ -0,0 +1,249 @@
+import glob
+import json
+import os
+import socket
+import time
+
+import numpy as np
+
+from tetris import Tetris
+
+# Offline transition datasets
+#
+# Transitions from training, evaluation or heuristic play are written to
+# sharded files so they can be reused across experiments instead of being
+# regenerated with slow gameplay. Each record is a fixed-size row of
+# float32 values:
+#
+#   state (state_size) | next_state (state_size) | reward | done (0/1)
+#
+# which NumPy can write without TensorFlow, and tf.data reads directly with
+# FixedLengthRecordDataset. Shards are written under a ".part" name and
+# renamed when complete, so readers only see finished shards and several
+# writers (e.g. parallel generator processes) can share a directory.
+# dataset.json holds the state size.
+#
+# Usage:
+#   python offline_dataset.py generate --out datasets/heuristic --transitions 2000000 --workers 8
+#   python offline_dataset.py pretrain --data datasets/heuristic --steps 20000 --out models/pretrained.keras
+
+# Follows a relocated models directory (e.g. sweep trials), like trainer.MODELS_DIR
+_MODELS_ENV = os.environ.get("TETRIS_MODELS_DIR")
+DATASETS_DIR = os.environ.get("TETRIS_DATASETS_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(_MODELS_ENV)) if _MODELS_ENV else os.path.dirname(os.path.abspath(__file__)),
+    "datasets")
+META_FILE = "dataset.json"
+
+
+def record_floats(state_size):
+    return 2 * state_size + 2
+
+
+class TransitionWriter:
+
+    '''Appends transitions to sharded fixed-record files
+
+    Args:
+        directory (str): Dataset directory (created if missing)
+        state_size (int): Length of a state vector
+        shard_size (int): Transitions per shard file
+        flush_every (int): Transitions buffered in memory before they are written
+    '''
+
+    def __init__(self, directory, state_size=4, shard_size=250_000, flush_every=8192):
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                if json.load(f)["state_size"] != state_size:
+                    raise ValueError(f"{directory} holds transitions of a different state size")
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump(dict(state_size=state_size, dtype="float32",
+                               layout="state,next_state,reward,done"), f)
+        self.directory = directory
+        self.state_size = state_size
+        self.shard_size = shard_size
+        self.flush_every = flush_every
+        self.prefix = f"{socket.gethostname()}-{os.getpid()}-{int(time.time())}"
+        self.written = 0
+        self._rows = []
+        self._shard = 0
+        self._file = None
+        self._in_shard = 0
+
+
+    def add(self, state, next_state, reward, done):
+        self._rows.append((*state, *next_state, reward, 1.0 if done else 0.0))
+        if len(self._rows) >= self.flush_every:
+            self._flush()
+
+    # Same signature as DQNAgent's, so a writer can stand in for an agent's memory
+    add_to_memory = add
+
+
+    def add_memory(self, memory):
+        '''Adds every (state, next_state, reward, done) tuple of a replay memory'''
+        for transition in memory:
+            self.add(*transition)
+
+
+    def _part_path(self):
+        return os.path.join(self.directory, f"{self.prefix}-{self._shard:05d}.bin.part")
+
+
+    def _flush(self):
+        rows = np.asarray(self._rows, dtype=np.float32)
+        self._rows = []
+        while len(rows):
+            if self._file is None:
+                self._file = open(self._part_path(), 'wb')
+            take = rows[:self.shard_size - self._in_shard]
+            rows = rows[len(take):]
+            self._file.write(take.tobytes())
+            self._in_shard += len(take)
+            self.written += len(take)
+            if self._in_shard >= self.shard_size:
+                self._finish_shard()
+
+
+    def _finish_shard(self):
+        self._file.close()
+        part = self._part_path()
+        os.replace(part, part[:-len(".part")])
+        self._file = None
+        self._in_shard = 0
+        self._shard += 1
+
+
+    def close(self):
+        '''Writes buffered transitions and completes the last shard'''
+        if self._rows:
+            self._flush()
+        if self._file is not None:
+            self._finish_shard()
+
+
+def dataset_info(directory):
+    '''State size, shard files and transition count of a dataset directory'''
+    with open(os.path.join(directory, META_FILE)) as f:
+        state_size = json.load(f)["state_size"]
+    files = sorted(glob.glob(os.path.join(directory, "*.bin")))
+    record_bytes = record_floats(state_size) * 4
+    return dict(state_size=state_size, files=files,
+                transitions=sum(os.path.getsize(f) for f in files) // record_bytes)
+
+
+def make_dataset(directory, batch_size=4096, shuffle_buffer=262_144, cycle_length=8, repeat=True):
+    '''tf.data pipeline of (states, next_states, rewards, dones) batches.
+
+    Shards are read in parallel and interleaved, records are shuffled in a
+    large buffer, decoded a whole batch at a time and prefetched.'''
+    import tensorflow as tf
+
+    info = dataset_info(directory)
+    if not info["files"]:
+        raise ValueError(f"no finished shards in {directory}")
+    n = info["state_size"]
+    width = record_floats(n)
+
+    files = tf.data.Dataset.from_tensor_slices(info["files"]).shuffle(len(info["files"]))
+    if repeat:
+        files = files.repeat()
+    ds = files.interleave(
+        lambda f: tf.data.FixedLengthRecordDataset(f, width * 4, buffer_size=1 << 20),
+        cycle_length=min(cycle_length, len(info["files"])),
+        num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+    ds = ds.shuffle(shuffle_buffer).batch(batch_size, drop_remainder=True)
+
+    def decode(records):
+        rows = tf.reshape(tf.io.decode_raw(records, tf.float32), (-1, width))
+        return rows[:, :n], rows[:, n:2 * n], rows[:, 2 * n], rows[:, 2 * n + 1]
+
+    return ds.map(decode, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+def pretrain(agent, directory, steps=10_000, batch_size=4096, target_update=500, log_every=1000):
+    '''Fitted Q-iteration on a stored dataset, updating `agent.model` in place.
+
+    Targets are reward + discount * Q_target(next_state) for non-terminal
+    transitions, where Q_target is a copy of the model refreshed every
+    `target_update` steps. Returns the list of logged (step, loss) pairs.'''
+    from keras.models import clone_model
+
+    model = agent.model
+    target = clone_model(model)
+    target.set_weights(model.get_weights())
+    history = []
+    start = time.perf_counter()
+    for step, (states, next_states, rewards, dones) in enumerate(
+            make_dataset(directory, batch_size=batch_size).take(steps), 1):
+        next_qs = target(next_states, training=False)[:, 0]
+        y = rewards + agent.discount * (1.0 - dones) * next_qs.numpy().astype(np.float32)
+        loss = model.train_on_batch(states, y)
+        if step % target_update == 0:
+            target.set_weights(model.get_weights())
+        if step % log_every == 0:
+            loss = float(np.mean(loss))
+            history.append((step, loss))
+            rate = step * batch_size / (time.perf_counter() - start)
+            print(f"[INFO] Pretrain step {step:,}/{steps:,}: loss {loss:.4f}, {rate:,.0f} transitions/s")
+    agent.weights_version += 1
+    return history
+
+
+def generate(directory, transitions, worker=0, epsilon=0.05, max_pieces=500):
+    '''Writes `transitions` heuristic-play transitions to `directory`'''
+    from heuristic_agent import HeuristicAgent, prefill_memory
+
+    writer = TransitionWriter(directory, Tetris().get_state_size())
+    prefill_memory(writer, transitions, HeuristicAgent(epsilon=epsilon), max_pieces)
+    writer.close()
+    print(f"[INFO] Worker {worker}: wrote {writer.written:,} transitions")
+
+
+if __name__ == "__main__":
+    import argparse
+    import multiprocessing as mp
+
+    parser = argparse.ArgumentParser(description="Sharded offline transition datasets")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="write heuristic-play transitions")
+    gen.add_argument("--out", default=os.path.join(DATASETS_DIR, "heuristic"))
+    gen.add_argument("--transitions", type=int, default=1_000_000)
+    gen.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    gen.add_argument("--epsilon", type=float, default=0.05, help="random placement probability")
+    pre = sub.add_parser("pretrain", help="fit a value network on a stored dataset")
+    pre.add_argument("--data", default=os.path.join(DATASETS_DIR, "heuristic"))
+    pre.add_argument("--model", help="checkpoint to fine-tune (default: a new network)")
+    pre.add_argument("--out", required=True, help="where to save the trained .keras model")
+    pre.add_argument("--steps", type=int, default=10_000)
+    pre.add_argument("--batch", type=int, default=4096)
+    pre.add_argument("--discount", type=float, default=0.95)
+    pre.add_argument("--target-update", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        per_worker = -(-args.transitions // args.workers)
+        ctx = mp.get_context("spawn")  # Like the rest of the series: TensorFlow is never forked
+        procs = [ctx.Process(target=generate, args=(args.out, per_worker, i, args.epsilon))
+                 for i in range(args.workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        print(f"[INFO] Dataset now holds {dataset_info(args.out)['transitions']:,} transitions")
+    else:
+        from dqn_agent import DQNAgent
+        info = dataset_info(args.data)
+        print(f"[INFO] {info['transitions']:,} transitions in {len(info['files'])} shards")
+        if args.model:
+            agent = DQNAgent(info["state_size"], modelFile=args.model, discount=args.discount)
+        else:
+            agent = DQNAgent(info["state_size"], n_neurons=[32, 32, 32],
+                             activations=['relu', 'relu', 'relu', 'linear'],
+                             discount=args.discount)
+        pretrain(agent, args.data, steps=args.steps, batch_size=args.batch,
+                 target_update=args.target_update)
+        agent.save_model(args.out)
+        print(f"[INFO] Saved {args.out}")
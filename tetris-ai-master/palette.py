@@ -0,0 +1,89 @@
+"""
+Shared colors of the Tetris AI GUI and the offscreen video renderer
+"""
+
+# ─── Color Palette ────────────────────────────────────────────────────────────
+C = {
+    "bg":           "#0a0a12",
+    "bg_grad":      "#0e0e1a",
+    "card":         "#14142a",
+    "card_hover":   "#191935",
+    "card_border":  "#28284a",
+    "card_border_h":"#3d3d6a",
+    "surface":      "#1c1c38",
+    "surface_hover":"#242450",
+    "primary":      "#6366f1",
+    "primary_hover":"#818cf8",
+    "primary_dim":  "#4f46e5",
+    "primary_glow": "#6366f140",
+    "accent":       "#22d3ee",
+    "accent_hover": "#67e8f9",
+    "accent_dim":   "#0891b2",
+    "text":         "#f0f0f8",
+    "text_sec":     "#a0a0c0",
+    "text_muted":   "#6a6a8a",
+    "text_dim":     "#45455a",
+    "green":        "#4ade80",
+    "green_hover":  "#86efac",
+    "green_dim":    "#166534",
+    "red":          "#f87171",
+    "red_hover":    "#fca5a5",
+    "red_dim":      "#991b1b",
+    "yellow":       "#facc15",
+    "yellow_dim":   "#854d0e",
+    "blue":         "#60a5fa",
+    "blue_dim":     "#1e3a5f",
+    "orange":       "#fb923c",
+    "purple":       "#c084fc",
+    "border":       "#2e2e50",
+    "border_light": "#3a3a5e",
+    "input_bg":     "#0f0f1e",
+    "input_border": "#2a2a48",
+    "input_focus":  "#6366f1",
+    "cell_empty":   "#121228",
+    "cell_border":  "#1a1a35",
+    "danger_bg":    "#2a1020",
+    "danger_hover": "#3d1525",
+}
+
+PIECE_COLORS = {
+    0: "#22d3ee",   # I
+    1: "#c084fc",   # T
+    2: "#fb923c",   # L
+    3: "#60a5fa",   # J
+    4: "#f87171",   # Z
+    5: "#4ade80",   # S
+    6: "#facc15",   # O
+}
+PIECE_SHAPES = {
+    0: [[0,0,0,0],[1,1,1,1],[0,0,0,0],[0,0,0,0]],
+    1: [[0,0,0,0],[0,1,0,0],[1,1,1,0],[0,0,0,0]],
+    2: [[0,0,0,0],[0,0,1,0],[1,1,1,0],[0,0,0,0]],
+    3: [[0,0,0,0],[1,0,0,0],[1,1,1,0],[0,0,0,0]],
+    4: [[0,0,0,0],[1,1,0,0],[0,1,1,0],[0,0,0,0]],
+    5: [[0,0,0,0],[0,1,1,0],[1,1,0,0],[0,0,0,0]],
+    6: [[0,0,0,0],[0,1,1,0],[0,1,1,0],[0,0,0,0]],
+}
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+
+def darken(hex_color, factor=0.6):
+    h = hex_color.lstrip('#')
+    r, g, b = int(h[:2],16), int(h[2:4],16), int(h[4:6],16)
+    return f"#{int(r*factor):02x}{int(g*factor):02x}{int(b*factor):02x}"
+
+def lighten(hex_color, factor=0.3):
+    h = hex_color.lstrip('#')
+    r, g, b = int(h[:2],16), int(h[2:4],16), int(h[4:6],16)
+    r = min(255, int(r+(255-r)*factor))
+    g = min(255, int(g+(255-g)*factor))
+    b = min(255, int(b+(255-b)*factor))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def blend(hex1, hex2, t=0.5):
+    h1, h2 = hex1.lstrip('#'), hex2.lstrip('#')
+    r = int(int(h1[:2],16)*(1-t) + int(h2[:2],16)*t)
+    g = int(int(h1[2:4],16)*(1-t) + int(h2[2:4],16)*t)
+    b = int(int(h1[4:6],16)*(1-t) + int(h2[4:6],16)*t)
+    return f"#{min(255,r):02x}{min(255,g):02x}{min(255,b):02x}"
@@ -0,0 +1,451 @@
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from tetris import Tetris
+
+# Population-based training of stacked value networks
+#
+# Comparing variants used to mean one training run per variant, each paying
+# the full TensorFlow and engine overhead for a 4-32-32-32-1 network that
+# leaves the hardware mostly idle. Here a population of independent value
+# networks with the same architecture is kept as one set of stacked weights
+# (a leading "member" axis on every kernel and bias):
+#
+#   - acting evaluates every member's candidate placements in one batched
+#     NumPy forward pass per step
+#   - training is one fused TF step for all members: batched matmuls, the
+#     per-member losses summed (members share no weights, so gradients stay
+#     independent) and an Adam update with a per-member learning rate
+#   - each member has its own Tetris game, its own replay memory (a NumPy
+#     ring buffer), and its own learning rate, discount and exploration
+#     schedule; the batch size is shared because the batch is one tensor
+#
+# Every `ready_episodes` episodes the members are ranked by their recent
+# mean score. The bottom `truncate` fraction copies the weights, optimizer
+# state and hyperparameters of a random member from the top fraction
+# (exploit) and perturbs the hyperparameters by x0.8 or x1.2 (explore).
+#
+# Members are exported as ordinary .keras checkpoints (member_<i>.keras and
+# best.keras in the output directory) that DQNAgent and the visualization
+# load like any other; population.json holds hyperparameters, scores and the
+# exploit history.
+#
+# Usage:
+#   python population.py --members 8 --episodes 2000 --out models/population
+
+ADAM_BETAS = (0.9, 0.999)
+ADAM_EPSILON = 1e-7
+
+
+class StackedValueNet:
+
+    '''Value networks of a whole population as one set of stacked weights
+
+    Args:
+        members (int): Number of networks
+        state_size (int): Size of the input domain
+        n_neurons (list(int)): Neurons in each inner layer (same for all members)
+        activations (list): Activation of each inner layer and the output ('relu' or 'linear')
+        learning_rates (list(float)): Initial Adam learning rate of each member
+        seed (int): Seed of the weight initializer
+    '''
+
+    def __init__(self, members, state_size, n_neurons=(32, 32, 32),
+                 activations=('relu', 'relu', 'relu', 'linear'), learning_rates=None, seed=None):
+        import tensorflow as tf
+
+        if len(activations) != len(n_neurons) + 1:
+            raise ValueError("n_neurons and activations do not match")
+        self.tf = tf
+        self.members = members
+        self.state_size = state_size
+        self.n_neurons = list(n_neurons)
+        self.activations = list(activations)
+        sizes = [state_size, *n_neurons, 1]
+        init = tf.keras.initializers.GlorotUniform(seed)
+        self.kernels, self.biases = [], []
+        for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+            self.kernels.append(tf.Variable(
+                tf.stack([init((n_in, n_out)) for _ in range(members)]), name=f"kernel_{i}"))
+            self.biases.append(tf.Variable(tf.zeros((members, 1, n_out)), name=f"bias_{i}"))
+        self.variables = [v for pair in zip(self.kernels, self.biases) for v in pair]
+        self._m = [tf.Variable(tf.zeros_like(v), trainable=False) for v in self.variables]
+        self._v = [tf.Variable(tf.zeros_like(v), trainable=False) for v in self.variables]
+        self._t = tf.Variable(tf.zeros((members,)), trainable=False)
+        lrs = learning_rates if learning_rates is not None else [1e-3] * members
+        self.learning_rates = tf.Variable(np.asarray(lrs, dtype=np.float32), trainable=False)
+        self._train_step = tf.function(self._train_step_impl)
+        self._numpy_weights = None
+
+
+    def _forward(self, x):
+        tf = self.tf
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            x = tf.matmul(x, kernel) + bias
+            if activation == 'relu':
+                x = tf.nn.relu(x)
+        return x[..., 0]
+
+
+    def _train_step_impl(self, states, next_states, rewards, dones, discounts):
+        '''One fused Q-learning update of every member on its own (members, batch) samples'''
+        tf = self.tf
+        next_q = self._forward(next_states)
+        targets = rewards + discounts[:, None] * next_q * (1.0 - dones)
+        with tf.GradientTape() as tape:
+            losses = tf.reduce_mean(tf.square(self._forward(states) - tf.stop_gradient(targets)),
+                                    axis=1)
+            total = tf.reduce_sum(losses)
+        grads = tape.gradient(total, self.variables)
+
+        b1, b2 = ADAM_BETAS
+        self._t.assign_add(tf.ones_like(self._t))
+        # Bias corrections and learning rates broadcast over each member's weights
+        scale = (self.learning_rates * tf.sqrt(1.0 - b2 ** self._t) / (1.0 - b1 ** self._t))
+        for var, grad, m, v in zip(self.variables, grads, self._m, self._v):
+            m.assign(b1 * m + (1.0 - b1) * grad)
+            v.assign(b2 * v + (1.0 - b2) * tf.square(grad))
+            var.assign_sub(tf.reshape(scale, (-1, 1, 1)) * m / (tf.sqrt(v) + ADAM_EPSILON))
+        return losses, tf.reduce_mean(next_q, axis=1)
+
+
+    def train(self, states, next_states, rewards, dones, discounts):
+        '''Trains all members on (members, batch, ...) arrays; returns per-member (loss, mean next Q)'''
+        losses, next_q = self._train_step(
+            np.asarray(states, dtype=np.float32), np.asarray(next_states, dtype=np.float32),
+            np.asarray(rewards, dtype=np.float32), np.asarray(dones, dtype=np.float32),
+            np.asarray(discounts, dtype=np.float32))
+        self._numpy_weights = None
+        return losses.numpy(), next_q.numpy()
+
+
+    def predict(self, states):
+        '''Values of (members, candidates, state_size) states, computed with NumPy'''
+        if self._numpy_weights is None:
+            self._numpy_weights = [(k.numpy(), b.numpy(), a) for k, b, a in
+                                   zip(self.kernels, self.biases, self.activations)]
+        x = np.asarray(states, dtype=np.float32)
+        for kernel, bias, activation in self._numpy_weights:
+            x = np.matmul(x, kernel) + bias
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+        return x[..., 0]
+
+
+    def copy_member(self, src, dst):
+        '''Copies weights, optimizer state and learning rate of member `src` to `dst`'''
+        for var in self.variables + self._m + self._v + [self._t, self.learning_rates]:
+            var.scatter_nd_update([[dst]], var[src:src + 1])
+        self._numpy_weights = None
+
+
+    def set_learning_rate(self, member, lr):
+        self.learning_rates.scatter_nd_update([[member]], [lr])
+
+
+    def member_layers(self, member):
+        '''[(kernel, bias, activation), ...] of one member, as value_net.model_layers gives'''
+        return [(k[member].numpy(), b[member, 0].numpy(), a)
+                for k, b, a in zip(self.kernels, self.biases, self.activations)]
+
+
+    def save_member(self, member, path):
+        '''Saves one member as an ordinary Keras model that DQNAgent can load'''
+        from keras.models import Sequential
+        from keras.layers import Dense, Input
+        model = Sequential()
+        model.add(Input(shape=(self.state_size,)))
+        for units, activation in zip(self.n_neurons + [1], self.activations):
+            model.add(Dense(units, activation=activation))
+        model.compile(loss='mse', optimizer='adam')
+        model.set_weights([w for k, b, _ in self.member_layers(member) for w in (k, b)])
+        model.save(path)
+
+
+class ReplayRings:
+
+    '''One fixed-size replay memory per member, stored as stacked NumPy arrays
+
+    Args:
+        members (int): Number of memories
+        mem_size (int): Transitions kept per member
+        state_size (int): Size of a state vector
+    '''
+
+    def __init__(self, members, mem_size, state_size):
+        self.mem_size = mem_size
+        self.states = np.zeros((members, mem_size, state_size), dtype=np.float32)
+        self.next_states = np.zeros_like(self.states)
+        self.rewards = np.zeros((members, mem_size), dtype=np.float32)
+        self.dones = np.zeros((members, mem_size), dtype=np.float32)
+        self.sizes = np.zeros(members, dtype=np.int64)
+        self._next = np.zeros(members, dtype=np.int64)
+
+
+    def add(self, member, state, next_state, reward, done):
+        i = self._next[member]
+        self.states[member, i] = state
+        self.next_states[member, i] = next_state
+        self.rewards[member, i] = reward
+        self.dones[member, i] = done
+        self._next[member] = (i + 1) % self.mem_size
+        self.sizes[member] = min(self.sizes[member] + 1, self.mem_size)
+
+
+    def member(self, member):
+        '''View with DQNAgent's add_to_memory, e.g. for heuristic_agent.prefill_memory'''
+        rings = self
+
+        class _Memory:
+            def add_to_memory(self, state, next_state, reward, done):
+                rings.add(member, state, next_state, reward, done)
+        return _Memory()
+
+
+    def sample(self, batch_size, rng):
+        '''(members, batch) samples drawn uniformly from each member's own memory'''
+        idx = (rng.random((len(self.sizes), batch_size)) * self.sizes[:, None]).astype(np.int64)
+        rows = np.arange(len(self.sizes))[:, None]
+        return (self.states[rows, idx], self.next_states[rows, idx],
+                self.rewards[rows, idx], self.dones[rows, idx])
+
+
+class Population:
+
+    '''Trains a population of value networks in lockstep, with exploit/explore
+
+    Args:
+        members (int): Population size
+        mem_size (int): Replay memory size of each member
+        batch_size (int): Samples per member per update
+        replay_start_size (int): Transitions each member needs before updates start
+        train_every_steps (int): Placements (per member) between updates
+        ready_episodes (int): Episodes between exploit/explore rounds
+        truncate (float): Fraction of members replaced, and copied from, in each round
+        piece_limit (int): Score at which a game is cut (0 = no limit)
+        prefill (bool): Fill each replay memory with heuristic games first
+        seed (int): Seed for hyperparameter sampling, weights and replay sampling
+    '''
+
+    def __init__(self, members=8, mem_size=20_000, batch_size=128, replay_start_size=1000,
+                 train_every_steps=4, ready_episodes=50, truncate=0.25, piece_limit=0,
+                 prefill=True, seed=None):
+        if not 0 < truncate <= 0.5:
+            # Above one half the bottom and top fractions overlap
+            raise ValueError(f"truncate must be in (0, 0.5], got {truncate}")
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+        self.size = members
+        self.batch_size = batch_size
+        self.replay_start_size = min(replay_start_size, mem_size)
+        self.train_every_steps = train_every_steps
+        self.ready_episodes = ready_episodes
+        self.truncate = truncate
+        self.piece_limit = piece_limit
+
+        self.envs = [Tetris() for _ in range(members)]
+        state_size = self.envs[0].get_state_size()
+        # Initial hyperparameters are spread log-uniformly around the trainer's defaults
+        self.hparams = [dict(lr=float(10 ** self.rng.uniform(-3.7, -2.5)),
+                             discount=float(1 - 10 ** self.rng.uniform(-2, -1)),
+                             epsilon_stop=int(self.rng.integers(500, 2500)))
+                        for _ in range(members)]
+        self.net = StackedValueNet(members, state_size,
+                                   learning_rates=[h["lr"] for h in self.hparams], seed=seed)
+        self.memory = ReplayRings(members, mem_size, state_size)
+        self.episodes = [0] * members
+        self.best = [0] * members
+        self.recent = [[] for _ in range(members)]
+        self.lineage = []  # (population episode, dst, src) of every exploit
+        self.total_episodes = 0
+        self.pieces = 0
+        self.updates = 0
+        self.last_losses = self.last_next_q = None  # Per member, from the latest update
+        self._states = [env.reset() for env in self.envs]
+        self._game_pieces = [0] * members
+
+        if prefill:
+            from heuristic_agent import prefill_memory
+            for i in range(members):
+                prefill_memory(self.memory.member(i), self.replay_start_size,
+                               piece_limit=piece_limit)
+
+
+    def epsilon(self, member):
+        return max(0.0, 1.0 - self.episodes[member] / self.hparams[member]["epsilon_stop"])
+
+
+    def _choose(self):
+        '''One placement per member: random with its epsilon, else greedy on one batched forward pass'''
+        options = []
+        for env in self.envs:
+            nxt = env.get_next_states()
+            options.append((list(nxt.keys()), list(nxt.values())))
+        width = max(len(states) for _, states in options)
+        batch = np.zeros((self.size, width, self.memory.states.shape[2]), dtype=np.float32)
+        mask = np.full((self.size, width), -np.inf, dtype=np.float32)
+        for i, (_, states) in enumerate(options):
+            batch[i, :len(states)] = states
+            mask[i, :len(states)] = 0
+        best = np.argmax(self.net.predict(batch) + mask, axis=1)
+        choices = []
+        for i, (actions, states) in enumerate(options):
+            j = self.random.randrange(len(actions)) if self.random.random() < self.epsilon(i) \
+                else int(best[i])
+            choices.append((actions[j], states[j]))
+        return choices
+
+
+    def step(self):
+        '''Every member places one piece; returns [(member, score, pieces)] of finished games'''
+        finished = []
+        for i, (action, state) in enumerate(self._choose()):
+            env = self.envs[i]
+            reward, done = env.play(action[0], action[1], piece_limit=self.piece_limit)
+            if self.piece_limit > 0 and env.get_game_score() >= self.piece_limit:
+                done = True
+            self.memory.add(i, self._states[i], state, reward, done)
+            self._states[i] = state
+            self._game_pieces[i] += 1
+            if done:
+                finished.append((i, env.get_game_score(), self._game_pieces[i]))
+                self._end_game(i, env.get_game_score())
+        self.pieces += self.size
+        if self.pieces // self.size % self.train_every_steps == 0 \
+                and self.memory.sizes.min() >= max(self.replay_start_size, self.batch_size):
+            self.last_losses, self.last_next_q = self.net.train(
+                *self.memory.sample(self.batch_size, self.rng),
+                [h["discount"] for h in self.hparams])
+            self.updates += 1
+        return finished
+
+
+    def _end_game(self, member, score):
+        self.episodes[member] += 1
+        self.total_episodes += 1
+        self.best[member] = max(self.best[member], score)
+        self.recent[member] = (self.recent[member] + [score])[-self.ready_episodes:]
+        self._states[member] = self.envs[member].reset()
+        self._game_pieces[member] = 0
+        if self.total_episodes % self.ready_episodes == 0:
+            self.exploit_explore()
+
+
+    def _perturb(self, hp):
+        f = lambda: self.random.choice((0.8, 1.2))
+        return dict(lr=float(np.clip(hp["lr"] * f(), 1e-5, 1e-1)),
+                    discount=float(np.clip(1 - (1 - hp["discount"]) * f(), 0.5, 0.999)),
+                    epsilon_stop=max(1, int(hp["epsilon_stop"] * f())))
+
+
+    def exploit_explore(self):
+        '''Replaces the weakest members by perturbed copies of the strongest'''
+        ready = [i for i in range(self.size) if len(self.recent[i]) >= self.ready_episodes // 2]
+        if len(ready) < 2:
+            return []
+        ranked = sorted(ready, key=lambda i: np.mean(self.recent[i]))
+        n = max(1, int(len(ranked) * self.truncate))
+        moves = []
+        for dst in ranked[:n]:
+            src = self.random.choice(ranked[-n:])
+            self.net.copy_member(src, dst)
+            self.hparams[dst] = self._perturb(self.hparams[src])
+            self.net.set_learning_rate(dst, self.hparams[dst]["lr"])
+            # Keep the copied exploration level rather than restarting it
+            self.episodes[dst] = self.episodes[src]
+            self.recent[dst] = []
+            self.lineage.append((self.total_episodes, dst, src))
+            moves.append((dst, src))
+            print(f"[INFO] Member {dst} <- member {src} (mean {np.mean(self.recent[src]):,.0f}): "
+                  f"lr {self.hparams[dst]['lr']:.2e}, discount {self.hparams[dst]['discount']:.3f}")
+        return moves
+
+
+    def leader(self):
+        '''Member with the highest recent mean score'''
+        return max(range(self.size), key=lambda i: np.mean(self.recent[i]) if self.recent[i] else -1)
+
+
+    def save(self, directory):
+        '''Writes every member as a .keras checkpoint plus population.json'''
+        os.makedirs(directory, exist_ok=True)
+        for i in range(self.size):
+            self.net.save_member(i, os.path.join(directory, f"member_{i}.keras"))
+        self.net.save_member(self.leader(), os.path.join(directory, "best.keras"))
+        info = dict(
+            total_episodes=self.total_episodes, pieces=self.pieces, updates=self.updates,
+            leader=self.leader(), lineage=self.lineage,
+            members=[dict(hparams=self.hparams[i], episodes=self.episodes[i], best=self.best[i],
+                          recent_mean=float(np.mean(self.recent[i])) if self.recent[i] else None)
+                     for i in range(self.size)])
+        tmp = os.path.join(directory, "population.json.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(info, f, indent=1)
+        os.replace(tmp, os.path.join(directory, "population.json"))
+
+
+def run_population(population, episodes, out_dir, save_every=250, log_every=50, metrics=None):
+    '''Trains until every member has played `episodes` games'''
+    start = time.perf_counter()
+    last_log = 0
+    # Several members can finish in one step, so totals may jump past a multiple
+    next_save = population.total_episodes + save_every
+    while min(population.episodes) < episodes:
+        for member, score, pieces in population.step():
+            if metrics is not None:
+                metrics.scalars(dict(score=score, pieces=pieces, epsilon=population.epsilon(member),
+                                     lr=population.hparams[member]["lr"],
+                                     discount=population.hparams[member]["discount"]),
+                                population.episodes[member], prefix=f"member_{member}/")
+            done = population.total_episodes
+            if done >= next_save:
+                next_save = done + save_every
+                population.save(out_dir)
+            if done - last_log >= log_every:
+                last_log = done
+                secs = time.perf_counter() - start
+                lead = population.leader()
+                print(f"[INFO] {done:,} episodes, {population.pieces / secs:,.0f} pieces/s, "
+                      f"{population.updates / secs:,.1f} updates/s; leader {lead} "
+                      f"(mean {np.mean(population.recent[lead]):,.0f}, best {population.best[lead]:,})")
+    population.save(out_dir)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Population-based training of stacked value networks")
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--episodes", type=int, default=2000, help="episodes per member")
+    parser.add_argument("--mem-size", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=128)
+    parser.add_argument("--train-every", type=int, default=4, help="placements between updates")
+    parser.add_argument("--ready", type=int, default=50, help="episodes between exploit rounds")
+    parser.add_argument("--truncate", type=float, default=0.25)
+    parser.add_argument("--piece-limit", type=int, default=0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--tensorboard", action="store_true", help="log per-member metrics to runs/")
+    parser.add_argument("--out", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "models", "population"))
+    args = parser.parse_args()
+    if not 0 < args.truncate <= 0.5:
+        parser.error("--truncate must be in (0, 0.5]")
+
+    pop = Population(args.members, args.mem_size, args.batch, train_every_steps=args.train_every,
+                     ready_episodes=args.ready, truncate=args.truncate,
+                     piece_limit=args.piece_limit, seed=args.seed)
+    writer = None
+    if args.tensorboard:
+        from metrics import MetricsWriter
+        from trainer import RUNS_DIR
+        writer = MetricsWriter(os.path.join(RUNS_DIR, "population-" + time.strftime("%Y%m%d-%H%M%S")))
+    try:
+        run_population(pop, args.episodes, args.out, metrics=writer)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(f"[INFO] Saved {args.members} members to {args.out} (leader: member_{pop.leader()}.keras)")
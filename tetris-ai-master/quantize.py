@@ -0,0 +1,241 @@
+import time
+
+import numpy as np
+
+from tetris import Tetris
+from value_net import ACTIVATIONS, NumpyValueNet, model_layers
+
+# Int8 export of the value network
+#
+# Evaluation and playback only need the forward pass of the small Dense
+# network built by DQNAgent._build_model. The export stores every kernel as
+# int8 with one scale per output channel (symmetric, zero point 0) and keeps
+# the biases in float32, plus one int16 scale per layer input for runtimes
+# that multiply in integers (int16 x int8, accumulated in int32).
+#
+# NumPy itself has no BLAS-backed integer matmul, so QuantizedValueNet
+# dequantizes the kernels once at load and runs float32 matmuls: as fast as
+# the float network, from a file a quarter of the size. predict_int() runs
+# the integer pipeline for checking it, and the CLI reports agreement and
+# throughput of both against the float model.
+#
+# Activation scales are fixed at export time, never derived from the batch,
+# so a state gets the same value whatever it is evaluated with:
+#
+#   - the state features ([lines, holes, bumpiness, height]) are integers of
+#     very different ranges, so they go into the first layer exactly, with
+#     scale 1: lines cleared 1 and 2 stay apart next to a height of 200
+#   - hidden activations get one scale per layer, calibrated on the
+#     candidate states of a few greedy games and saturating beyond that
+#     range. They are int16 rather than int8: the values of the candidate
+#     placements of one move are close together, and 8-bit activations
+#     rounded enough of them together to change the chosen move
+
+ACT_QMAX = 32767  # Activations are int16; int8 would lose moves to rounding
+
+
+def quantize_weights(kernel):
+    '''Per-output-channel symmetric int8 quantization of a Dense kernel.
+
+    Returns (int8 kernel, float32 scale per output channel).'''
+    kernel = np.asarray(kernel, dtype=np.float32)
+    scale = np.abs(kernel).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.round(kernel / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def activation_scale(x):
+    '''Int16 scale of one layer's input over calibration states.
+
+    Integer-valued inputs (the Tetris state features) keep scale 1, so they
+    are represented exactly.'''
+    x = np.asarray(x, dtype=np.float32)
+    peak = float(np.abs(x).max(initial=0))
+    if peak <= ACT_QMAX and np.array_equal(x, np.round(x)):
+        return np.float32(1.0)
+    return np.float32(peak / ACT_QMAX)
+
+
+def quantize_layers(layers, calibration):
+    '''Quantizes float layers ([(kernel, bias, activation), ...] as given by
+    value_net.model_layers) using a (n, state_size) calibration set.
+
+    Returns the arrays stored by export_quantized.'''
+    calibration = np.asarray(calibration, dtype=np.float32)
+    arrays = dict(activations=np.array([a for _, _, a in layers]))
+    x = calibration
+    for i, (kernel, bias, activation) in enumerate(layers):
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"unsupported activation '{activation}' in layer {i}")
+        kernel = np.asarray(kernel, dtype=np.float32)
+        x_scale = activation_scale(x)
+        arrays[f'x{i}'] = x_scale
+        # x @ W == (x / s) @ (s W): the input scale is folded into the kernel
+        arrays[f'w{i}'], arrays[f's{i}'] = quantize_weights(kernel * x_scale)
+        arrays[f'b{i}'] = np.asarray(bias, dtype=np.float32)
+        x = ACTIVATIONS[activation](x @ kernel + bias)
+    return arrays
+
+
+def export_quantized(model, path, calibration=None):
+    '''Writes an int8 version of a Sequential Dense model to `path` (.npz).
+
+    `calibration` is a (n, state_size) array of typical input states; by
+    default the candidate states of a few greedy games are used.'''
+    if calibration is None:
+        calibration = np.concatenate(reference_boards(keras_predict(model), games=5))
+    np.savez_compressed(path, **quantize_layers(model_layers(model), calibration))
+
+
+class QuantizedValueNet:
+
+    '''Forward pass of an exported int8 value network
+
+    The int8 kernels are dequantized once at load, with every scale folded
+    in, and evaluated with float32 BLAS matmuls: NumPy has no fast integer
+    matmul, so integer arithmetic would be several times slower than the
+    float network. predict_int() computes what an int8 runtime would, with
+    the int16 activations, for checking the export.
+
+    Args:
+        path (str): File written by export_quantized
+    '''
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.activations = [str(a) for a in data['activations']]
+            # As stored: (input scale, int8 kernel, per-channel kernel scale, bias)
+            self.qlayers = [(data[f'x{i}'], data[f'w{i}'], data[f's{i}'], data[f'b{i}'])
+                            for i in range(len(self.activations))]
+        # x @ (w * s / x_scale) == (x / x_scale) @ w * s, without the rounding of x
+        self.layers = [((w.astype(np.float32) * (w_scale / x_scale)).astype(np.float32), bias)
+                       for x_scale, w, w_scale, bias in self.qlayers]
+        self.state_size = self.qlayers[0][1].shape[0]
+        self.epsilon = 0
+
+
+    def predict(self, states):
+        '''Returns the predicted value of each state in a batch'''
+        x = np.asarray(states, dtype=np.float32)
+        for (kernel, bias), activation in zip(self.layers, self.activations):
+            x = x @ kernel
+            x += bias
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+        return x[:, 0]
+
+
+    def predict_int(self, states):
+        '''Values computed with int16 activations and integer accumulation (slow)'''
+        x = np.asarray(states, dtype=np.float32)
+        for (x_scale, w, w_scale, bias), activation in zip(self.qlayers, self.activations):
+            # int32 accumulation holds n_in int16 x int8 products up to n_in = 516
+            acc_type = np.int64 if w.shape[0] * 127 * ACT_QMAX >= 2 ** 31 else np.int32
+            # Fixed scale, already folded into w; saturate beyond the calibrated range
+            xq = np.clip(np.round(x / x_scale), -ACT_QMAX, ACT_QMAX)
+            acc = xq.astype(acc_type) @ w.astype(acc_type)
+            x = ACTIVATIONS[activation](acc * w_scale + bias)
+        return x[:, 0]
+
+
+    def best_state(self, states):
+        '''Returns the best state for a given collection of states'''
+        states_list = list(states)
+        return states_list[int(np.argmax(self.predict(states_list)))]
+
+
+def keras_predict(model):
+    '''Batch value function of a Keras model, as reference_boards expects'''
+    return lambda batch: model(batch, training=False).numpy()[:, 0]
+
+
+def reference_boards(predict, games=20, max_pieces=500, seed=0):
+    '''A fixed set of candidate-state batches for comparing models.
+
+    Plays `games` seeded games greedily with the float value function
+    `predict` (batch -> values) and records the candidate afterstates offered
+    at every move.'''
+    env = Tetris()
+    batches = []
+    for g in range(games):
+        env.reset(seed=seed + g)
+        for _ in range(max_pieces):
+            if env.game_over:
+                break
+            next_states = env.get_next_states()
+            actions = list(next_states)
+            batch = np.array([next_states[a] for a in actions], dtype=np.float32)
+            batches.append(batch)
+            values = predict(batch)
+            env.play(*actions[int(np.argmax(values))])
+    return batches
+
+
+def agreement(predict, qpredict, batches):
+    '''Compares the float value function and a quantized one over candidate batches.
+
+    Returns a dict with the fraction of moves where both pick the same state
+    (placements with identical features count as the same state) and the
+    mean absolute difference of the predicted values.'''
+    same = 0
+    abs_err = 0.0
+    n_states = 0
+    for batch in batches:
+        ref = predict(batch)
+        q = qpredict(batch)
+        same += int(np.array_equal(batch[np.argmax(ref)], batch[np.argmax(q)]))
+        abs_err += float(np.abs(ref - q).sum())
+        n_states += len(batch)
+    return dict(moves=len(batches),
+                argmax_agreement=same / len(batches) if batches else 1.0,
+                mean_abs_error=abs_err / n_states if n_states else 0.0)
+
+
+def throughput(predict, batches, repeat=3):
+    '''Best of `repeat` timed passes of `predict` over candidate batches.
+
+    Returns a dict with microseconds per move (one batch) and states per second.'''
+    n_states = sum(len(b) for b in batches)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for batch in batches:
+            predict(batch)
+        best = min(best, time.perf_counter() - start)
+    return dict(us_per_move=best / len(batches) * 1e6 if batches else 0.0,
+                states_per_second=n_states / best if best else 0.0)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Export a value network to int8 and measure its agreement")
+    parser.add_argument("model", help="path of the .keras checkpoint")
+    parser.add_argument("--out", help="output .npz (defaults to <model>.int8.npz)")
+    parser.add_argument("--games", type=int, default=20, help="seeded games in the reference set")
+    args = parser.parse_args()
+
+    from dqn_agent import load_model
+    model = load_model(args.model, compile=False)
+    out = args.out or os.path.splitext(args.model)[0] + ".int8.npz"
+    predict = keras_predict(model)
+    batches = reference_boards(predict, games=args.games)
+    # Calibrate on the first few games, measure agreement on all of them
+    export_quantized(model, out, calibration=np.concatenate(batches[:len(batches) // 4 or 1]))
+    qnet = QuantizedValueNet(out)
+    print(f"[INFO] Wrote {out} ({os.path.getsize(out):,} bytes)")
+    for label, qpredict in (("int8 weights", qnet.predict),
+                            ("int8 weights + int16 activations", qnet.predict_int)):
+        report = agreement(predict, qpredict, batches)
+        print(f"[INFO] Argmax agreement ({label}): {report['argmax_agreement']:.2%} over "
+              f"{report['moves']:,} moves, mean |value error| {report['mean_abs_error']:.4f}")
+
+    # Same batches through every forward pass; the float32 NumPy net is the baseline
+    for label, fn in (("float32 NumPy", NumpyValueNet(model_layers(model)).predict),
+                      ("int8 (dequantized)", qnet.predict),
+                      ("int8 + int16 (integer)", qnet.predict_int)):
+        t = throughput(fn, batches)
+        print(f"[INFO] {label:>24}: {t['us_per_move']:8.1f} us/move, "
+              f"{t['states_per_second']:12,.0f} states/s")
@@ -0,0 +1,509 @@
+import os
+import queue
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from tetris import Tetris
+from value_net import NumpyValueNet, model_layers
+from wire import encode_msg, new_authkey, recv_msg, send_msg
+
+# Remote actors for multi-machine episode generation
+#
+# One learner process owns the DQNAgent, its replay memory and all training.
+# Any number of actor processes, on this host or others, connect to it over
+# TCP (multiprocessing.connection with a shared authkey) and loop:
+#
+#   actor -> weights {have}                       learner -> weights {version, epsilon, activations}
+#                                                              + kernels and biases
+#                                                         or current {version, epsilon}
+#   actor -> batch {actor_id, version, episodes}  learner -> ack {version}
+#              + transition arrays                        or busy {retry_after}
+#                                                         or error {message}
+#
+# Messages are a JSON header plus raw NumPy arrays, sent with send_bytes and
+# never pickled (see wire.py), so a peer can send data but not code. The
+# weights message is encoded once per version and shared by all actors,
+# which play with a NumPy forward pass and so need no TensorFlow. A batch
+# holds (state, next_state, reward, done) arrays plus the stats of the
+# episodes finished in it; malformed batches get an error reply and are
+# counted in the learner's stats.
+#
+# The learner listens on 127.0.0.1 unless told otherwise, with a random
+# authkey for the run unless one is given: it prints the actor command
+# line including the key, and local mode hands the key to its actors.
+#
+# Backpressure: the learner queues at most `max_pending` batches. When the
+# queue stays full the actor is told to back off and resends the same batch
+# later, so a slow learner throttles actors instead of dropping experience.
+# Actors reconnect with exponential backoff and keep unsent data.
+#
+# Usage:
+#   python remote_actors.py learner --host 0.0.0.0 --port 6010 --episodes 5000   # prints the key
+#   python remote_actors.py actor --host 10.0.0.5 --port 6010 --authkey <key>
+#   python remote_actors.py local --actors 4 --episodes 500   # all on localhost
+
+DEFAULT_PORT = 6010
+
+
+def layer_arrays(layers):
+    '''(activations, {name: array}) of [(kernel, bias, activation), ...] for a message'''
+    arrays = {}
+    for i, (kernel, bias, _) in enumerate(layers):
+        arrays[f"kernel_{i}"] = np.asarray(kernel, dtype=np.float32)
+        arrays[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+    return [a for _, _, a in layers], arrays
+
+
+def message_layers(msg, arrays):
+    '''Layers of a 'weights' message; ValueError if they don't form a network'''
+    activations = msg.get('activations')
+    if not isinstance(activations, list):
+        raise ValueError("weights message without activations")
+    layers = []
+    for i, a in enumerate(activations):
+        kernel, bias = arrays.get(f"kernel_{i}"), arrays.get(f"bias_{i}")
+        if kernel is None or bias is None or kernel.ndim != 2 or bias.shape != kernel.shape[1:]:
+            raise ValueError(f"layer {i} is missing or malformed")
+        layers.append((kernel.astype(np.float32), bias.astype(np.float32), str(a)))
+    return layers
+
+
+def batch_arrays(states, next_states, rewards, dones):
+    return dict(states=np.asarray(states, dtype=np.float32),
+                next_states=np.asarray(next_states, dtype=np.float32),
+                rewards=np.asarray(rewards, dtype=np.float32),
+                dones=np.asarray(dones, dtype=bool))
+
+
+def check_batch(msg, arrays, state_size):
+    '''Raises ValueError unless a 'batch' message holds one consistent transition batch'''
+    try:
+        states, next_states = arrays['states'], arrays['next_states']
+        rewards, dones = arrays['rewards'], arrays['dones']
+    except KeyError as e:
+        raise ValueError(f"missing array {e}")
+    n = len(rewards)
+    if states.shape != (n, state_size) or next_states.shape != (n, state_size):
+        raise ValueError(f"expected ({n}, {state_size}) states, got {states.shape} "
+                         f"and {next_states.shape}")
+    if rewards.ndim != 1 or dones.shape != (n,):
+        raise ValueError("rewards and dones must be flat and of the same length")
+    if not isinstance(msg.get('episodes'), list) or \
+            not all(isinstance(e, dict) and 'score' in e for e in msg['episodes']):
+        raise ValueError("episodes must be a list of stat dicts")
+
+
+# ─── Learner ──────────────────────────────────────────────────────────────────
+
+class Learner:
+
+    '''Serves weights to remote actors and collects their experience
+
+    Args:
+        agent (DQNAgent): Agent whose memory is filled and whose model is served
+        address: (host, port) to listen on
+        authkey (bytes): Shared secret actors must present; random if None (see self.authkey)
+        max_pending (int): Transition batches queued before actors are told to back off
+        put_timeout (float): Seconds a batch may wait for queue space before a 'busy' reply
+        retry_after (float): Back-off suggested to actors in a 'busy' reply
+    '''
+
+    def __init__(self, agent, address=('127.0.0.1', DEFAULT_PORT), authkey=None,
+                 max_pending=64, put_timeout=1.0, retry_after=0.5):
+        self.agent = agent
+        self.authkey = authkey or new_authkey()
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.state_size = agent.state_size
+        self.put_timeout = put_timeout
+        self.retry_after = retry_after
+        self._inbox = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._weights_lock = threading.Lock()
+        self._weights = None  # (version, epsilon, encoded 'weights' message)
+
+        # Statistics
+        self._stats_lock = threading.Lock()
+        self.actors = 0
+        self.batches = 0
+        self.transitions = 0
+        self.episodes = 0
+        self.busy_replies = 0
+        self.rejected_batches = 0
+        self.max_version_lag = 0
+        self.publish_weights()
+
+
+    def publish_weights(self):
+        '''Snapshots the agent's current weights for actors; a no-op if they
+        have not changed since the last snapshot. Returns True if published.'''
+        version = self.agent.weights_version
+        with self._weights_lock:
+            if self._weights is not None and self._weights[0] == version:
+                return False
+        epsilon = float(self.agent.epsilon)
+        activations, arrays = layer_arrays(model_layers(self.agent.model))
+        msg = encode_msg(dict(kind='weights', version=version, epsilon=epsilon,
+                              activations=activations), arrays)
+        with self._weights_lock:
+            self._weights = (version, epsilon, msg)
+        return True
+
+
+    def start(self):
+        '''Accepts actors on a background thread'''
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+
+    def stop(self):
+        self._stop.set()
+        self.listener.close()
+
+
+    def drain(self, timeout=None):
+        '''Moves queued transitions into the agent's memory.
+
+        Blocks up to `timeout` seconds for the first batch; returns the stats
+        of the episodes that arrived.'''
+        episodes = []
+        try:
+            item = self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            return episodes
+        while True:
+            version, data, batch_episodes = item
+            for transition in zip(data['states'], data['next_states'], data['rewards'], data['dones']):
+                self.agent.add_to_memory(*transition)
+            episodes.extend(batch_episodes)
+            with self._stats_lock:
+                self.batches += 1
+                self.transitions += len(data['rewards'])
+                self.episodes += len(batch_episodes)
+                self.max_version_lag = max(self.max_version_lag, self.agent.weights_version - version)
+            try:
+                item = self._inbox.get_nowait()
+            except queue.Empty:
+                return episodes
+
+
+    def stats(self):
+        with self._weights_lock:
+            version, _, msg = self._weights
+        with self._stats_lock:
+            return dict(actors=self.actors, batches=self.batches, transitions=self.transitions,
+                        episodes=self.episodes, busy_replies=self.busy_replies,
+                        rejected_batches=self.rejected_batches, pending=self._inbox.qsize(),
+                        weights_version=version, weights_bytes=len(msg),
+                        max_version_lag=self.max_version_lag)
+
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = self.listener.accept()
+            except (AuthenticationError, EOFError) as e:
+                print(f"[WARN] Rejected actor connection: {e}")
+                continue
+            except OSError:
+                break  # Listener closed
+            threading.Thread(target=self._actor_loop, args=(conn,), daemon=True).start()
+
+
+    def _actor_loop(self, conn):
+        with self._stats_lock:
+            self.actors += 1
+        try:
+            while not self._stop.is_set():
+                try:
+                    msg, arrays = recv_msg(conn)
+                except ValueError as e:
+                    send_msg(conn, 'error', message=f"malformed message: {e}")
+                    continue
+                with self._weights_lock:
+                    current, epsilon, weights_msg = self._weights
+                if msg['kind'] == 'weights':
+                    if msg.get('have') == current:
+                        send_msg(conn, 'current', version=current, epsilon=epsilon)
+                    else:
+                        conn.send_bytes(weights_msg)
+                elif msg['kind'] == 'batch':
+                    actor_id = msg.get('actor_id')
+                    try:
+                        check_batch(msg, arrays, self.state_size)
+                        version = int(msg.get('version') or 0)
+                    except (TypeError, ValueError) as e:
+                        with self._stats_lock:
+                            self.rejected_batches += 1
+                        print(f"[WARN] Rejected malformed batch from {actor_id}: {e}")
+                        send_msg(conn, 'error', message=f"malformed batch: {e}")
+                        continue
+                    try:
+                        self._inbox.put((version, arrays, msg['episodes']), timeout=self.put_timeout)
+                        send_msg(conn, 'ack', version=current)
+                    except queue.Full:
+                        with self._stats_lock:
+                            self.busy_replies += 1
+                        send_msg(conn, 'busy', retry_after=self.retry_after)
+                else:
+                    send_msg(conn, 'error', message=f"unknown message '{msg['kind']}'")
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._stats_lock:
+                self.actors -= 1
+            conn.close()
+
+
+def run_learner(address=('127.0.0.1', DEFAULT_PORT), authkey=None, episodes=5000,
+                mem_size=20000, discount=0.95, epsilon_stop_episode=1500, batch_size=512,
+                epochs=1, save_path=None, save_every=50, publish_every=4):
+    '''Trains one agent on episodes played by remote actors.
+
+    Trains once per received episode, like the local training loop, and
+    publishes new weights to the actors every `publish_every` train steps.
+    Actors must present `authkey`; pass the one the local actors got.'''
+    from dqn_agent import DQNAgent
+
+    agent = DQNAgent(Tetris().get_state_size(), n_neurons=[32, 32, 32],
+                     activations=['relu', 'relu', 'relu', 'linear'],
+                     epsilon_stop_episode=epsilon_stop_episode, mem_size=mem_size,
+                     discount=discount, replay_start_size=min(mem_size, 1000))
+    learner = Learner(agent, address, authkey)
+    learner.start()
+    print(f"[INFO] Learner listening on {learner.address}")
+    if authkey is None:
+        host, port = learner.address
+        print(f"[INFO] Start actors with: python remote_actors.py actor --host {host} --port {port} "
+              f"--authkey {learner.authkey.decode()}")
+
+    done_episodes = 0
+    train_steps = 0
+    next_publish = publish_every
+    recent = []
+    last_report = time.time()
+    try:
+        while done_episodes < episodes:
+            for ep in learner.drain(timeout=1.0):
+                done_episodes += 1
+                recent.append(ep['score'])
+                if agent.train(batch_size=batch_size, epochs=epochs) is not None:
+                    train_steps += 1
+                if save_path and done_episodes % save_every == 0:
+                    agent.save_model(save_path)
+            if train_steps >= next_publish:
+                learner.publish_weights()
+                next_publish = train_steps + publish_every
+
+            if time.time() - last_report >= 5.0 and recent:
+                s = learner.stats()
+                print(f"[INFO] Episode {done_episodes:,}: avg score {sum(recent) / len(recent):,.0f}, "
+                      f"{s['actors']} actors, {s['transitions']:,} transitions, "
+                      f"{s['pending']} pending, {s['busy_replies']} busy, v{s['weights_version']}")
+                recent.clear()
+                last_report = time.time()
+    finally:
+        learner.stop()
+        if save_path:
+            agent.save_model(save_path)
+    return learner.stats()
+
+
+# ─── Actor ────────────────────────────────────────────────────────────────────
+
+class RemoteActor:
+
+    '''Plays episodes with the learner's latest weights and ships the experience
+
+    Args:
+        address: Learner (host, port)
+        actor_id (str): Name reported with every batch
+        authkey (bytes): Shared secret of the learner (Learner.authkey)
+        batch_size (int): Transitions per batch sent to the learner
+        piece_limit (int): Score at which an episode is cut off (0 = none)
+        max_backoff (float): Longest wait between reconnection attempts
+    '''
+
+    def __init__(self, address, actor_id=None, authkey=None, batch_size=512,
+                 piece_limit=0, max_backoff=30.0):
+        if not authkey:
+            raise ValueError("the learner's authkey is required")
+        self.address = address
+        self.actor_id = actor_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.authkey = authkey
+        self.batch_size = batch_size
+        self.piece_limit = piece_limit
+        self.max_backoff = max_backoff
+        self.conn = None
+        self.net = None
+        self.version = None
+        self._pending = None  # (arrays, episodes) of a batch not yet acknowledged
+        self._clear_batch()
+
+
+    def _clear_batch(self):
+        self._states, self._next_states, self._rewards, self._dones = [], [], [], []
+        self._episodes = []
+
+
+    def _connect(self):
+        '''Connects to the learner, retrying with exponential backoff'''
+        delay = 0.5
+        while True:
+            try:
+                self.conn = Client(self.address, authkey=self.authkey)
+                print(f"[INFO] Actor {self.actor_id} connected to {self.address}")
+                return
+            except (OSError, EOFError, AuthenticationError) as e:
+                print(f"[WARN] Actor {self.actor_id}: learner unreachable ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+
+    def _call(self, kind, arrays=None, **fields):
+        '''Sends a request and returns the reply (header, arrays), reconnecting as often as needed'''
+        msg = encode_msg(dict(fields, kind=kind), arrays)
+        while True:
+            if self.conn is None:
+                self._connect()
+            try:
+                self.conn.send_bytes(msg)
+                return recv_msg(self.conn)
+            except (OSError, EOFError, ValueError):
+                print(f"[WARN] Actor {self.actor_id}: connection lost")
+                try:
+                    self.conn.close()
+                except OSError:
+                    pass
+                self.conn = None
+
+
+    def sync_weights(self):
+        '''Fetches the learner's weights if they changed since the last call'''
+        reply, arrays = self._call('weights', have=self.version)
+        if reply['kind'] == 'weights':
+            self.net = NumpyValueNet(message_layers(reply, arrays), reply['epsilon'])
+            self.version = reply['version']
+        elif reply['kind'] == 'current':
+            self.net.epsilon = reply['epsilon']
+        else:
+            raise RuntimeError(f"learner refused the weights request: {reply.get('message')}")
+
+
+    def _flush(self):
+        '''Packs the current batch and sends it, waiting out backpressure'''
+        if self._pending is None:
+            if not self._rewards:
+                return
+            self._pending = (batch_arrays(self._states, self._next_states, self._rewards,
+                                          self._dones), self._episodes)
+            self._clear_batch()
+        arrays, episodes = self._pending
+        while True:
+            reply, _ = self._call('batch', arrays, actor_id=self.actor_id, version=self.version,
+                                  episodes=episodes)
+            if reply['kind'] == 'busy':
+                time.sleep(reply['retry_after'])  # The learner is behind
+                continue
+            if reply['kind'] == 'error':
+                # Resending the same data would be refused again
+                print(f"[WARN] Actor {self.actor_id}: learner rejected a batch: {reply.get('message')}")
+            self._pending = None
+            return
+
+
+    def play_episode(self):
+        '''Plays one episode with the current weights, flushing full batches'''
+        env = Tetris()
+        current_state = env.reset()
+        done = False
+        steps = 0
+        start = time.time()
+        while not done:
+            if self.piece_limit > 0 and env.get_game_score() >= self.piece_limit:
+                break
+            nxt = {tuple(v): k for k, v in env.get_next_states().items()}
+            best = self.net.best_state(nxt.keys())
+            act = nxt[best]
+            reward, done = env.play(act[0], act[1], render=False, piece_limit=self.piece_limit)
+            self._states.append(current_state)
+            self._next_states.append(best)
+            self._rewards.append(reward)
+            self._dones.append(done)
+            current_state = best
+            steps += 1
+            if len(self._rewards) >= self.batch_size:
+                self._flush()
+        self._episodes.append(dict(actor=self.actor_id, score=env.get_game_score(), steps=steps,
+                                   version=self.version, seconds=time.time() - start))
+        return env.get_game_score()
+
+
+    def run(self, episodes=None):
+        '''Plays `episodes` episodes (forever if None), syncing weights before each'''
+        played = 0
+        try:
+            while episodes is None or played < episodes:
+                self.sync_weights()
+                self.play_episode()
+                self._flush()  # Episode stats reach the learner promptly
+                played += 1
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+
+
+def run_actor(address, authkey, episodes=None, **kwargs):
+    '''Process entry point for one actor'''
+    RemoteActor(address, authkey=authkey, **kwargs).run(episodes)
+
+
+if __name__ == "__main__":
+    import argparse
+    import multiprocessing as mp
+
+    parser = argparse.ArgumentParser(description="Distributed episode generation for the Tetris DQN")
+    parser.add_argument("mode", choices=["learner", "actor", "local"],
+                        help="run the learner, one actor, or a learner plus actors on localhost")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="learner host (use 0.0.0.0 to accept other machines)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--authkey", default=None,
+                        help="shared secret (actors: the key the learner printed; learner: random if omitted)")
+    parser.add_argument("--actors", type=int, default=4, help="actor processes in local mode")
+    parser.add_argument("--episodes", type=int, default=5000, help="episodes the learner trains on")
+    parser.add_argument("--batch", type=int, default=512, help="transitions per actor batch")
+    parser.add_argument("--max-score", type=int, default=0, help="score cap per episode (0 = none)")
+    parser.add_argument("--save", help="checkpoint path for the learner's model")
+    parser.add_argument("--publish-every", type=int, default=4,
+                        help="train steps between weight updates sent to actors")
+    args = parser.parse_args()
+    authkey = args.authkey.encode() if args.authkey else None
+
+    if args.mode == "actor":
+        if authkey is None:
+            parser.error("actors need --authkey (the learner prints it at startup)")
+        run_actor((args.host, args.port), authkey,
+                  batch_size=args.batch, piece_limit=args.max_score)
+    else:
+        actors = []
+        if args.mode == "local":
+            # A fresh key for this run, handed straight to the actors
+            authkey = authkey or new_authkey()
+            ctx = mp.get_context("spawn")
+            for i in range(args.actors):
+                proc = ctx.Process(target=run_actor, daemon=True,
+                                   args=(('127.0.0.1', args.port), authkey),
+                                   kwargs=dict(actor_id=f"local-{i}", batch_size=args.batch,
+                                               piece_limit=args.max_score))
+                proc.start()
+                actors.append(proc)
+        stats = run_learner((args.host, args.port), authkey, episodes=args.episodes,
+                            save_path=args.save, publish_every=max(1, args.publish_every))
+        print(f"[INFO] Done: {stats}")
+        for proc in actors:
+            proc.terminate()
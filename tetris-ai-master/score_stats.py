@@ -0,0 +1,205 @@
+import math
+
+# Streaming score distribution statistics
+#
+# Tetris scores are heavy-tailed: a handful of very long games drag the
+# 50-episode average far above what a typical game scores, and the maximum
+# says nothing about the rest. These summaries track the shape of the
+# distribution instead, in constant memory and O(1) work per episode:
+#
+#   QuantileSketch  log-spaced histogram (relative accuracy `accuracy`, as in
+#                   DDSketch) answering any quantile, with exponential
+#                   forgetting so it follows the current policy
+#   EWStats         exponentially weighted mean and standard deviation
+#
+# Forgetting is done without touching old buckets: the weight of each new
+# value grows by a constant factor instead, and everything is rescaled in
+# the rare case the weights get large. Both classes convert to and from
+# plain dicts so they can be stored in the training state file.
+
+
+class QuantileSketch:
+
+    '''Decaying quantile sketch over non-negative values
+
+    Args:
+        accuracy (float): Relative error of returned quantiles (0.01 = 1%)
+        half_life (float): Values after which an observation counts half (0 = never forget)
+        max_buckets (int): Bucket limit; the lowest buckets are merged beyond it
+    '''
+
+    RESCALE_AT = 1e100
+
+    def __init__(self, accuracy=0.01, half_life=200, max_buckets=2048):
+        self.accuracy = accuracy
+        self.half_life = half_life
+        self.max_buckets = max_buckets
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._growth = 2 ** (1 / half_life) if half_life else 1.0
+        self.buckets = {}  # bucket index -> weight; values <= 0 go to bucket None
+        self.weight = 1.0  # Weight of the next value
+        self.total = 0.0
+        self.count = 0
+
+
+    def _bucket(self, value):
+        if value <= 0:
+            return None
+        return math.ceil(math.log(value) / self._log_gamma)
+
+
+    def add(self, value):
+        key = self._bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0.0) + self.weight
+        self.total += self.weight
+        self.count += 1
+        self.weight *= self._growth
+        if self.weight > self.RESCALE_AT:
+            self._rescale(1 / self.weight)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+
+    def _rescale(self, factor):
+        self.buckets = {k: w * factor for k, w in self.buckets.items() if w * factor > 1e-12}
+        self.total = sum(self.buckets.values())
+        self.weight *= factor
+
+
+    def _collapse(self):
+        '''Merges the two lowest positive buckets (keeps high quantiles exact)'''
+        keys = sorted(k for k in self.buckets if k is not None)
+        low, nxt = keys[0], keys[1]
+        self.buckets[nxt] += self.buckets.pop(low)
+
+
+    def quantile(self, q):
+        '''Estimated q-quantile (0..1) of the (decayed) distribution, None if empty'''
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = self.buckets.get(None, 0.0)
+        if seen > rank:
+            return 0.0
+        for key in sorted(k for k in self.buckets if k is not None):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+                return 2 * self._gamma ** key / (self._gamma + 1)
+        return 2 * self._gamma ** max(k for k in self.buckets if k is not None) / (self._gamma + 1)
+
+
+    def quantiles(self, qs):
+        return {q: self.quantile(q) for q in qs}
+
+
+    def to_dict(self):
+        return dict(accuracy=self.accuracy, half_life=self.half_life, max_buckets=self.max_buckets,
+                    weight=self.weight, count=self.count,
+                    buckets=[[k, w] for k, w in self.buckets.items()])
+
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d["accuracy"], d["half_life"], d["max_buckets"])
+        sketch.buckets = {k: w for k, w in d["buckets"]}
+        sketch.total = sum(sketch.buckets.values())
+        sketch.weight = d["weight"]
+        sketch.count = d["count"]
+        return sketch
+
+
+class EWStats:
+
+    '''Exponentially weighted mean and variance
+
+    Args:
+        half_life (float): Values after which an observation counts half
+    '''
+
+    def __init__(self, half_life=50):
+        self.half_life = half_life
+        self.alpha = 1 - 0.5 ** (1 / half_life)
+        self.mean = None
+        self.var = 0.0
+        self.count = 0
+
+
+    def add(self, value):
+        self.count += 1
+        if self.mean is None:
+            self.mean = float(value)
+            return
+        diff = value - self.mean
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+    def to_dict(self):
+        return dict(half_life=self.half_life, mean=self.mean, var=self.var, count=self.count)
+
+
+    @classmethod
+    def from_dict(cls, d):
+        stats = cls(d["half_life"])
+        stats.mean, stats.var, stats.count = d["mean"], d["var"], d["count"]
+        return stats
+
+
+class ScoreStats:
+
+    '''Quantile sketches and EW statistics over episode scores and lengths
+
+    Args:
+        half_life (float): Episodes after which a game counts half in the quantiles
+        ew_half_life (float): Episodes after which a game counts half in the EW mean/std
+    '''
+
+    QUANTILES = (0.1, 0.5, 0.9, 0.99)
+    SERIES = ("score", "steps")
+
+    def __init__(self, half_life=200, ew_half_life=50):
+        self.sketches = {s: QuantileSketch(half_life=half_life) for s in self.SERIES}
+        self.ew = {s: EWStats(ew_half_life) for s in self.SERIES}
+
+
+    def add(self, score, steps):
+        for name, value in (("score", score), ("steps", steps)):
+            self.sketches[name].add(value)
+            self.ew[name].add(value)
+
+
+    def summary(self):
+        '''{"score": {p10, p50, p90, p99, mean, std, count}, "steps": {...}}'''
+        out = {}
+        for name in self.SERIES:
+            q = self.sketches[name].quantiles(self.QUANTILES)
+            ew = self.ew[name]
+            out[name] = dict(p10=q[0.1], p50=q[0.5], p90=q[0.9], p99=q[0.99],
+                             mean=ew.mean, std=ew.std, count=ew.count)
+        return out
+
+
+    def to_dict(self):
+        return {name: dict(sketch=self.sketches[name].to_dict(), ew=self.ew[name].to_dict())
+                for name in self.SERIES}
+
+
+    @classmethod
+    def from_dict(cls, d):
+        '''Restores saved statistics; missing or unreadable entries start fresh'''
+        stats = cls()
+        for name in cls.SERIES:
+            try:
+                stats.sketches[name] = QuantileSketch.from_dict(d[name]["sketch"])
+                stats.ew[name] = EWStats.from_dict(d[name]["ew"])
+            except (KeyError, TypeError, ValueError):
+                pass
+        return stats
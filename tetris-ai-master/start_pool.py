@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+from tetris import Tetris
+
+# Pool of mid-game start positions
+#
+# Late in training most of an episode is spent in easy, well-learned states
+# near an empty board before anything informative happens. A StartPool keeps
+# boards seen during earlier play so Tetris.reset can begin some episodes
+# from them instead (see Tetris.start_pool / Tetris.pool_fraction).
+#
+# Boards are stored as bit-packed rows in one uint8 array (25 bytes per
+# 10x20 board) used as a ring buffer, so the pool follows the agent's recent
+# play. Only settled blocks are stored; the falling piece and bag are fresh
+# on every start.
+
+_BOARD_CELLS = Tetris.BOARD_WIDTH * Tetris.BOARD_HEIGHT
+_BOARD_BYTES = (_BOARD_CELLS + 7) // 8
+
+
+class StartPool:
+
+    '''Ring buffer of compact board snapshots
+
+    Args:
+        capacity (int): Maximum number of boards kept (oldest are overwritten)
+        min_blocks (int): Boards with fewer blocks are too close to empty to be worth keeping
+        max_height (int): Boards taller than this are too close to game over to start from
+    '''
+
+    def __init__(self, capacity=20000, min_blocks=12, max_height=12):
+        self.capacity = capacity
+        self.min_blocks = min_blocks
+        self.max_height = max_height
+        self.boards = np.zeros((capacity, _BOARD_BYTES), dtype=np.uint8)
+        self.size = 0
+        self.next = 0
+
+
+    def __len__(self):
+        return self.size
+
+
+    def add(self, board):
+        '''Stores a copy of `board` if it is an interesting start; returns True if kept'''
+        cells = np.asarray(board, dtype=np.uint8) == Tetris.MAP_BLOCK
+        if cells.sum() < max(self.min_blocks, 1):
+            return False
+        filled_rows = np.flatnonzero(cells.any(axis=1))
+        if Tetris.BOARD_HEIGHT - filled_rows[0] > self.max_height:
+            return False
+        self.boards[self.next] = np.packbits(cells.ravel())
+        self.next = (self.next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+
+    def sample(self, rng=np.random):
+        '''Returns a random stored board as a list of rows'''
+        packed = self.boards[rng.randint(self.size)]
+        cells = np.unpackbits(packed)[:_BOARD_CELLS].reshape(Tetris.BOARD_HEIGHT, Tetris.BOARD_WIDTH)
+        return (cells * Tetris.MAP_BLOCK).tolist()
+
+
+    def save(self, path):
+        '''Writes the stored boards, oldest first, to `path` (.npz)'''
+        order = np.roll(np.arange(self.size), -self.next) if self.size == self.capacity \
+            else np.arange(self.size)
+        np.savez_compressed(path, boards=self.boards[order])
+
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        '''Loads a pool saved with save(); an empty pool if the file is missing'''
+        pool = cls(**kwargs)
+        if os.path.exists(path):
+            boards = np.load(path)['boards'][-pool.capacity:]
+            pool.boards[:len(boards)] = boards
+            pool.size = len(boards)
+            pool.next = pool.size % pool.capacity
+        return pool
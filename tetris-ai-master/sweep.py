@@ -0,0 +1,239 @@
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+# Parallel hyperparameter sweeps with asynchronous successive halving (ASHA)
+#
+# Every trial runs the GUI's training loop (trainer.run_training) in a
+# separate process with its own run directory and TensorFlow thread budget.
+# At each rung (min_episodes, then every eta times more episodes) a trial
+# reports its rolling average score (fresh starts only) and is stopped
+# unless it ranks in the top 1/eta of all trials that have reported at that
+# rung so far. Good configurations therefore get the full
+# episode budget while poor ones are cut after a fraction of it.
+#
+# Usage:
+#   python sweep.py --mode random --trials 32 --workers 8 --max-episodes 3000
+#   python sweep.py --space my_space.json --mode grid
+
+SWEEPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweeps")
+
+# Same parameters as the GUI control panel. Lists are choices, (low, high)
+# pairs are sampled uniformly (as ints when both bounds are ints).
+DEFAULT_SPACE = {
+    "batch_size": [32, 64, 128, 256],
+    "epochs": [1, 2, 3],
+    "train_every": [1, 2],
+    "mem_size": [1000, 5000, 20000],
+    "discount": [0.90, 0.95, 0.98],
+    "epsilon_stop_episode": [500, 1000, 2000],
+}
+
+ROLLING_WINDOW = 50  # Episodes in the rolling average used for ranking
+
+
+def grid_configs(space):
+    '''Every combination of a space whose values are all lists'''
+    keys = list(space)
+    for values in itertools.product(*(space[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def random_configs(space, n, seed=0):
+    '''`n` random samples from a space of lists and (low, high) ranges'''
+    rng = random.Random(seed)
+    for _ in range(n):
+        config = {}
+        for key, spec in space.items():
+            if isinstance(spec, tuple):
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    config[key] = rng.randint(low, high)
+                else:
+                    config[key] = rng.uniform(low, high)
+            else:
+                config[key] = rng.choice(spec)
+        yield config
+
+
+def rungs(min_episodes, max_episodes, eta):
+    '''Episode counts at which trials are compared'''
+    out = []
+    r = min_episodes
+    while r < max_episodes:
+        out.append(r)
+        r *= eta
+    return out
+
+
+class ASHA:
+
+    '''Asynchronous successive halving decisions
+
+    Args:
+        eta (int): Reduction factor; only the top 1/eta continue past a rung
+    '''
+
+    def __init__(self, eta=3):
+        self.eta = eta
+        self.results = {}  # rung -> list of scores reported there
+
+    def report(self, rung, score):
+        '''Records a score at a rung; returns True if the trial may continue'''
+        scores = self.results.setdefault(rung, [])
+        scores.append(score)
+        if len(scores) < self.eta:
+            return True  # Too few results to judge yet
+        keep = max(1, len(scores) // self.eta)
+        cutoff = sorted(scores, reverse=True)[keep - 1]
+        return score >= cutoff
+
+
+def run_trial(trial_id, config, run_dir, conn, max_episodes, trial_rungs, threads, piece_limit):
+    '''Trial process: trains one agent with trainer.run_training, reporting at rungs through `conn`'''
+    # The trainer reads these at import, so they must be set first (trials are spawned)
+    os.environ['TETRIS_TF_THREADS'] = str(threads)
+    os.environ['TETRIS_MODELS_DIR'] = os.path.join(run_dir, "models")
+    os.environ['TETRIS_RUNS_DIR'] = os.path.join(run_dir, "runs")
+    os.environ['TETRIS_DATASETS_DIR'] = os.path.join(run_dir, "datasets")
+    from trainer import run_training
+
+    os.makedirs(run_dir, exist_ok=True)
+    with open(os.path.join(run_dir, "config.json"), 'w') as f:
+        json.dump(config, f, indent=2)
+
+    params = dict(config, episodes=max_episodes, piece_limit=piece_limit,
+                  record_every=0, follow_every=0, emit_episodes=True,
+                  final_model=os.path.join(run_dir, "final.keras"))
+    scores = deque(maxlen=ROLLING_WINDOW)
+    stop = threading.Event()
+    status = "completed"
+    ep_num = 0
+    start = time.time()
+
+    with open(os.path.join(run_dir, "progress.jsonl"), 'w') as log:
+        def emit(kind, data):
+            nonlocal ep_num, status
+            if kind != "episode" or stop.is_set():
+                return
+            ep_num = data["ep"]
+            log.write(json.dumps(dict(episode=ep_num, score=data["score"], steps=data["steps"],
+                                      pooled_start=data["pooled_start"])) + "\n")
+            if not data["pooled_start"]:
+                scores.append(data["score"])
+            if ep_num in trial_rungs:
+                avg = sum(scores) / len(scores) if scores else 0
+                log.flush()
+                conn.send(('rung', trial_id, ep_num, avg))
+                if conn.recv() != 'continue':
+                    status = f"stopped at {ep_num}"
+                    stop.set()
+
+        run_training(params, emit, stop)
+
+    result = dict(trial=trial_id, config=config, status=status, episodes=ep_num,
+                  rolling_avg=sum(scores) / len(scores) if scores else 0,
+                  elapsed=time.time() - start)
+    with open(os.path.join(run_dir, "result.json"), 'w') as f:
+        json.dump(result, f, indent=2)
+    conn.send(('done', trial_id, result))
+
+
+def run_sweep(configs, name=None, workers=None, max_episodes=3000, min_episodes=100,
+              eta=3, piece_limit=5000):
+    '''Runs all `configs` with at most `workers` trials at a time.
+
+    Returns the trial results sorted by final rolling average score.'''
+    name = name or time.strftime("sweep_%Y%m%d_%H%M%S")
+    sweep_dir = os.path.join(SWEEPS_DIR, name)
+    os.makedirs(sweep_dir, exist_ok=True)
+    configs = list(configs)
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    trial_rungs = rungs(min_episodes, max_episodes, eta)
+    scheduler = ASHA(eta)
+
+    pending = list(enumerate(configs))
+    running = {}  # conn -> (trial_id, process)
+    results = []
+    print(f"[INFO] Sweep '{name}': {len(configs)} trials, {workers} workers x {threads} threads, "
+          f"rungs {trial_rungs}")
+
+    while pending or running:
+        while pending and len(running) < workers:
+            trial_id, config = pending.pop(0)
+            parent, child = mp.Pipe()
+            run_dir = os.path.join(sweep_dir, f"trial_{trial_id:03d}")
+            # Spawned, so each trial imports TensorFlow with its own thread budget
+            proc = mp.get_context("spawn").Process(target=run_trial, daemon=True,
+                           args=(trial_id, config, run_dir, child, max_episodes,
+                                 trial_rungs, threads, piece_limit))
+            proc.start()
+            child.close()  # So a crashed trial shows up as EOF on our end
+            running[parent] = (trial_id, proc)
+
+        for conn in wait(list(running)):
+            try:
+                msg = conn.recv()
+            except EOFError:
+                trial_id, proc = running.pop(conn)
+                proc.join()
+                print(f"[WARN] Trial {trial_id} exited without a result")
+                continue
+            if msg[0] == 'rung':
+                _, trial_id, ep, avg = msg
+                keep = scheduler.report(ep, avg)
+                print(f"[INFO] Trial {trial_id} @ {ep}: avg {avg:,.0f} -> "
+                      f"{'continue' if keep else 'stop'}")
+                conn.send('continue' if keep else 'stop')
+            elif msg[0] == 'done':
+                _, trial_id, result = msg
+                results.append(result)
+                running.pop(conn)[1].join()
+
+    results.sort(key=lambda r: r["rolling_avg"], reverse=True)
+    with open(os.path.join(sweep_dir, "summary.json"), 'w') as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep with ASHA early stopping")
+    parser.add_argument("--space", help="JSON file with the search space (defaults to DEFAULT_SPACE)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random")
+    parser.add_argument("--trials", type=int, default=16, help="number of random samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="concurrent trials (default: CPU count)")
+    parser.add_argument("--max-episodes", type=int, default=3000)
+    parser.add_argument("--min-episodes", type=int, default=100, help="first rung")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--max-score", type=int, default=5000, help="score cap per episode (0 = none)")
+    parser.add_argument("--name")
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            # JSON has no tuples: two-element numeric lists under a "range" key become ranges
+            space = {k: tuple(v["range"]) if isinstance(v, dict) else v
+                     for k, v in json.load(f).items()}
+    if args.mode == "grid":
+        if any(isinstance(v, tuple) for v in space.values()):
+            parser.error("grid mode needs a list of values for every parameter")
+        configs = grid_configs(space)
+    else:
+        configs = random_configs(space, args.trials, args.seed)
+
+    results = run_sweep(configs, name=args.name, workers=args.workers,
+                        max_episodes=args.max_episodes, min_episodes=args.min_episodes,
+                        eta=args.eta, piece_limit=args.max_score)
+    for r in results[:5]:
+        print(f"[INFO] #{r['trial']:03d} avg {r['rolling_avg']:,.0f} ({r['status']}): {r['config']}")
@@ -0,0 +1,70 @@
+import os
+
+import checkpoints
+from checkpoints import MANIFEST_NAME, CheckpointManifest
+
+
+def write_checkpoints(manifest, episodes):
+    for ep in episodes:
+        path = os.path.join(manifest.models_dir, f"episode_{ep}.keras")
+        with open(path, 'wb') as f:
+            f.write(b"model %d" % ep)
+        manifest.add(ep, path, avg=float(ep))
+
+
+def test_save_leaves_no_temporary_files(tmp_path):
+    manifest = CheckpointManifest(str(tmp_path), keep_last=2, keep_every=0, keep_best=0)
+    write_checkpoints(manifest, range(1, 5))
+    assert sorted(os.listdir(tmp_path)) == [MANIFEST_NAME, "episode_3.keras", "episode_4.keras"]
+    assert CheckpointManifest(str(tmp_path)).episodes() == [3, 4]
+
+
+def test_prune_keeps_files_it_cannot_delete(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "REMOVE_RETRY_DELAY", 0)
+    manifest = CheckpointManifest(str(tmp_path), keep_last=1, keep_every=0, keep_best=0)
+    write_checkpoints(manifest, [1])
+
+    remove = os.remove
+    locked = {str(tmp_path / "episode_1.keras")}
+
+    def remove_unless_locked(path):
+        if path in locked:
+            raise PermissionError(path)
+        remove(path)
+
+    monkeypatch.setattr(checkpoints.os, "remove", remove_unless_locked)
+    write_checkpoints(manifest, [2])
+    # Still on disk, so still listed and retried at the next prune
+    assert manifest.episodes() == [1, 2]
+    assert os.path.exists(tmp_path / "episode_1.keras")
+
+    locked.clear()
+    write_checkpoints(manifest, [3])
+    assert manifest.episodes() == [3]
+    assert sorted(os.listdir(tmp_path)) == [MANIFEST_NAME, "episode_3.keras"]
+
+
+def test_checkpoints_from_before_the_manifest_are_never_pruned(tmp_path):
+    for name in ("episode_50.keras", "episode_100.keras", "episode_150.keras",
+                 "consistent_ep_120.keras"):
+        (tmp_path / name).write_bytes(b"old model")
+    # A read-only view lists them without hashing or writing anything
+    view = CheckpointManifest(str(tmp_path), build=False)
+    assert view.episodes() == [50, 100, 150]
+    assert not (tmp_path / MANIFEST_NAME).exists()
+
+    manifest = CheckpointManifest(str(tmp_path), keep_last=1, keep_every=0, keep_best=0)
+    assert all(e["legacy"] and e["sha256"] for e in manifest.entries)
+    write_checkpoints(manifest, [200, 250])
+    assert manifest.episodes() == [50, 100, 150, 250]
+    assert manifest.episodes("consistent") == [120]
+    assert (tmp_path / "episode_50.keras").exists()
+    assert not (tmp_path / "episode_200.keras").exists()
+
+
+def test_manifest_that_is_not_a_dict_is_rebuilt(tmp_path):
+    (tmp_path / "episode_50.keras").write_bytes(b"model")
+    (tmp_path / MANIFEST_NAME).write_text("[1, 2, 3]")
+    manifest = CheckpointManifest(str(tmp_path))
+    assert manifest.episodes() == [50]
+    assert CheckpointManifest(str(tmp_path)).episodes() == [50]
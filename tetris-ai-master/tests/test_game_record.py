@@ -0,0 +1,72 @@
+import random
+
+from game_record import GameRecorder, GameReplay, find_game, list_games, load_game
+from tetris import Tetris
+
+
+def play_recorded(recorder, seed, episode, pieces=150):
+    '''Plays a seeded game with a simple greedy policy, recording it.
+
+    Returns (board, score, current piece, next piece) before each placement.'''
+    rng = random.Random(seed)
+    env = Tetris()
+    env.reset(seed=seed)
+    recorder.start(env, episode=episode)
+    snapshots = []
+    done = False
+    while not done and len(snapshots) < pieces:
+        snapshots.append(([row[:] for row in env.board], env.score, env.current_piece, env.next_piece))
+        states = env.get_next_states()
+        # Classic weighted heuristic over (lines, holes, bumpiness, height); random ties
+        (x, rotation), _ = min(states.items(), key=lambda s: (
+            -0.76 * s[1][0] + 0.36 * s[1][1] + 0.18 * s[1][2] + 0.51 * s[1][3], rng.random()))
+        _, done = env.play(x, rotation)
+        recorder.record(x, rotation, env)
+    snapshots.append(([row[:] for row in env.board], env.score, env.current_piece, env.next_piece))
+    recorder.finish(env)
+    return snapshots
+
+
+def replay_state(replay):
+    env = replay.env
+    return env.board, env.score, env.current_piece, env.next_piece
+
+
+def test_replay_seeks_to_any_piece(tmp_path):
+    path = str(tmp_path / "games.tgr")
+    recorder = GameRecorder(path, keyframe_every=16, flush_every=7)
+    snapshots = play_recorded(recorder, seed=1234, episode=5)
+
+    record = load_game(path, find_game(path, episode=5)["offset"])
+    assert len(record) == len(snapshots) - 1
+    assert len(record.keyframes) > 2
+    assert record.score == snapshots[-1][1]
+
+    replay = GameReplay(record)
+    # Forward, backward, onto and just past keyframes, and the very end
+    for index in [0, 5, 16, 17, 3, 40, 33, 32, len(record), 1, len(record) - 1, 0]:
+        replay.seek(index)
+        assert replay.index == index
+        assert replay_state(replay) == snapshots[index]
+
+    replay.seek(0)
+    while not replay.done:
+        replay.step()
+        assert replay_state(replay) == snapshots[replay.index]
+
+
+def test_games_append_and_are_listed(tmp_path):
+    path = str(tmp_path / "games.tgr")
+    recorder = GameRecorder(path, keyframe_every=10)
+    first = play_recorded(recorder, seed=1, episode=1, pieces=30)
+    second = play_recorded(recorder, seed=2, episode=2, pieces=20)
+
+    games = list_games(path)
+    assert [(g["seed"], g["episode"], g["pieces"]) for g in games] == [(1, 1, 30), (2, 2, 20)]
+    assert [g["score"] for g in games] == [first[-1][1], second[-1][1]]
+    assert find_game(path)["episode"] == 2
+    assert find_game(path, episode=3) is None
+
+    replay = GameReplay(load_game(path, games[0]["offset"]))
+    replay.seek(25)
+    assert replay_state(replay) == first[25]
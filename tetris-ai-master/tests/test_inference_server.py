@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+import pytest
+
+from inference_server import InferenceClient, InferenceServer
+
+
+class FakeModel:
+
+    '''Callable like a Keras model: the value of a state is the sum of its features'''
+
+    input_shape = (None, 4)
+
+    def __call__(self, batch, training=False):
+        return FakeTensor(np.asarray(batch).sum(axis=1, keepdims=True))
+
+
+class FakeTensor:
+
+    def __init__(self, values):
+        self.values = values
+
+    def numpy(self):
+        return self.values
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = InferenceServer(models_dir=str(tmp_path), max_delay=0.001)
+    server.models['default'] = FakeModel()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join(5)
+    assert not thread.is_alive()  # stop() wakes the blocked accept()
+
+
+def test_predict_round_trip(server):
+    client = InferenceClient(server.address, authkey=server.authkey)
+    best, values = client.predict([[1, 0, 0, 0], [5, 0, 0, 1], [0, 0, 0, 0]])
+    assert best == 1
+    np.testing.assert_array_equal(values, [1, 6, 0])
+    with pytest.raises(RuntimeError):
+        client.predict([[1, 2, 3]])  # Wrong width: an error reply, not a dead server
+    assert client.predict([[0, 0, 0, 2]])[0] == 0
+    assert client.stats()['requests'] == 2
+    client.close()
+
+
+def test_load_is_limited_to_the_models_directory(server, tmp_path):
+    client = InferenceClient(server.address, authkey=server.authkey)
+    with pytest.raises(RuntimeError, match="outside the models directory"):
+        client.load(str(tmp_path.parent / "elsewhere.keras"))
+    with pytest.raises(RuntimeError, match="outside the models directory"):
+        client.load("../elsewhere.keras")
+    client.close()
+
+
+def test_tcp_needs_an_explicit_authkey():
+    with pytest.raises(ValueError):
+        InferenceServer(('127.0.0.1', 0))
+    with pytest.raises(ValueError):
+        InferenceClient(('127.0.0.1', 1))
@@ -0,0 +1,98 @@
+import os
+import threading
+
+import pytest
+
+from model_cache import ModelCache
+
+
+class CountingLoader:
+
+    '''Loader stand-in: returns (path, load number) and counts loads per path'''
+
+    def __init__(self):
+        self.loads = []
+
+    def __call__(self, path):
+        self.loads.append(path)
+        with open(path) as f:
+            return f.read(), len(self.loads)
+
+
+def checkpoint(tmp_path, name, content="model", mtime=1_000_000):
+    path = tmp_path / name
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_hits_until_the_file_changes(tmp_path):
+    loader = CountingLoader()
+    cache = ModelCache(loader)
+    path = checkpoint(tmp_path, "best.keras", "v1")
+    assert cache.get(path) == ("v1", 1)
+    assert cache.get(path) == ("v1", 1)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # Overwritten on disk: a new modification time is a new key
+    checkpoint(tmp_path, "best.keras", "v2", mtime=1_000_100)
+    assert cache.get(path) == ("v2", 2)
+    # ...and the stale version is dropped rather than taking a slot
+    assert cache.stats()["size"] == 1
+    assert cache.get(os.path.relpath(path)) == ("v2", 2)
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    loader = CountingLoader()
+    cache = ModelCache(loader, capacity=2)
+    a, b, c = (checkpoint(tmp_path, f"episode_{i}.keras") for i in (1, 2, 3))
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)
+    cache.get(c)  # Evicts b
+    assert cache.stats()["size"] == 2
+    cache.get(a)
+    cache.get(b)
+    assert loader.loads == [a, b, c, b]
+
+
+def test_failures_are_not_cached(tmp_path):
+    calls = []
+
+    def flaky(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise OSError("locked")
+        return "model"
+
+    cache = ModelCache(flaky)
+    path = checkpoint(tmp_path, "episode_1.keras")
+    with pytest.raises(OSError):
+        cache.get(path)
+    assert cache.get(path) == "model"
+    assert len(calls) == 2
+
+
+def test_prefetch(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def slow(path):
+        loads.append(path)
+        started.set()
+        release.wait(10)
+        return path
+
+    cache = ModelCache(slow)
+    a, b = checkpoint(tmp_path, "episode_1.keras"), checkpoint(tmp_path, "episode_2.keras")
+    cache.prefetch([a, b, str(tmp_path / "missing.keras")])
+    assert cache.stats()["size"] == 2
+    assert started.wait(10)
+    # b is queued behind a, so get() loads it here instead of waiting
+    threading.Timer(0.2, release.set).start()
+    assert cache.get(b) == b
+    # a was already running, so get() waits for it instead of loading it twice
+    assert cache.get(a) == a
+    assert sorted(loads) == [a, b]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["ready"] == 2
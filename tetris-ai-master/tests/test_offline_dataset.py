@@ -0,0 +1,39 @@
+import threading
+
+import numpy as np
+import pytest
+
+import offline_dataset
+import trainer
+
+
+def test_training_export_reads_back_through_the_pipeline(tmp_path, monkeypatch):
+    pytest.importorskip("tensorflow")
+    models = tmp_path / "models"
+    for name, path in (("BEST_COPY_FILE", tmp_path / "best.keras"), ("MODELS_DIR", models), ("RUNS_DIR", tmp_path / "runs"),
+                       ("STATE_FILE", models / "_training_state.json"),
+                       ("RECORDINGS_FILE", models / "recordings.tgr"),
+                       ("START_POOL_FILE", models / "start_pool.npz"),
+                       ("DATASETS_DIR", tmp_path / "datasets")):
+        monkeypatch.setattr(trainer, name, str(path))
+
+    params = dict(episodes=3, epsilon_stop_episode=2, mem_size=500, discount=0.95, batch_size=32,
+                  epochs=1, train_every=1, piece_limit=60, prefill=False, tensorboard=False,
+                  follow_every=0, export_transitions=True)
+    messages = []
+    trainer.run_training(params, lambda kind, data: messages.append(kind), threading.Event())
+    assert messages[-1] == "done"
+
+    directory = str(tmp_path / "datasets" / "training")
+    info = offline_dataset.dataset_info(directory)
+    assert info["state_size"] == 4
+    assert info["transitions"] > 0
+
+    seen = 0
+    for states, next_states, rewards, dones in offline_dataset.make_dataset(
+            directory, batch_size=1, repeat=False):
+        assert states.shape == next_states.shape == (1, 4)
+        assert np.isfinite(rewards.numpy()).all()
+        assert set(dones.numpy()) <= {0.0, 1.0}
+        seen += 1
+    assert seen == info["transitions"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from population import Population  # noqa: E402
+
+
+def ratio(new, old):
+    return round(new / old, 6)
+
+
+def test_exploit_explore_copies_the_strongest_into_the_weakest():
+    pop = Population(members=4, ready_episodes=4, truncate=0.25, prefill=False, seed=0)
+    pop.recent = [[10, 10], [40, 40, 40], [20, 20], [30]]  # Member 3 is not ready yet
+    pop.episodes = [5, 17, 6, 2]
+    before = [dict(h) for h in pop.hparams]
+
+    assert pop.exploit_explore() == [(0, 1)]
+
+    # Weights and optimizer state of member 1 now belong to member 0
+    for (k0, b0, _), (k1, b1, _) in zip(pop.net.member_layers(0), pop.net.member_layers(1)):
+        np.testing.assert_array_equal(k0, k1)
+        np.testing.assert_array_equal(b0, b1)
+    for m in pop.net._m:
+        np.testing.assert_array_equal(m[0].numpy(), m[1].numpy())
+
+    # Hyperparameters are member 1's, each scaled by 0.8 or 1.2
+    hp = pop.hparams[0]
+    assert ratio(hp["lr"], before[1]["lr"]) in (0.8, 1.2)
+    assert ratio(1 - hp["discount"], 1 - before[1]["discount"]) in (0.8, 1.2)
+    assert hp["epsilon_stop"] in (int(before[1]["epsilon_stop"] * 0.8), int(before[1]["epsilon_stop"] * 1.2))
+    assert pop.net.learning_rates.numpy()[0] == pytest.approx(hp["lr"])
+    assert pop.net.learning_rates.numpy()[1] == pytest.approx(before[1]["lr"])
+    assert pop.hparams[1:] == before[1:]
+
+    # Exploration continues from the source's level, and the scores start over
+    assert pop.episodes == [17, 17, 6, 2]
+    assert pop.recent == [[], [40, 40, 40], [20, 20], [30]]
+    assert pop.lineage == [(pop.total_episodes, 0, 1)]
+    assert pop.leader() == 1
+
+
+def test_exploit_explore_needs_two_ready_members():
+    pop = Population(members=4, ready_episodes=4, prefill=False, seed=0)
+    pop.recent = [[10, 10], [], [5], []]
+    weights = [k.numpy().copy() for k in pop.net.kernels]
+    assert pop.exploit_explore() == []
+    assert pop.lineage == []
+    for k, w in zip(pop.net.kernels, weights):
+        np.testing.assert_array_equal(k.numpy(), w)
+
+
+def test_truncate_is_validated():
+    with pytest.raises(ValueError):
+        Population(members=4, truncate=0.6, prefill=False)
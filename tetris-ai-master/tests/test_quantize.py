@@ -0,0 +1,68 @@
+import numpy as np
+
+from quantize import QuantizedValueNet, agreement, quantize_layers, reference_boards, throughput
+from value_net import NumpyValueNet
+
+
+def random_layers(seed, sizes=(4, 32, 32, 32, 1)):
+    '''Glorot-uniform Dense layers shaped like DQNAgent's default network'''
+    rng = np.random.default_rng(seed)
+    layers = []
+    for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+        limit = np.sqrt(6 / (n_in + n_out))
+        layers.append((rng.uniform(-limit, limit, (n_in, n_out)).astype(np.float32),
+                       rng.uniform(-0.1, 0.1, n_out).astype(np.float32),
+                       'linear' if i == len(sizes) - 2 else 'relu'))
+    return layers
+
+
+def quantized(layers, calibration, tmp_path):
+    path = tmp_path / "net.int8.npz"
+    np.savez_compressed(path, **quantize_layers(layers, calibration))
+    return QuantizedValueNet(str(path))
+
+
+def test_argmax_agreement_on_game_states(tmp_path):
+    for seed in range(3):
+        layers = random_layers(seed)
+        net = NumpyValueNet(layers)
+        batches = reference_boards(net.predict, games=12, max_pieces=300, seed=seed)
+        # Calibrated on the first few games, checked on all of them
+        qnet = quantized(layers, np.concatenate(batches[:len(batches) // 4]), tmp_path)
+        for qpredict in (qnet.predict, qnet.predict_int):
+            report = agreement(net.predict, qpredict, batches)
+            assert report['argmax_agreement'] >= 0.95, f"seed {seed}: {report}"
+
+
+def test_input_features_keep_their_resolution(tmp_path):
+    layers = random_layers(0)
+    calibration = np.array([[0, 0, 0, 0], [4, 40, 60, 200]], dtype=np.float32)
+    qnet = quantized(layers, calibration, tmp_path)
+    # Small integer features are not rounded away next to large ones
+    one, two = qnet.predict_int(np.array([[1, 3, 10, 190], [2, 3, 10, 190]], dtype=np.float32))
+    net = NumpyValueNet(layers)
+    ref_one, ref_two = net.predict(np.array([[1, 3, 10, 190], [2, 3, 10, 190]], dtype=np.float32))
+    assert np.sign(two - one) == np.sign(ref_two - ref_one)
+
+
+def test_value_does_not_depend_on_batch(tmp_path):
+    layers = random_layers(1)
+    calibration = np.array([[0, 0, 0, 0], [4, 40, 60, 200]], dtype=np.float32)
+    qnet = quantized(layers, calibration, tmp_path)
+    state = np.array([[1, 2, 5, 30]], dtype=np.float32)
+    alone = qnet.predict_int(state)[0]
+    batched = qnet.predict_int(np.concatenate([state, [[4, 40, 60, 200]]]))[0]
+    assert alone == batched
+
+
+def test_int8_storage_and_float_speed(tmp_path):
+    layers = random_layers(2)
+    net = NumpyValueNet(layers)
+    batches = reference_boards(net.predict, games=1, max_pieces=100)
+    qnet = quantized(layers, np.concatenate(batches), tmp_path)
+    assert all(w.dtype == np.int8 for _, w, _, _ in qnet.qlayers)
+    # The dequantized pass must not fall behind the float net it replaces
+    # (integer matmuls in NumPy were 8-20x slower)
+    batch = np.concatenate(batches)
+    assert throughput(qnet.predict, [batch])['us_per_move'] < \
+        3 * throughput(net.predict, [batch])['us_per_move']
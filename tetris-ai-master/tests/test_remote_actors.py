@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+import pytest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+from remote_actors import Learner, RemoteActor, batch_arrays
+from wire import encode_msg, recv_msg, send_msg
+
+
+class FakeLayer:
+
+    def __init__(self, kernel, bias, activation):
+        self.weights = [kernel, bias]
+        self.activation = activation
+
+    def get_weights(self):
+        return self.weights
+
+    def get_config(self):
+        return dict(activation=self.activation)
+
+
+class FakeModel:
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.layers = [FakeLayer(rng.normal(size=(4, 8)).astype(np.float32), np.zeros(8, np.float32), 'relu'),
+                       FakeLayer(rng.normal(size=(8, 1)).astype(np.float32), np.zeros(1, np.float32), 'linear')]
+
+
+class FakeAgent:
+
+    '''The parts of DQNAgent the learner uses'''
+
+    def __init__(self):
+        self.model = FakeModel()
+        self.state_size = 4
+        self.epsilon = 0.5
+        self.weights_version = 0
+        self.memory = []
+
+    def add_to_memory(self, *transition):
+        self.memory.append(transition)
+
+
+@pytest.fixture
+def learner():
+    learner = Learner(FakeAgent(), ('127.0.0.1', 0), max_pending=4)
+    learner.start()
+    yield learner
+    learner.stop()
+
+
+def test_actor_episodes_reach_the_learner(learner):
+    actor = RemoteActor(learner.address, actor_id="test", authkey=learner.authkey, batch_size=64,
+                        piece_limit=20)
+    thread = threading.Thread(target=actor.run, args=(3,))
+    thread.start()
+    episodes = []
+    while len(episodes) < 3:
+        episodes.extend(learner.drain(timeout=10))
+    thread.join(10)
+
+    assert [e['actor'] for e in episodes] == ["test"] * 3
+    assert actor.version == 0 and actor.net.epsilon == 0.5
+    stats = learner.stats()
+    assert stats['episodes'] == 3 and stats['rejected_batches'] == 0
+    assert stats['transitions'] == len(learner.agent.memory) == sum(e['steps'] for e in episodes)
+
+    # New weights are sent once; unchanged ones are only confirmed
+    learner.agent.model = FakeModel(seed=1)
+    learner.agent.weights_version = 1
+    assert learner.publish_weights()
+    assert not learner.publish_weights()
+    actor.conn = None
+    actor.sync_weights()
+    assert actor.version == 1
+    np.testing.assert_array_equal(actor.net.layers[0][0], learner.agent.model.layers[0].weights[0])
+    actor.sync_weights()
+    assert actor.version == 1
+    actor.conn.close()
+
+
+def test_malformed_batch_gets_an_error_and_is_counted(learner):
+    conn = Client(learner.address, authkey=learner.authkey)
+    arrays = batch_arrays(np.zeros((3, 4)), np.zeros((2, 4)), np.zeros(3), np.zeros(3))
+    send_msg(conn, 'batch', arrays, actor_id="bad", version=0, episodes=[])
+    reply, _ = recv_msg(conn)
+    assert reply['kind'] == 'error'
+    # Not unpickled, whatever the bytes are
+    conn.send_bytes(b'\x80\x04garbage')
+    assert recv_msg(conn)[0]['kind'] == 'error'
+    conn.send_bytes(encode_msg(dict(kind='weights', have=None)))
+    assert recv_msg(conn)[0]['kind'] == 'weights'
+    conn.close()
+    assert learner.stats()['rejected_batches'] == 1
+    assert learner.drain(timeout=0.1) == []
+
+
+def test_wrong_authkey_is_refused(learner):
+    with pytest.raises(AuthenticationError):
+        Client(learner.address, authkey=b'tetris-ai')
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pytest
+
+from score_stats import QuantileSketch, ScoreStats
+
+QS = (0.1, 0.5, 0.9, 0.99)
+
+
+def heavy_tailed(n=1001, seed=0):
+    return np.random.default_rng(seed).lognormal(mean=5, sigma=1.5, size=n)
+
+
+def json_round_trip(d):
+    return json.loads(json.dumps(d))
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.05])
+def test_quantiles_match_numpy_within_accuracy(accuracy):
+    sample = heavy_tailed()
+    sketch = QuantileSketch(accuracy=accuracy, half_life=0)
+    for v in sample:
+        sketch.add(v)
+    for q in QS:
+        # q * n is never a whole number here, so every method picks the same order statistic
+        expected = np.quantile(sample, q, method="inverted_cdf")
+        assert sketch.quantile(q) == pytest.approx(expected, rel=accuracy)
+
+
+def test_zeros_and_empty():
+    sketch = QuantileSketch(half_life=0)
+    assert sketch.quantile(0.5) is None
+    for v in [0, 0, 0, 10]:
+        sketch.add(v)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(0.9) == pytest.approx(10, rel=0.01)
+
+
+def test_old_values_are_forgotten():
+    sketch = QuantileSketch(half_life=10)
+    for _ in range(500):
+        sketch.add(1.0)
+    for _ in range(100):
+        sketch.add(1000.0)
+    # 100 values = 10 half-lives: the old regime weighs about 1/1000 of the total
+    assert sketch.quantile(0.01) == pytest.approx(1000, rel=0.01)
+
+
+def test_rescaling_keeps_the_distribution():
+    sketch = QuantileSketch(half_life=1)  # Weight doubles per value: rescaled every ~330
+    values = heavy_tailed(2000)
+    for v in values:
+        sketch.add(v)
+    assert sketch.weight <= QuantileSketch.RESCALE_AT
+    # The newest value carries half the total weight
+    assert sketch.quantile(0.75) == pytest.approx(values[-1], rel=0.01)
+
+
+def test_bucket_limit_keeps_high_quantiles():
+    sample = heavy_tailed()
+    sketch = QuantileSketch(half_life=0, max_buckets=32)
+    for v in sample:
+        sketch.add(v)
+    assert len(sketch.buckets) <= 32
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(sample, 0.99, method="inverted_cdf"),
+                                                  rel=0.01)
+
+
+def test_sketch_round_trip():
+    sketch = QuantileSketch(accuracy=0.02, half_life=50)
+    sample = heavy_tailed()
+    for v in sample[:600]:
+        sketch.add(v)
+    sketch.add(0)
+    restored = QuantileSketch.from_dict(json_round_trip(sketch.to_dict()))
+    assert restored.quantiles(QS) == sketch.quantiles(QS)
+    # Both keep evolving identically
+    for v in sample[600:]:
+        sketch.add(v)
+        restored.add(v)
+    assert restored.quantiles(QS) == pytest.approx(sketch.quantiles(QS))
+    assert restored.count == sketch.count == len(sample) + 1
+
+
+def test_score_stats_summary_and_round_trip():
+    stats = ScoreStats(half_life=0, ew_half_life=50)
+    scores = heavy_tailed()
+    steps = np.arange(1, len(scores) + 1)
+    for score, n in zip(scores, steps):
+        stats.add(score, n)
+    summary = stats.summary()
+    for q in QS:
+        key = f"p{round(q * 100)}"
+        assert summary["score"][key] == pytest.approx(np.quantile(scores, q, method="inverted_cdf"), rel=0.01)
+        assert summary["steps"][key] == pytest.approx(np.quantile(steps, q, method="inverted_cdf"), rel=0.01)
+    assert summary["score"]["count"] == len(scores)
+
+    restored = ScoreStats.from_dict(json_round_trip(stats.to_dict()))
+    assert restored.summary() == summary
+
+
+def test_unreadable_saved_stats_start_fresh():
+    restored = ScoreStats.from_dict({"score": {"sketch": "garbage"}})
+    assert restored.summary()["score"]["count"] == 0
+    assert restored.summary()["score"]["p50"] is None
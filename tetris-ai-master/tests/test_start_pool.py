@@ -0,0 +1,89 @@
+import numpy as np
+
+from start_pool import StartPool
+from tetris import Tetris
+
+
+def board_with(rows, seed):
+    '''A board whose bottom `rows` rows are randomly filled (with at least one gap each)'''
+    rng = np.random.default_rng(seed)
+    board = np.zeros((Tetris.BOARD_HEIGHT, Tetris.BOARD_WIDTH), dtype=int)
+    for y in range(Tetris.BOARD_HEIGHT - rows, Tetris.BOARD_HEIGHT):
+        board[y] = rng.integers(0, 2, Tetris.BOARD_WIDTH)
+        board[y, rng.integers(Tetris.BOARD_WIDTH)] = 0
+        board[y, rng.integers(Tetris.BOARD_WIDTH)] = Tetris.MAP_BLOCK
+    return (board * Tetris.MAP_BLOCK).tolist()
+
+
+def test_only_interesting_boards_are_kept():
+    pool = StartPool(capacity=10, min_blocks=12, max_height=12)
+    assert not pool.add(board_with(0, 0))   # Empty
+    assert not pool.add(board_with(1, 0))   # Too few blocks
+    assert not pool.add(board_with(13, 0))  # Too tall
+    assert pool.add(board_with(6, 0))
+    assert len(pool) == 1
+
+
+def test_samples_are_stored_boards():
+    pool = StartPool(capacity=10)
+    boards = [board_with(6, seed) for seed in range(5)]
+    for board in boards:
+        assert pool.add(board)
+    rng = np.random.RandomState(0)
+    for _ in range(20):
+        assert pool.sample(rng) in boards
+
+
+def test_ring_buffer_keeps_the_newest():
+    pool = StartPool(capacity=3)
+    boards = [board_with(6, seed) for seed in range(5)]
+    for board in boards:
+        pool.add(board)
+    assert len(pool) == 3
+    rng = np.random.RandomState(0)
+    assert {str(pool.sample(rng)) for _ in range(50)} == {str(b) for b in boards[2:]}
+
+
+def test_save_and_load_keep_order(tmp_path):
+    path = str(tmp_path / "pool.npz")
+    assert len(StartPool.load(path)) == 0
+
+    pool = StartPool(capacity=4)
+    boards = [board_with(6, seed) for seed in range(6)]
+    for board in boards:
+        pool.add(board)
+    pool.save(path)
+
+    loaded = StartPool.load(path, capacity=4)
+    assert len(loaded) == 4 and loaded.next == 0
+    np.testing.assert_array_equal(loaded.boards, _packed(boards[2:]))
+    # A smaller pool keeps the newest boards and overwrites the oldest first
+    small = StartPool.load(path, capacity=2)
+    np.testing.assert_array_equal(small.boards, _packed(boards[4:]))
+    small.add(boards[0])
+    np.testing.assert_array_equal(small.boards, _packed([boards[0], boards[5]]))
+
+    # A pool that has not wrapped yet saves only what it holds
+    partial = StartPool(capacity=10)
+    partial.add(boards[1])
+    partial.save(path)
+    loaded = StartPool.load(path, capacity=10)
+    assert len(loaded) == 1 and loaded.next == 1
+    assert loaded.sample() == boards[1]
+
+
+def test_reset_starts_from_the_pool():
+    pool = StartPool(capacity=4)
+    board = board_with(6, 0)
+    pool.add(board)
+    env = Tetris(start_pool=pool, pool_fraction=1.0)
+    env.reset()
+    assert env.pooled_start and env.board == board
+    # Seeded games are replayable, so they always start empty
+    env.reset(seed=1)
+    assert not env.pooled_start and not any(map(any, env.board))
+
+
+def _packed(boards):
+    cells = np.asarray(boards) == Tetris.MAP_BLOCK
+    return np.packbits(cells.reshape(len(boards), -1), axis=1)
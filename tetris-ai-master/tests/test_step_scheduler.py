@@ -0,0 +1,35 @@
+import pytest
+
+from trainer import StepScheduler
+
+
+def run(scheduler, steps):
+    return [scheduler.step() for _ in range(steps)]
+
+
+def test_updates_only_on_every_nth_placement():
+    # 8 samples trained per placement, 32 samples per update: one update per 4 placements
+    updates = run(StepScheduler(4, replay_ratio=8, batch_size=32, epochs=1), 20)
+    assert updates == [0, 0, 0, 1] * 5
+
+
+def test_several_updates_per_call_at_high_ratios():
+    updates = run(StepScheduler(10, replay_ratio=64, batch_size=32, epochs=1), 30)
+    assert [u for u in updates if u] == [20, 20, 20]
+    assert updates.index(20) == 9
+
+
+@pytest.mark.parametrize("every, ratio, batch, epochs", [
+    (1, 1, 32, 1),
+    (5, 3, 64, 2),
+    (7, 0.5, 16, 1),
+    (16, 12, 512, 3),
+])
+def test_fractional_credit_carries_over(every, ratio, batch, epochs):
+    scheduler = StepScheduler(every, ratio, batch, epochs)
+    steps = 10_000
+    total = sum(run(scheduler, steps))
+    # Samples trained keep pace with placements played, whatever the rounding
+    expected = (steps // every) * every * ratio / (batch * epochs)
+    assert expected - 1 < total <= expected
+    assert scheduler.steps == steps
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+
+def test_cached_values_follow_weight_updates():
+    pytest.importorskip("tensorflow")
+    from dqn_agent import DQNAgent
+
+    agent = DQNAgent(4, n_neurons=[8], activations=['relu', 'linear'], epsilon_stop_episode=0,
+                     value_cache_size=100)
+    agent.epsilon = 0
+    states = [(1, 2, 3, 4), (0, 1, 0, 2), (3, 0, 5, 1)]
+    agent.best_state(states)
+    agent.best_state(states)
+    assert agent.cache_stats()['hits'] == 3 and agent.cache_stats()['misses'] == 3
+
+    # New weights: every cached value is stale, and the choice follows the new network
+    weights = agent.model.get_weights()
+    weights[-2] = -weights[-2]
+    agent.set_weights(weights)
+    expected = states[int(np.argmax(agent.model(np.array(states, dtype=np.float32)).numpy()))]
+    assert agent.best_state(states) == expected
+    assert agent.cache_stats()['misses'] == 6
+
+
+def test_training_agents_do_not_cache():
+    pytest.importorskip("tensorflow")
+    from dqn_agent import DQNAgent
+
+    agent = DQNAgent(4, n_neurons=[8], activations=['relu', 'linear'])
+    assert agent.value_cache_size == 0
+    agent.epsilon = 0
+    agent.best_state([(1, 2, 3, 4), (0, 1, 0, 2)])
+    assert agent.cache_stats()['size'] == 0
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+pytest.importorskip("customtkinter")
+
+from tetris import Tetris  # noqa: E402
+from tetris_gui import FrameSlot, make_vis_frame  # noqa: E402
+
+
+def test_latest_frame_wins():
+    slot = FrameSlot()
+    assert slot.take() is None
+    for i in range(5):
+        slot.publish(i)
+    assert slot.take() == 4
+    assert slot.take() is None  # Each frame is handed over once
+
+
+def test_concurrent_publishing_never_queues_up():
+    slot = FrameSlot()
+    done = threading.Event()
+    taken = []
+
+    def simulate():
+        for i in range(20_000):
+            slot.publish(i)
+        done.set()
+
+    thread = threading.Thread(target=simulate)
+    thread.start()
+    while not done.is_set():
+        frame = slot.take()
+        if frame is not None:
+            taken.append(frame)
+    thread.join()
+    last = slot.take()
+    if last is not None:
+        taken.append(last)
+    # Frames arrive in order, the final one always arrives, and skipped ones are simply gone
+    assert taken == sorted(set(taken)) and taken[-1] == 19_999
+
+
+def test_frames_are_snapshots():
+    env = Tetris()
+    env.reset(seed=3)
+    frame = make_vis_frame(env, "Episode 1", high=0, pieces=0, episode=1)
+    board = [list(row) for row in frame.board]
+    assert any(Tetris.MAP_PLAYER in row for row in board)  # Includes the falling piece
+    assert frame.next_piece == env.next_piece and frame.score == 0
+
+    env.play(*next(iter(env.get_next_states())))
+    # The simulation moved on; the frame the UI holds did not
+    assert [list(row) for row in frame.board] == board
+    assert frame.score == 0
+    with pytest.raises(TypeError):
+        frame.board[0][0] = 1
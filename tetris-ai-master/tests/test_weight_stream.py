@@ -0,0 +1,85 @@
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from value_net import NumpyValueNet
+from weight_stream import WeightFollower, WeightPublisher
+
+
+def random_layers(seed, sizes=(4, 16, 16, 1)):
+    rng = np.random.default_rng(seed)
+    return [(rng.normal(size=(n_in, n_out)).astype(np.float32),
+             rng.normal(size=n_out).astype(np.float32),
+             'linear' if i == len(sizes) - 2 else 'relu')
+            for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:]))]
+
+
+def assert_same_layers(actual, expected):
+    assert len(actual) == len(expected)
+    for (k, b, a), (k2, b2, a2) in zip(actual, expected):
+        np.testing.assert_array_equal(k, k2)
+        np.testing.assert_array_equal(b, b2)
+        assert a == a2
+
+
+@pytest.fixture
+def publisher():
+    publisher = WeightPublisher(random_layers(0), episode=10)
+    yield publisher
+    publisher.close()
+
+
+def test_snapshots_round_trip(publisher):
+    follower = WeightFollower(publisher.name)
+    version, episode, published, layers = follower.poll()
+    assert (version, episode) == (1, 10) and published > 0
+    assert_same_layers(layers, random_layers(0))
+    assert follower.poll() is None  # Nothing newer yet
+
+    publisher.publish(random_layers(1), episode=20)
+    publisher.publish(random_layers(2), episode=30)
+    version, episode, _, layers = follower.poll()
+    assert (version, episode) == (3, 30)  # Only the latest snapshot is seen
+    assert_same_layers(layers, random_layers(2))
+
+    states = np.random.default_rng(0).normal(size=(34, 4)).astype(np.float32)
+    np.testing.assert_allclose(NumpyValueNet(layers).predict(states),
+                               NumpyValueNet(random_layers(2)).predict(states), rtol=1e-6)
+
+    # Returned layers are copies, not views of the block
+    follower.close()
+    publisher.publish(random_layers(3), episode=40)
+    assert_same_layers(layers, random_layers(2))
+
+
+def test_reads_during_a_publish_are_retried(publisher):
+    follower = WeightFollower(publisher.name)
+    follower.poll()
+    publisher.publish(random_layers(1), episode=20)
+    # Leave the sequence counter odd, as if the trainer were mid-copy
+    seq = struct.unpack_from('<Q', publisher.shm.buf, 4)[0]
+    struct.pack_into('<Q', publisher.shm.buf, 4, seq + 1)
+    assert follower.poll(retries=2) is None
+    struct.pack_into('<Q', publisher.shm.buf, 4, seq)
+    assert follower.poll()[0] == 2
+    follower.close()
+
+
+def test_other_blocks_are_refused():
+    shm = shared_memory.SharedMemory(create=True, size=4096)
+    try:
+        with pytest.raises(ValueError):
+            WeightFollower(shm.name)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_close_removes_the_block():
+    publisher = WeightPublisher(random_layers(0))
+    name = publisher.name
+    publisher.close()
+    with pytest.raises(FileNotFoundError):
+        WeightFollower(name)
@@ -65,16 +65,32 @@ class Tetris:
     }
 
 
-    def __init__(self):
+    def __init__(self, start_pool=None, pool_fraction=0.0):
+        self.start_pool = start_pool
+        self.pool_fraction = pool_fraction
         self.reset()
 
     
-    def reset(self):
-        '''Resets the game, returning the current state'''
-        self.board = [[0] * Tetris.BOARD_WIDTH for _ in range(Tetris.BOARD_HEIGHT)]
+    def reset(self, seed=None):
+        '''Resets the game, returning the current state.
+
+        If a seed is given, the piece sequence depends only on it (each bag is
+        shuffled from the seed and the bag number), so the game can be replayed
+        exactly from its list of plays.
+
+        Unseeded games start from a board drawn from `start_pool` with
+        probability `pool_fraction`, and from an empty board otherwise.'''
+        self.pooled_start = (seed is None and self.start_pool is not None
+                             and len(self.start_pool) > 0
+                             and random.random() < self.pool_fraction)
+        if self.pooled_start:
+            self.board = self.start_pool.sample()
+        else:
+            self.board = [[0] * Tetris.BOARD_WIDTH for _ in range(Tetris.BOARD_HEIGHT)]
         self.game_over = False
-        self.bag = list(range(len(Tetris.TETROMINOS)))
-        random.shuffle(self.bag)
+        self.seed = seed
+        self.bags_drawn = 0
+        self.bag = self._new_bag()
         self.next_piece = self.bag.pop()
         self._new_round()
         self.score = 0
@@ -105,12 +121,22 @@ class Tetris:
         return self.score
     
 
+    def _new_bag(self):
+        '''Returns a new shuffled bag with one of each piece'''
+        bag = list(range(len(Tetris.TETROMINOS)))
+        if self.seed is None:
+            random.shuffle(bag)
+        else:
+            random.Random((self.seed << 32) + self.bags_drawn).shuffle(bag)
+        self.bags_drawn += 1
+        return bag
+
+
     def _new_round(self):
         '''Starts a new round (new piece)'''
         # Generate new bag with the pieces
         if len(self.bag) == 0:
-            self.bag = list(range(len(Tetris.TETROMINOS)))
-            random.shuffle(self.bag)
+            self.bag = self._new_bag()
         
         self.current_piece = self.next_piece
         self.next_piece = self.bag.pop()
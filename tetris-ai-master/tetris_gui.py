@@ -13,121 +13,49 @@ os.environ['TF_ENABLE_ONEDNN_OPTS'] = '1'  # Enable CPU optimizations
 
 import customtkinter as ctk
 import tkinter as tk
+import multiprocessing as mp
+import queue
 from tkinter import messagebox
 import threading
 import time
 import os
 import sys
-import glob
 import json
 import shutil
-import numpy as np
+import bisect
+import functools
 from datetime import datetime, timedelta
-from statistics import mean
-from collections import deque
+from collections import deque, namedtuple
 
-import matplotlib
-matplotlib.use("TkAgg")
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from matplotlib.ticker import FuncFormatter, FixedLocator
 
 # AI modules
 from tetris import Tetris
-from dqn_agent import DQNAgent
-
-# ─── DIRECTORIES (always relative to this script) ─────────────────────────────
-_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-MODELS_DIR = os.path.join(_SCRIPT_DIR, "models")
-STATE_FILE = os.path.join(MODELS_DIR, "_training_state.json")
-os.makedirs(MODELS_DIR, exist_ok=True)
-
-# ─── Color Palette ────────────────────────────────────────────────────────────
-C = {
-    "bg":           "#0a0a12",
-    "bg_grad":      "#0e0e1a",
-    "card":         "#14142a",
-    "card_hover":   "#191935",
-    "card_border":  "#28284a",
-    "card_border_h":"#3d3d6a",
-    "surface":      "#1c1c38",
-    "surface_hover":"#242450",
-    "primary":      "#6366f1",
-    "primary_hover":"#818cf8",
-    "primary_dim":  "#4f46e5",
-    "primary_glow": "#6366f140",
-    "accent":       "#22d3ee",
-    "accent_hover": "#67e8f9",
-    "accent_dim":   "#0891b2",
-    "text":         "#f0f0f8",
-    "text_sec":     "#a0a0c0",
-    "text_muted":   "#6a6a8a",
-    "text_dim":     "#45455a",
-    "green":        "#4ade80",
-    "green_hover":  "#86efac",
-    "green_dim":    "#166534",
-    "red":          "#f87171",
-    "red_hover":    "#fca5a5",
-    "red_dim":      "#991b1b",
-    "yellow":       "#facc15",
-    "yellow_dim":   "#854d0e",
-    "blue":         "#60a5fa",
-    "blue_dim":     "#1e3a5f",
-    "orange":       "#fb923c",
-    "purple":       "#c084fc",
-    "border":       "#2e2e50",
-    "border_light": "#3a3a5e",
-    "input_bg":     "#0f0f1e",
-    "input_border": "#2a2a48",
-    "input_focus":  "#6366f1",
-    "cell_empty":   "#121228",
-    "cell_border":  "#1a1a35",
-    "danger_bg":    "#2a1020",
-    "danger_hover": "#3d1525",
-}
-
-PIECE_COLORS = {
-    0: "#22d3ee",   # I
-    1: "#c084fc",   # T
-    2: "#fb923c",   # L
-    3: "#60a5fa",   # J
-    4: "#f87171",   # Z
-    5: "#4ade80",   # S
-    6: "#facc15",   # O
-}
-PIECE_SHAPES = {
-    0: [[0,0,0,0],[1,1,1,1],[0,0,0,0],[0,0,0,0]],
-    1: [[0,0,0,0],[0,1,0,0],[1,1,1,0],[0,0,0,0]],
-    2: [[0,0,0,0],[0,0,1,0],[1,1,1,0],[0,0,0,0]],
-    3: [[0,0,0,0],[1,0,0,0],[1,1,1,0],[0,0,0,0]],
-    4: [[0,0,0,0],[1,1,0,0],[0,1,1,0],[0,0,0,0]],
-    5: [[0,0,0,0],[0,1,1,0],[1,1,0,0],[0,0,0,0]],
-    6: [[0,0,0,0],[0,1,1,0],[0,1,1,0],[0,0,0,0]],
-}
-
+from game_record import GameReplay, find_game, load_game
+from palette import C, PIECE_COLORS, PIECE_SHAPES, blend, darken, lighten
+from inference_server import InferenceClient, parse_address
+from model_cache import VALUE_CACHE_SIZE, ModelCache, load_agent
+from value_net import NumpyValueNet
+from score_stats import ScoreStats
+from trainer import (MODELS_DIR, RECORDINGS_FILE, RETENTION, _SCRIPT_DIR,
+                     checkpoint_manifest, load_training_state, normalize_recent, run_training,
+                     save_training_state, training_process)
+from video_export import VIDEOS_DIR, start_export
+from weight_stream import WeightFollower
+
+# Optional shared inference server ("host:port" or socket path) and its
+# authkey, both printed by inference_server.py at startup
+INFERENCE_SERVER = os.environ.get("TETRIS_INFERENCE_SERVER")
+INFERENCE_AUTHKEY = os.environ.get("TETRIS_INFERENCE_AUTHKEY", "").encode() or None
+
+# Child processes are spawned, never forked: the UI process has TensorFlow
+# and loader threads running, and a forked copy of their locks can deadlock
+MP = mp.get_context("spawn")
+
+MODEL_CACHE_SIZE = 6  # Loaded checkpoints kept in memory for visualization
+LIVE_EPISODE = -2     # "Live" in the episode dropdown: follow the running trainer
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
-def darken(hex_color, factor=0.6):
-    h = hex_color.lstrip('#')
-    r, g, b = int(h[:2],16), int(h[2:4],16), int(h[4:6],16)
-    return f"#{int(r*factor):02x}{int(g*factor):02x}{int(b*factor):02x}"
-
-def lighten(hex_color, factor=0.3):
-    h = hex_color.lstrip('#')
-    r, g, b = int(h[:2],16), int(h[2:4],16), int(h[4:6],16)
-    r = min(255, int(r+(255-r)*factor))
-    g = min(255, int(g+(255-g)*factor))
-    b = min(255, int(b+(255-b)*factor))
-    return f"#{r:02x}{g:02x}{b:02x}"
-
-def blend(hex1, hex2, t=0.5):
-    h1, h2 = hex1.lstrip('#'), hex2.lstrip('#')
-    r = int(int(h1[:2],16)*(1-t) + int(h2[:2],16)*t)
-    g = int(int(h1[2:4],16)*(1-t) + int(h2[2:4],16)*t)
-    b = int(int(h1[4:6],16)*(1-t) + int(h2[4:6],16)*t)
-    return f"#{min(255,r):02x}{min(255,g):02x}{min(255,b):02x}"
-
 def fmt_time(secs):
     if secs < 0:
         return "--:--"
@@ -135,63 +63,340 @@ def fmt_time(secs):
     h, m = divmod(m, 60)
     return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
 
-def get_last_saved_episode():
-    """Get the last completed episode from state file, and the last saved model episode."""
-    # Check state file for the true last episode
-    state = load_training_state()
-    last_episode = state.get("last_episode", 0) if state else 0
-    
-    # Find the last saved model (which might be earlier than last_episode)
-    episodes = []
-    for f in glob.glob(os.path.join(MODELS_DIR, "episode_*.keras")):
-        try:
-            num = int(os.path.basename(f).replace("episode_", "").replace(".keras", ""))
-            if num == 1 or num % 50 == 0:
-                episodes.append(num)
-        except ValueError:
-            pass
-    last_saved_model = max(episodes) if episodes else 0
-    
-    # Return the true last episode (for resuming) and last saved model (for loading)
-    return last_episode, last_saved_model
 
-def load_training_state():
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, 'r') as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return None
+# ─── Visualization frames ────────────────────────────────────────────────────
+
+# Immutable snapshot of everything the visualization widgets show. Built on
+# the simulation thread, so the Tk thread never reads a board mid-update.
+VisFrame = namedtuple("VisFrame", "board next_piece label score high pieces "
+                                  "episode pps replay_pos replay_total")
+
+def make_vis_frame(env, label, high, pieces, episode, pps=0,
+                   replay_pos=None, replay_total=None):
+    board = tuple(tuple(row) for row in env._get_complete_board())
+    return VisFrame(board, env.next_piece, label, env.get_game_score(), high,
+                    pieces, episode, pps, replay_pos, replay_total)
+
+class FrameSlot:
+    """Single-slot, latest-wins handoff from a worker thread to the Tk thread.
+
+    Publishing overwrites any frame the UI has not consumed yet, so a fast
+    simulation can never flood the Tk event queue.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+
+    def publish(self, frame):
+        with self._lock:
+            self._frame = frame
+
+    def take(self):
+        with self._lock:
+            frame, self._frame = self._frame, None
+        return frame
+
+
+# ─── Animation Clock ─────────────────────────────────────────────────────────
+
+class FrameClock:
+    """One shared tick for every animation and deferred widget update.
+
+    Animations register a callback that is called with the current time on
+    every tick (or every `interval` seconds) until it returns False. Deferred
+    updates run once on the next tick; deferring again under the same key
+    replaces the pending update, so bursts of hover or motion events cost one
+    redraw per frame. The clock only schedules a tick while there is work,
+    and stops entirely while the window is minimized.
+    """
+    REPORT_SECS = 1.0
+
+    def __init__(self, interval_ms=33):
+        self.interval_ms = interval_ms
+        self.root = None
+        self.on_report = None  # Called with stats() about once a second while ticking
+        self.on_wake = None    # Called when the clock starts ticking after being idle
+        self._animations = {}  # key -> [callback, interval, next due]
+        self._deferred = {}    # key -> callable
+        self._job = None
+        self._suspended = False
+        self._reset_stats()
+
+    def attach(self, root):
+        """Start ticking on `root`; work registered earlier is picked up now."""
+        self.root = root
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<Map>", self._on_map, add="+")
+        self._schedule()
+
+    def animate(self, key, callback, interval=None):
+        """Call `callback(now)` every tick (or every `interval` s) until it returns False."""
+        self._animations[key] = [callback, interval, 0.0]
+        self._schedule()
+
+    def stop(self, key):
+        self._animations.pop(key, None)
+
+    def defer(self, key, fn):
+        """Run `fn()` on the next tick, replacing any update pending under `key`."""
+        self._deferred[key] = fn
+        self._schedule()
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self._window_start, 1e-9)
+        ticks = self._ticks
+        return dict(fps=ticks / elapsed,
+                    avg_ms=self._busy / ticks * 1000 if ticks else 0.0,
+                    max_ms=self._max * 1000,
+                    load=self._busy / elapsed,
+                    animations=len(self._animations),
+                    idle=self._job is None)
+
+    def _reset_stats(self):
+        self._window_start = time.perf_counter()
+        self._ticks = 0
+        self._busy = 0.0
+        self._max = 0.0
+
+    @property
+    def idle(self):
+        return self._job is None
+
+    def _schedule(self):
+        if self._job is None and self.root is not None and not self._suspended \
+                and (self._animations or self._deferred):
+            self._job = self.root.after(self.interval_ms, self._tick)
+            if self.on_wake is not None:
+                self.on_wake()
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self._suspended = True
+            if self._job is not None:
+                self.root.after_cancel(self._job)
+                self._job = None
+            self._report()
+
+    def _on_map(self, event):
+        if event.widget is self.root and self._suspended:
+            self._suspended = False
+            self._schedule()
+
+    def _tick(self):
+        self._job = None
+        start = time.perf_counter()
+        deferred, self._deferred = self._deferred, {}
+        for fn in deferred.values():
+            try:
+                fn()
+            except Exception as e:
+                print(f"[ERROR] Deferred UI update failed: {e}")
+        now = time.monotonic()
+        for key, entry in list(self._animations.items()):
+            callback, interval, due = entry
+            if now < due:
+                continue
+            try:
+                keep = callback(now)
+            except Exception as e:
+                print(f"[ERROR] Animation {key!r} failed: {e}")
+                keep = False
+            if keep is False:
+                if self._animations.get(key) is entry:
+                    del self._animations[key]
+            elif interval:
+                entry[2] = now + interval
+        cost = time.perf_counter() - start
+        self._ticks += 1
+        self._busy += cost
+        self._max = max(self._max, cost)
+        self._schedule()
+        if self._job is None or start - self._window_start >= self.REPORT_SECS:
+            self._report()
+
+    def _report(self):
+        if self.on_report is not None:
+            self.on_report(self.stats())
+        self._reset_stats()
+
+
+# Shared by every widget; TetrisAIApp attaches it to the root window
+CLOCK = FrameClock()
+
+
+# ─── Event Loop Monitor ──────────────────────────────────────────────────────
+
+class UiMonitor:
+    """Watchdog for the Tk event loop.
+
+    A heartbeat timer measures how late the loop runs its callbacks (lag).
+    Work that worker threads hand to the Tk thread goes through post(), which
+    counts callbacks that are queued but not yet run, and selected widget
+    methods are wrapped by instrument() so each call is timed. About once a
+    second the worst lag, the queue lengths and the slowest handlers are
+    passed to `on_report`, and the handlers slower than SLOW_MS in that
+    window are logged in one line.
+
+    Like the frame clock, the heartbeat only runs while the UI is busy: it
+    stops while the window is minimized, and when `clock` is idle and no
+    handler ran during the last beat. Clock ticks, posted callbacks and
+    instrumented handlers start it again.
+    """
+    INTERVAL_MS = 250   # Heartbeat period
+    REPORT_SECS = 1.0
+    SLOW_MS = 50        # Handlers (and lag) beyond this are logged
+
+    def __init__(self, root, on_report=None, clock=None):
+        self.root = root
+        self.on_report = on_report
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._posted = 0           # post() callbacks not yet run
+        self._handlers = {}        # name -> [calls, total s, max s, slow calls] in this window
+        self._lags = []
+        self._expected = None
+        self._job = None
+        self._hidden = False
+        self._active = False       # A handler ran since the last beat
+        self._window_start = time.perf_counter()
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<Map>", self._on_map, add="+")
+        if clock is not None:
+            clock.on_wake = self.wake
+        self.wake()
+
+    def wake(self):
+        """Start the heartbeat if it is paused (Tk thread only)."""
+        if self._job is None and not self._hidden:
+            self._expected = time.perf_counter() + self.INTERVAL_MS / 1000
+            self._job = self.root.after(self.INTERVAL_MS, self._beat)
+
+    def post(self, fn, *args):
+        """Thread-safe after(0, fn, *args) that is counted while queued and timed when run."""
+        name = getattr(fn, "__qualname__", None) or repr(fn)
+        with self._lock:
+            self._posted += 1
+
+        def run():
+            with self._lock:
+                self._posted -= 1
+            if getattr(fn, "_ui_timed", False):
+                fn(*args)  # Already timed under its instrument() name
+            else:
+                self.call(name, fn, *args)
+        self.root.after(0, run)
 
-def save_training_state(state_dict):
-    try:
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state_dict, f)
-    except Exception:
-        pass
+    def call(self, name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def instrument(self, obj, method, name=None):
+        """Time every call of `obj.method` (replaces it on the instance)."""
+        fn = getattr(obj, method)
+        label = name or f"{type(obj).__name__}.{method}"
+
+        @functools.wraps(fn)
+        def timed(*args, **kw):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kw)
+            finally:
+                self.record(label, time.perf_counter() - start)
+        timed._ui_timed = True
+        setattr(obj, method, timed)
+
+    def record(self, name, secs):
+        h = self._handlers.setdefault(name, [0, 0.0, 0.0, 0])
+        h[0] += 1
+        h[1] += secs
+        h[2] = max(h[2], secs)
+        if secs * 1000 >= self.SLOW_MS:
+            h[3] += 1
+        self._active = True
+        self.wake()
+
+    def pending(self):
+        """(callbacks posted from threads and not yet run, all scheduled Tk timers)"""
+        try:
+            scheduled = len(self.root.tk.splitlist(self.root.tk.call("after", "info")))
+        except tk.TclError:
+            scheduled = 0
+        with self._lock:
+            return self._posted, scheduled
+
+    def stats(self):
+        posted, scheduled = self.pending()
+        lags = self._lags or [0.0]
+        slowest = sorted(self._handlers.items(), key=lambda kv: kv[1][2], reverse=True)
+        return dict(lag_ms=max(lags) * 1000, lag_avg_ms=sum(lags) / len(lags) * 1000,
+                    posted=posted, scheduled=scheduled, idle=self._job is None,
+                    handlers=[dict(name=n, calls=c, total_ms=t * 1000, max_ms=m * 1000, slow=k)
+                              for n, (c, t, m, k) in slowest[:5]])
+
+    def _beat(self):
+        self._job = None
+        now = time.perf_counter()
+        if self._expected is not None:
+            self._lags.append(max(0.0, now - self._expected))
+        busy = self._active or self._posted or (self.clock is not None and not self.clock.idle)
+        self._active = False
+        if busy or self.clock is None:
+            self.wake()
+        if self._job is None or now - self._window_start >= self.REPORT_SECS:
+            self._report()
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self._hidden = True
+            if self._job is not None:
+                self.root.after_cancel(self._job)
+                self._job = None
+            self._report()
+
+    def _on_map(self, event):
+        if event.widget is self.root and self._hidden:
+            self._hidden = False
+            self.wake()
+
+    def _report(self):
+        stats = self.stats()
+        slow = [f"{n} {c}x (max {m * 1000:.0f} ms)" for n, (c, _, m, k) in
+                sorted(self._handlers.items(), key=lambda kv: kv[1][2], reverse=True) if k]
+        if stats["lag_ms"] >= self.SLOW_MS:
+            print(f"[WARN] UI event loop lagged {stats['lag_ms']:.0f} ms "
+                  f"({stats['posted']} posted callbacks waiting)")
+        if slow:
+            print(f"[WARN] Slow UI handlers: {', '.join(slow[:5])}")
+        if self.on_report is not None:
+            self.on_report(stats)
+        self._lags = []
+        self._handlers = {}
+        self._window_start = time.perf_counter()
 
 
 # ─── Hover / Focus helpers ───────────────────────────────────────────────────
 
 def add_hover(widget, normal_fg, hover_fg, normal_border=None, hover_border=None):
-    """Bind smooth hover effect to a CTkFrame-based widget."""
-    def _enter(e):
-        try:
-            widget.configure(fg_color=hover_fg)
-            if hover_border:
-                widget.configure(border_color=hover_border)
-        except Exception:
-            pass
-    def _leave(e):
+    """Bind smooth hover effect to a CTkFrame-based widget.
+
+    Enter/Leave events (which fire for every child the pointer crosses) are
+    coalesced on the frame clock, so only the final style is applied.
+    """
+    def _apply(fg, border):
         try:
-            widget.configure(fg_color=normal_fg)
-            if normal_border:
-                widget.configure(border_color=normal_border)
+            if border:
+                widget.configure(fg_color=fg, border_color=border)
+            else:
+                widget.configure(fg_color=fg)
         except Exception:
             pass
-    widget.bind("<Enter>", _enter)
-    widget.bind("<Leave>", _leave)
+    widget.bind("<Enter>", lambda e: CLOCK.defer((widget, "hover"),
+                                                 lambda: _apply(hover_fg, hover_border)))
+    widget.bind("<Leave>", lambda e: CLOCK.defer((widget, "hover"),
+                                                 lambda: _apply(normal_fg, normal_border)))
 
 def add_entry_focus(entry, normal_border=None, focus_border=None):
     """Bind focus glow to a CTkEntry."""
@@ -259,33 +464,42 @@ class PulsingDot(ctk.CTkFrame):
         self._on = color_on
         self._off = color_off
         self._active = False
-        self._phase = 0
+        self._phase = None
+
+    PERIOD = 1.6   # Seconds per pulse
+    STEPS = 20     # Distinct shades per pulse
 
     def set_active(self, active, color=None):
+        was_active = self._active
         self._active = active
         if color:
             self._on = color
+            self._phase = None  # Repaint with the new color on the next tick
         if not active:
+            CLOCK.stop(self)
             self.configure(fg_color=self._off)
-        else:
-            self._pulse()
+        elif not was_active:
+            CLOCK.animate(self, self._pulse)
 
-    def _pulse(self):
+    def _pulse(self, now):
         if not self._active:
-            return
+            return False
         try:
             if not self.winfo_exists():
-                return
+                return False
         except Exception:
-            return
-        self._phase = (self._phase + 1) % 20
-        t = abs(self._phase - 10) / 10.0
+            return False
+        phase = int(now / self.PERIOD * self.STEPS) % self.STEPS
+        if phase == self._phase:
+            return True  # Same shade as last tick; skip the configure
+        self._phase = phase
+        t = abs(phase - self.STEPS // 2) / (self.STEPS // 2)
         col = blend(self._on, lighten(self._on, 0.4), t)
         try:
             self.configure(fg_color=col)
         except Exception:
-            return
-        self.after(80, self._pulse)
+            return False
+        return True
 
 
 # ─── Section Title ────────────────────────────────────────────────────────────
@@ -324,6 +538,15 @@ class Header(ctk.CTkFrame):
                      text_color=C["yellow"]).pack(side="left", padx=(6, 0))
         ctk.CTkLabel(title_frame, text="Neural Network Training Visualization",
                      font=("Inter", 16), text_color=C["text_muted"]).pack(anchor="w", pady=(2, 0))
+        self.engine_lbl = ctk.CTkLabel(title_frame, text="\u23f3 Warming up TensorFlow\u2026",
+                                       font=("Inter", 13), text_color=C["yellow"])
+        self.engine_lbl.pack(anchor="w")
+        self.clock_lbl = ctk.CTkLabel(title_frame, text="UI clock idle",
+                                      font=("JetBrains Mono", 11), text_color=C["text_dim"])
+        self.clock_lbl.pack(anchor="w")
+        self.lag_lbl = ctk.CTkLabel(title_frame, text="",
+                                    font=("JetBrains Mono", 11), text_color=C["text_dim"])
+        self.lag_lbl.pack(anchor="w")
 
         # Stats card
         stats = GlassCard(self)
@@ -347,11 +570,44 @@ class Header(ctk.CTkFrame):
         ctk.CTkFrame(inner, fg_color=C["border"], width=1, height=36).pack(side="left", padx=6)
         self.saved_lbl = _stat_col(inner, "SAVED", "0", C["green"])
 
+    def set_engine_state(self, text, color):
+        self.engine_lbl.configure(text=text, text_color=color)
+
+    def set_clock_stats(self, stats):
+        """Show the frame clock's own cost (FrameClock.stats)."""
+        if stats["idle"]:
+            text = "UI clock idle"
+        else:
+            text = (f"UI {stats['fps']:.0f} fps \u00b7 {stats['avg_ms']:.1f} ms/frame "
+                    f"(max {stats['max_ms']:.1f}, {stats['load']:.0%} busy)")
+        try:
+            self.clock_lbl.configure(text=text)
+        except Exception:
+            pass
+
+    def set_latency(self, stats):
+        """Show event-loop lag and queued callbacks (UiMonitor.stats)."""
+        lag = stats["lag_ms"]
+        color = C["green"] if lag < UiMonitor.SLOW_MS else C["yellow"] if lag < 200 else C["red"]
+        text = f"\u25cf UI lag {lag:.0f} ms \u00b7 {stats['posted']} queued"
+        if stats["idle"] and not stats["handlers"]:
+            text = "\u25cf UI idle"
+        if stats["handlers"] and stats["handlers"][0]["max_ms"] >= UiMonitor.SLOW_MS:
+            h = stats["handlers"][0]
+            text += f" \u00b7 slowest {h['name']} {h['max_ms']:.0f} ms"
+        try:
+            self.lag_lbl.configure(text=text, text_color=color)
+        except Exception:
+            pass
+
     def update_stats(self, best_score, episodes, saved=None):
         self.best_lbl.configure(text=f"{best_score:,}")
         self.ep_lbl.configure(text=f"{episodes:,}")
         if saved is not None:
-            self.saved_lbl.configure(text=f"{saved:,}")
+            self.set_saved(saved)
+
+    def set_saved(self, saved):
+        self.saved_lbl.configure(text=f"{saved:,}")
 
 
 # ─── Control Panel ────────────────────────────────────────────────────────────
@@ -366,7 +622,14 @@ class ControlPanel(GlassCard):
         "mem_size": "1000",
         "epochs": "1",
         "train_every": "1",
-        "max_score": "0"
+        "max_score": "0",
+        "record_every": "0",
+        "pool_percent": "0",
+        "train_every_steps": "0",
+        "replay_ratio": "8",
+        "follow_every": "5",
+        # Checkpoint retention policy
+        **{k: str(v) for k, v in RETENTION.items()}
     }
 
     def __init__(self, master, app):
@@ -413,6 +676,33 @@ class ControlPanel(GlassCard):
         self._epoch_entry = self._param(pf, "Epochs:",   saved_params.get("epochs", self.DEFAULTS["epochs"]),    1, 2)
         self._tevery_entry= self._param(pf, "Train Every:",        saved_params.get("train_every", self.DEFAULTS["train_every"]),    2, 2)
         self._limit_entry = self._param(pf, "Max Score:",    saved_params.get("max_score", self.DEFAULTS["max_score"]),    3, 2)
+        self._record_entry= self._param(pf, "Record Every:",  saved_params.get("record_every", self.DEFAULTS["record_every"]), 4, 0)
+        self._pool_entry  = self._param(pf, "Pool Start %:",  saved_params.get("pool_percent", self.DEFAULTS["pool_percent"]), 4, 2)
+        self._steps_entry = self._param(pf, "Train Every Steps:", saved_params.get("train_every_steps", self.DEFAULTS["train_every_steps"]), 5, 0)
+        self._ratio_entry = self._param(pf, "Replay Ratio:",  saved_params.get("replay_ratio", self.DEFAULTS["replay_ratio"]), 5, 2)
+        self._follow_entry= self._param(pf, "Live Every:",    saved_params.get("follow_every", self.DEFAULTS["follow_every"]), 6, 0)
+        self._klast_entry = self._param(pf, "Keep Last:",     saved_params.get("keep_last", self.DEFAULTS["keep_last"]), 6, 2)
+        self._kevery_entry= self._param(pf, "Keep Every:",    saved_params.get("keep_every", self.DEFAULTS["keep_every"]), 7, 0)
+        self._kbest_entry = self._param(pf, "Keep Best:",     saved_params.get("keep_best", self.DEFAULTS["keep_best"]), 7, 2)
+        self.process_switch = ctk.CTkSwitch(
+            inner, text="Train in separate process",
+            font=("Inter", 14), text_color=C["text_muted"],
+            fg_color=C["surface"], progress_color=C["primary"],
+            button_color=C["primary_hover"], button_hover_color=C["accent"]
+        )
+        if saved_params.get("train_in_process", True):
+            self.process_switch.select()
+        self.process_switch.pack(anchor="w", pady=(0, 8))
+        # Copies every transition to datasets/training for offline pretraining
+        self.export_switch = ctk.CTkSwitch(
+            inner, text="Export transitions to datasets/training",
+            font=("Inter", 14), text_color=C["text_muted"],
+            fg_color=C["surface"], progress_color=C["primary"],
+            button_color=C["primary_hover"], button_hover_color=C["accent"]
+        )
+        if saved_params.get("export_transitions", False):
+            self.export_switch.select()
+        self.export_switch.pack(anchor="w", pady=(0, 14))
 
 
         # ── Visualization ──
@@ -435,14 +725,18 @@ class ControlPanel(GlassCard):
         ep_frame.pack(fill="x", pady=(0, 8))
         ctk.CTkLabel(ep_frame, text="Episode #", font=("Inter", 16),
                      text_color=C["text_muted"]).pack(side="left")
-        self.vis_entry = ctk.CTkEntry(
-            ep_frame, font=("JetBrains Mono", 16), width=90,
+        # Lists the checkpoints in the manifest; any number can still be typed
+        self.vis_entry = ctk.CTkComboBox(
+            ep_frame, font=("JetBrains Mono", 16), width=90, values=["Best"],
             fg_color=C["input_bg"], border_color=C["input_border"],
-            text_color=C["text"], height=36, corner_radius=10,
-            placeholder_text="e.g. 50", justify="center"
+            button_color=C["input_border"], button_hover_color=C["primary"],
+            dropdown_fg_color=C["card"], dropdown_text_color=C["text"],
+            dropdown_font=("JetBrains Mono", 14),
+            text_color=C["text"], height=36, corner_radius=10, justify="center",
+            command=lambda choice: app.preview_checkpoint(choice)
         )
+        self.vis_entry.set("")
         self.vis_entry.pack(side="left", padx=(8, 0), fill="x", expand=True)
-        add_entry_focus(self.vis_entry)
 
         self.vis_btn = ctk.CTkButton(
             inner, text="\U0001f441  Visualize Episode", font=("Inter", 16, "bold"),
@@ -451,14 +745,50 @@ class ControlPanel(GlassCard):
             border_width=2, border_color=C["accent_dim"],
             command=lambda: app.toggle_visualization()
         )
-        self.vis_btn.pack(fill="x", pady=(0, 14))
+        self.vis_btn.pack(fill="x", pady=(0, 8))
         add_btn_press(self.vis_btn, "transparent", C["surface"])
 
+        self.replay_btn = ctk.CTkButton(
+            inner, text="\u23ee  Replay Recorded Game", font=("Inter", 16, "bold"),
+            fg_color="transparent", hover_color=C["surface_hover"],
+            text_color=C["purple"], height=50, corner_radius=14,
+            border_width=2, border_color=C["accent_dim"],
+            command=lambda: app.toggle_replay()
+        )
+        self.replay_btn.pack(fill="x", pady=(0, 8))
+        add_btn_press(self.replay_btn, "transparent", C["surface"])
+
+        self.export_btn = ctk.CTkButton(
+            inner, text="\U0001f3ac  Export Game Video", font=("Inter", 14, "bold"),
+            fg_color="transparent", hover_color=C["surface_hover"],
+            text_color=C["text_sec"], height=40, corner_radius=14,
+            border_width=1, border_color=C["border_light"],
+            command=lambda: app.export_video()
+        )
+        self.export_btn.pack(fill="x", pady=(0, 8))
+        add_btn_press(self.export_btn, "transparent", C["surface"])
+
+        seek_frame = ctk.CTkFrame(inner, fg_color="transparent")
+        seek_frame.pack(fill="x", pady=(0, 14))
+        self.seek_label = ctk.CTkLabel(seek_frame, text="Piece 0 / 0",
+                     font=("JetBrains Mono", 14), text_color=C["text_muted"])
+        self.seek_label.pack(side="right")
+        self.seek_slider = ctk.CTkSlider(
+            seek_frame, from_=0, to=1, number_of_steps=1,
+            fg_color=C["surface"], progress_color=C["purple"],
+            button_color=C["purple"], button_hover_color=C["accent"],
+            height=16, corner_radius=8,
+            command=lambda v: app.seek_replay(int(v))
+        )
+        self.seek_slider.set(0)
+        self.seek_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.seek_slider.configure(state="disabled")
+
         # ── Speed Control ──
         ctk.CTkFrame(inner, fg_color=C["border"], height=1).pack(fill="x", pady=(0, 14))
         SectionLabel(inner, "PLAYBACK SPEED").pack(fill="x", pady=(0, 6))
         speed_frame = ctk.CTkFrame(inner, fg_color="transparent")
-        speed_frame.pack(fill="x", pady=(0, 14))
+        speed_frame.pack(fill="x", pady=(0, 8))
         self.speed_label = ctk.CTkLabel(speed_frame, text="1.0x",
                      font=("JetBrains Mono", 16, "bold"), text_color=C["accent"])
         self.speed_label.pack(side="right")
@@ -471,6 +801,13 @@ class ControlPanel(GlassCard):
         )
         self.speed_slider.set(1.0)
         self.speed_slider.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.turbo_switch = ctk.CTkSwitch(
+            inner, text="Turbo (full engine speed, latest frame only)",
+            font=("Inter", 14), text_color=C["text_muted"],
+            fg_color=C["surface"], progress_color=C["primary"],
+            button_color=C["primary_hover"], button_hover_color=C["accent"]
+        )
+        self.turbo_switch.pack(anchor="w", pady=(0, 14))
 
         # ── Reset Button ──
         ctk.CTkFrame(inner, fg_color=C["border"], height=1).pack(fill="x", pady=(0, 14))
@@ -506,6 +843,14 @@ class ControlPanel(GlassCard):
     def speed(self):
         return self.speed_slider.get()
 
+    @property
+    def turbo(self):
+        return bool(self.turbo_switch.get())
+
+    @property
+    def train_in_process(self):
+        return bool(self.process_switch.get())
+
     def get_params(self):
         try:
             return dict(
@@ -517,6 +862,15 @@ class ControlPanel(GlassCard):
                 epochs=int(self._epoch_entry.get()),
                 train_every=int(self._tevery_entry.get()),
                 piece_limit=int(self._limit_entry.get()),
+                record_every=int(self._record_entry.get()),
+                pool_percent=float(self._pool_entry.get()),
+                train_every_steps=int(self._steps_entry.get()),
+                replay_ratio=float(self._ratio_entry.get()),
+                follow_every=int(self._follow_entry.get()),
+                keep_last=int(self._klast_entry.get()),
+                keep_every=int(self._kevery_entry.get()),
+                keep_best=int(self._kbest_entry.get()),
+                export_transitions=bool(self.export_switch.get()),
             )
         except ValueError:
             return None
@@ -532,7 +886,17 @@ class ControlPanel(GlassCard):
             "mem_size": self._mem_entry.get(),
             "epochs": self._epoch_entry.get(),
             "train_every": self._tevery_entry.get(),
-            "max_score": self._limit_entry.get()
+            "max_score": self._limit_entry.get(),
+            "record_every": self._record_entry.get(),
+            "pool_percent": self._pool_entry.get(),
+            "train_every_steps": self._steps_entry.get(),
+            "replay_ratio": self._ratio_entry.get(),
+            "follow_every": self._follow_entry.get(),
+            "keep_last": self._klast_entry.get(),
+            "keep_every": self._kevery_entry.get(),
+            "keep_best": self._kbest_entry.get(),
+            "train_in_process": self.train_in_process,
+            "export_transitions": bool(self.export_switch.get())
         }
         save_training_state(saved_state)
 
@@ -554,28 +918,53 @@ class ControlPanel(GlassCard):
         self._tevery_entry.insert(0, self.DEFAULTS["train_every"])
         self._limit_entry.delete(0, "end")
         self._limit_entry.insert(0, self.DEFAULTS["max_score"])
+        self._record_entry.delete(0, "end")
+        self._record_entry.insert(0, self.DEFAULTS["record_every"])
+        self._pool_entry.delete(0, "end")
+        self._pool_entry.insert(0, self.DEFAULTS["pool_percent"])
+        self._steps_entry.delete(0, "end")
+        self._steps_entry.insert(0, self.DEFAULTS["train_every_steps"])
+        self._ratio_entry.delete(0, "end")
+        self._ratio_entry.insert(0, self.DEFAULTS["replay_ratio"])
+        self._follow_entry.delete(0, "end")
+        self._follow_entry.insert(0, self.DEFAULTS["follow_every"])
+        self._klast_entry.delete(0, "end")
+        self._klast_entry.insert(0, self.DEFAULTS["keep_last"])
+        self._kevery_entry.delete(0, "end")
+        self._kevery_entry.insert(0, self.DEFAULTS["keep_every"])
+        self._kbest_entry.delete(0, "end")
+        self._kbest_entry.insert(0, self.DEFAULTS["keep_best"])
+        self.process_switch.select()
+        self.export_switch.deselect()
 
     def _set_params_enabled(self, enabled):
         state = "normal" if enabled else "disabled"
         for e in [self._ep_entry, self._batch_entry, self._eps_entry,
                   self._disc_entry, self._mem_entry, self._epoch_entry,
-                  self._tevery_entry, self._limit_entry]:
+                  self._tevery_entry, self._limit_entry, self._record_entry,
+                  self._pool_entry, self._steps_entry, self._ratio_entry,
+                  self._follow_entry, self._klast_entry, self._kevery_entry,
+                  self._kbest_entry, self.process_switch, self.export_switch]:
             e.configure(state=state)
 
     def set_learning(self, active, episode=0):
         if active:
-            self.train_btn.configure(text="\u25a0  Stop Learning",
+            self.train_btn.configure(text="\u25a0  Stop Learning", state="normal",
                 fg_color=C["red"], hover_color=C["red_hover"])
             add_btn_press(self.train_btn, C["red"], C["red_dim"])
             self._set_params_enabled(False)
             self.reset_btn.configure(state="disabled")
         else:
-            self.train_btn.configure(text="\u25b6  Start Learning",
+            self.train_btn.configure(text="\u25b6  Start Learning", state="normal",
                 fg_color=C["primary"], hover_color=C["primary_hover"])
             add_btn_press(self.train_btn, C["primary"], C["primary_dim"])
             self._set_params_enabled(True)
             self.reset_btn.configure(state="normal")
 
+    def set_stopping(self):
+        """Stop requested: nothing can be restarted until the old run has exited."""
+        self.train_btn.configure(text="\u25a0  Stopping\u2026", state="disabled")
+
     def set_visualizing(self, active, ep_num=0):
         if active:
             self.vis_btn.configure(text="\u25a0  Stop Visualization",
@@ -583,12 +972,15 @@ class ControlPanel(GlassCard):
                 text_color="white", border_color=C["red"])
             add_btn_press(self.vis_btn, C["red"], C["red_dim"])
             self.pause_toggle_btn.configure(state="normal", text="⏸  Pause Visualization", text_color=C["yellow"])
+            self.replay_btn.configure(state="disabled")
         else:
             self.vis_btn.configure(text="\U0001f441  Visualize Episode",
                 fg_color="transparent", hover_color=C["surface_hover"],
                 text_color=C["accent"], border_color=C["accent_dim"])
             add_btn_press(self.vis_btn, "transparent", C["surface"])
             self.pause_toggle_btn.configure(state="disabled", text="⏸  Pause Visualization", text_color=C["yellow"])
+            self.replay_btn.configure(state="normal")
+            self.seek_slider.configure(state="disabled")
 
     def set_paused(self, paused):
         if paused:
@@ -596,10 +988,28 @@ class ControlPanel(GlassCard):
         else:
             self.pause_toggle_btn.configure(text="⏸  Pause Visualization", text_color=C["yellow"])
 
+    def set_replay_range(self, total):
+        """Enable the seek slider for a replay of `total` pieces."""
+        self.seek_slider.configure(from_=0, to=max(total, 1),
+                                   number_of_steps=max(total, 1), state="normal")
+        self.set_replay_position(0, total)
+
+    def set_replay_position(self, index, total):
+        self.seek_slider.set(index)
+        self.seek_label.configure(text=f"Piece {index:,} / {total:,}")
+
+    def set_checkpoints(self, episodes):
+        """Offer the saved checkpoints (newest first) in the episode dropdown."""
+        self.vis_entry.configure(values=["Live", "Best"] + [str(ep) for ep in reversed(episodes)])
+
     def get_vis_episode(self):
         txt = self.vis_entry.get().strip()
         if not txt:
             return None
+        if txt.lower() == "best":
+            return -1
+        if txt.lower() == "live":
+            return LIVE_EPISODE
         try:
             return int(txt)
         except ValueError:
@@ -638,6 +1048,9 @@ class TrainingStatusPanel(GlassCard):
         self._sub = ctk.CTkLabel(info, text="",
                      font=("Inter", 14), text_color=C["text_muted"])
         self._sub.pack(anchor="w")
+        self._dist = ctk.CTkLabel(info, text="", justify="left",
+                     font=("JetBrains Mono", 12), text_color=C["text_muted"])
+        self._dist.pack(anchor="w")
 
         self.progress = ctk.CTkProgressBar(inner, height=6, corner_radius=3,
                      fg_color=C["surface"], progress_color=C["primary"])
@@ -680,10 +1093,23 @@ class TrainingStatusPanel(GlassCard):
             self._elapsed.configure(text="")
             self._eta.configure(text="")
 
+    def set_distribution(self, dist):
+        """Show recent score and game-length quantiles (ScoreStats.summary)."""
+        if not dist or dist["score"]["p50"] is None:
+            self._dist.configure(text="")
+            return
+        sc, st = dist["score"], dist["steps"]
+        self._dist.configure(text=(
+            f"Score p10/50/90/99: {sc['p10']:,.0f} / {sc['p50']:,.0f} / "
+            f"{sc['p90']:,.0f} / {sc['p99']:,.0f}\n"
+            f"EW score {sc['mean']:,.0f} \u00b1 {sc['std']:,.0f}  |  "
+            f"Pieces p50 {st['p50']:,.0f}, p90 {st['p90']:,.0f}"))
+
     def reset(self):
         self._main.configure(text="No training started",
                                  text_color=C["text_muted"])
         self._sub.configure(text="Avg (last 50): 0")
+        self._dist.configure(text="")
         self.progress.set(0)
 
 
@@ -715,83 +1141,113 @@ class TetrisBoardWidget(GlassCard):
         self.canvas = tk.Canvas(inner, width=cw, height=ch,
                                 bg=C["card"], highlightthickness=0, bd=0)
         self.canvas.pack()
+        self._create_items()
         self._draw_idle()
 
-    def _draw_idle(self):
-        """Draw the idle state: empty grid with a subtle 'waiting' message."""
-        self.canvas.delete("all")
+    def _create_items(self):
+        """Create every canvas item once; frames only reconfigure them.
+
+        Cell bodies are created first and the decorations (glow outline and
+        bevel lines) afterwards, so a block's glow is never covered by the
+        body of its neighbour.
+        """
+        color = C["primary"]
+        self._block_style = dict(fill=color, outline=darken(color, 0.55))
+        self._empty_style = dict(fill=C["cell_empty"], outline=C["cell_border"])
+        glow = lighten(color, 0.2)
+        lt = lighten(color, 0.35)
+        mid = lighten(color, 0.1)
+        dk = darken(color, 0.55)
+
+        self._bodies = []
+        self._decor = []
+        for r in range(self.ROWS):
+            for c in range(self.COLS):
+                x1 = self.GAP + c * (self.CELL + self.GAP)
+                y1 = self.GAP + r * (self.CELL + self.GAP)
+                x2, y2 = x1 + self.CELL, y1 + self.CELL
+                self._bodies.append(self.canvas.create_rectangle(
+                    x1, y1, x2, y2, width=1, **self._empty_style))
         for r in range(self.ROWS):
             for c in range(self.COLS):
                 x1 = self.GAP + c * (self.CELL + self.GAP)
                 y1 = self.GAP + r * (self.CELL + self.GAP)
                 x2, y2 = x1 + self.CELL, y1 + self.CELL
-                self.canvas.create_rectangle(x1, y1, x2, y2,
-                    fill=C["cell_empty"], outline=C["cell_border"], width=1)
+                self._decor.append((
+                    self.canvas.create_rectangle(x1-1, y1-1, x2+1, y2+1,
+                        fill="", outline=glow, width=1, state="hidden"),
+                    self.canvas.create_line(x1+2, y1+2, x2-2, y1+2,
+                        fill=lt, width=2, state="hidden"),
+                    self.canvas.create_line(x1+2, y1+2, x1+2, y2-2,
+                        fill=mid, width=1, state="hidden"),
+                    self.canvas.create_line(x1+2, y2-2, x2-2, y2-2,
+                        fill=dk, width=1, state="hidden"),
+                ))
+        # Whether each cell (flat, row-major) is currently drawn as a block
+        self._shown = [False] * (self.ROWS * self.COLS)
 
         # Center message
         cx = (self.COLS * (self.CELL + self.GAP) + self.GAP) // 2
         cy = (self.ROWS * (self.CELL + self.GAP) + self.GAP) // 2
-        self.canvas.create_text(cx, cy - 14,
-            text="No Visualization Active",
-            fill=C["text_dim"], font=("Inter", 16, "bold"), anchor="center")
-        self.canvas.create_text(cx, cy + 12,
-            text="Enter an episode # and click Visualize",
-            fill=C["text_dim"], font=("Inter", 12), anchor="center")
+        self._idle_items = (
+            self.canvas.create_text(cx, cy - 14,
+                text="No Visualization Active",
+                fill=C["text_dim"], font=("Inter", 16, "bold"), anchor="center"),
+            self.canvas.create_text(cx, cy + 12,
+                text="Enter an episode # and click Visualize",
+                fill=C["text_dim"], font=("Inter", 12), anchor="center"),
+        )
+
+    def _set_cell(self, i, filled):
+        """Switch a single cell between empty and block styling."""
+        style = self._block_style if filled else self._empty_style
+        self.canvas.itemconfigure(self._bodies[i], **style)
+        state = "normal" if filled else "hidden"
+        for item in self._decor[i]:
+            self.canvas.itemconfigure(item, state=state)
+        self._shown[i] = filled
+
+    def _draw_idle(self):
+        """Draw the idle state: empty grid with a subtle 'waiting' message."""
+        for i, filled in enumerate(self._shown):
+            if filled:
+                self._set_cell(i, False)
+        for item in self._idle_items:
+            self.canvas.itemconfigure(item, state="normal")
+            self.canvas.tag_raise(item)
 
     def _draw_board(self, board, piece_id=None):
-        # Optimized rendering: only redraw when board state changes
-        # Store placed blocks (blue blocks) and only render those
+        # Diff against the previous frame and only touch cells that changed;
+        # only placed blocks (MAP_BLOCK) are rendered, in the primary colour
         try:
-            self.canvas.delete("all")
-            
             # Validate board dimensions
             if board and (len(board) != self.ROWS or any(len(row) != self.COLS for row in board)):
                 print(f"[ERROR] Invalid board dimensions: {len(board)}x{len(board[0]) if board else 0}")
                 return
-            
-            # Draw empty grid background first
+
+            for item in self._idle_items:
+                self.canvas.itemconfigure(item, state="hidden")
+
+            shown = self._shown
+            i = 0
             for r in range(self.ROWS):
+                row = board[r] if board else None
                 for c in range(self.COLS):
-                    x1 = self.GAP + c * (self.CELL + self.GAP)
-                    y1 = self.GAP + r * (self.CELL + self.GAP)
-                    x2, y2 = x1 + self.CELL, y1 + self.CELL
-                    self.canvas.create_rectangle(x1, y1, x2, y2,
-                        fill=C["cell_empty"], outline=C["cell_border"], width=1)
-            
-            # Only render placed blocks (MAP_BLOCK) in blue
-            if board:
-                for r in range(min(len(board), self.ROWS)):
-                    for c in range(min(len(board[r]), self.COLS)):
-                        if board[r][c] == Tetris.MAP_BLOCK:
-                            x1 = self.GAP + c * (self.CELL + self.GAP)
-                            y1 = self.GAP + r * (self.CELL + self.GAP)
-                            x2, y2 = x1 + self.CELL, y1 + self.CELL
-                            self._draw_cell(x1, y1, x2, y2, C["primary"])
+                    filled = row is not None and row[c] == Tetris.MAP_BLOCK
+                    if filled != shown[i]:
+                        self._set_cell(i, filled)
+                    i += 1
         except Exception as e:
             print(f"[ERROR] Board rendering failed: {e}")
             import traceback
             traceback.print_exc()
 
-    def _draw_cell(self, x1, y1, x2, y2, color):
-        dk = darken(color, 0.55)
-        lt = lighten(color, 0.35)
-        mid = lighten(color, 0.1)
-        glow = lighten(color, 0.2)
-
-        self.canvas.create_rectangle(x1-1, y1-1, x2+1, y2+1,
-            fill="", outline=glow, width=1)
-        self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline=dk, width=1)
-        self.canvas.create_line(x1+2, y1+2, x2-2, y1+2, fill=lt, width=2)
-        self.canvas.create_line(x1+2, y1+2, x1+2, y2-2, fill=mid, width=1)
-        self.canvas.create_line(x1+2, y2-2, x2-2, y2-2, fill=dk, width=1)
-
-    def update_board(self, env, label=None, active=False):
+    def update_board(self, board, label=None, active=False):
         try:
-            board = env._get_complete_board()
             if board is None:
                 print("[WARN] Board is None, skipping render")
                 return
-            self._draw_board(board, env.current_piece)
+            self._draw_board(board)
             if label:
                 self._label.configure(text=label)
             self._dot.set_active(active)
@@ -822,6 +1278,7 @@ class NextPieceWidget(GlassCard):
         self.canvas = tk.Canvas(inner, width=s, height=s,
                                 bg=C["card"], highlightthickness=0)
         self.canvas.pack()
+        self._pid = None
         self._draw_piece(None)
 
     def _draw_piece(self, pid):
@@ -846,6 +1303,9 @@ class NextPieceWidget(GlassCard):
                         fill=C["cell_empty"], outline=C["cell_border"], width=1)
 
     def set(self, pid):
+        if pid == self._pid:
+            return
+        self._pid = pid
         self._draw_piece(pid)
 
 
@@ -903,36 +1363,124 @@ class StatsPanelWidget(GlassCard):
 
 # ─── Score Chart ──────────────────────────────────────────────────────────────
 
+class _MinMaxDecimator:
+    """Incremental min/max bucket decimation shared by the chart series.
+
+    Consecutive samples are grouped into buckets of ``stride`` points and each
+    bucket only keeps the indices of the minimum and maximum of every series,
+    so spikes survive downsampling. Once there are more than twice the target
+    number of buckets, neighbours are merged and the stride doubles; appends
+    stay amortised O(1) and the rendered view never exceeds ~4 * target points.
+    """
+
+    def __init__(self, series, target):
+        self._series = series
+        self._target = max(8, int(target))
+        self._stride = 1
+        self._buckets = []  # [count, min_idx, max_idx, ...] per series
+        self.n = 0
+
+    def _extremes(self, idxs):
+        out = []
+        for s in self._series:
+            out.append(min(idxs, key=s.__getitem__))
+            out.append(max(idxs, key=s.__getitem__))
+        return out
+
+    def append(self, i):
+        last = self._buckets[-1] if self._buckets else None
+        if last is not None and last[0] < self._stride:
+            last[0] += 1
+            last[1:] = self._extremes(last[1:] + [i])
+        else:
+            self._buckets.append([1] + [i] * (2 * len(self._series)))
+        self.n = i + 1
+        if len(self._buckets) > 2 * self._target:
+            merged = []
+            for k in range(0, len(self._buckets), 2):
+                pair = self._buckets[k:k+2]
+                idxs = [j for b in pair for j in b[1:]]
+                merged.append([sum(b[0] for b in pair)] + self._extremes(idxs))
+            self._buckets = merged
+            self._stride *= 2
+
+    def indices(self):
+        if not self.n:
+            return []
+        keep = {0, self.n - 1}
+        for b in self._buckets:
+            keep.update(b[1:])
+        return sorted(keep)
+
+
 class ScoreChartWidget(GlassCard):
     TICK_VALUES = [10, 20, 50, 100, 200, 500, 1000, 1500, 2000, 3000, 5000]
+    X_HEADROOM = 0.25   # Fraction of the visible span reserved ahead of the data
+    Y_HEADROOM = 1.5    # Multiplier applied above the highest max score
 
     def __init__(self, master):
         super().__init__(master, hoverable=False)
+        # Full history; only a decimated view of it is ever handed to matplotlib
+        self.eps = []
+        self.avgs = []
+        self.maxs = []
+        # Score quantiles at each point (NaN where the history predates them)
+        self.p10s = []
+        self.p50s = []
+        self.p90s = []
+        self._ymax = 0
+
+        # matplotlib is slow to import, so the figure is built the first time
+        # the card is actually shown; until then data is only collected
+        self.fig = None
+        self._figure_pending = False
+        self.bind("<Map>", self._on_map)
+
+    def _on_map(self, event):
+        if self.fig is None and not self._figure_pending:
+            self._figure_pending = True
+            self.after_idle(self._build_figure)
+
+    def _build_figure(self):
+        import matplotlib
+        matplotlib.use("TkAgg")
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
         card_rgb = tuple(int(C["card"].lstrip('#')[i:i+2], 16)/255 for i in (0,2,4))
         self.fig = Figure(figsize=(6, 4), dpi=100, facecolor=card_rgb)
         self.ax = self.fig.add_subplot(111)
         self.setup_styles()
 
+        # Persistent artists, all animated so they are blitted over a cached
+        # background instead of forcing a full figure render per data point
+        self._avg_line, = self.ax.plot([], [], color=C["primary"], linewidth=2,
+                                       animated=True)
+        self._max_line, = self.ax.plot([], [], color=C["accent"], linewidth=1.5,
+                                       linestyle='--', animated=True)
+        self._fill = None
+        self._p50_line, = self.ax.plot([], [], color=C["yellow"], linewidth=1.2,
+                                       linestyle=':', animated=True)
+        self._band = None
+        self._avg_dot, = self.ax.plot([], [], 'o', ms=8, mfc=C["primary"], mec='white',
+                                      mew=1.5, visible=False, animated=True)
+        self._max_dot, = self.ax.plot([], [], 'o', ms=8, mfc=C["accent"], mec='white',
+                                      mew=1.5, visible=False, animated=True)
+        self._background = None
+
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
-        self.canvas.draw()
         cw = self.canvas.get_tk_widget()
         cw.configure(bg=C["card"], highlightthickness=0)
         cw.pack(side=tk.TOP, fill=tk.BOTH, expand=1, padx=2, pady=2)
 
-        self.eps = deque(maxlen=500)
-        self.avgs = deque(maxlen=500)
-        self.maxs = deque(maxlen=500)
-
-        # Hover marker dots (drawn on the axes)
-        self._avg_dot = None
-        self._max_dot = None
-
         # Tooltip label
         self._tooltip_label = ctk.CTkLabel(self, text="", corner_radius=8,
                         fg_color=C["bg"], text_color=C["text"],
                         font=("JetBrains Mono", 16))
         self._tooltip_label.place_forget()
 
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        self.fig.canvas.mpl_connect("resize_event", self._on_resize)
         self.fig.canvas.mpl_connect("motion_notify_event", self._on_hover)
         self.fig.canvas.mpl_connect("axes_leave_event", self._on_leave)
         self.plot()
@@ -947,6 +1495,7 @@ class ScoreChartWidget(GlassCard):
         return f"{int(x)}"
 
     def setup_styles(self):
+        from matplotlib.ticker import FuncFormatter, FixedLocator
         card_rgb = tuple(int(C["card"].lstrip('#')[i:i+2], 16)/255 for i in (0,2,4))
         self.ax.set_facecolor(card_rgb)
         self.fig.patch.set_facecolor(card_rgb)
@@ -969,26 +1518,103 @@ class ScoreChartWidget(GlassCard):
         self.ax.yaxis.set_minor_formatter(FuncFormatter(self._score_fmt))
         self.fig.tight_layout(pad=0.5)
 
+    # ── Rendering ──
+
+    def _view_target(self):
+        """Bucket target so the decimated view holds about one point per pixel."""
+        return self.ax.bbox.width / 8
+
+    def _rebuild_view(self):
+        self._decimator = _MinMaxDecimator((self.avgs, self.maxs), self._view_target())
+        for i in range(len(self.eps)):
+            self._decimator.append(i)
+        self._ymax = max(self.maxs) if self.maxs else 0
+
+    def _update_artists(self):
+        """Push the decimated view into the persistent line artists."""
+        if len(self.eps) > 1:
+            idx = self._decimator.indices()
+            xs = [self.eps[i] for i in idx]
+            ya = [self.avgs[i] for i in idx]
+            ym = [self.maxs[i] for i in idx]
+            q10 = [self.p10s[i] for i in idx]
+            q50 = [self.p50s[i] for i in idx]
+            q90 = [self.p90s[i] for i in idx]
+        else:
+            xs, ya, ym, q10, q50, q90 = [], [], [], [], [], []
+        self._avg_line.set_data(xs, ya)
+        self._max_line.set_data(xs, ym)
+        self._p50_line.set_data(xs, q50)
+        for artist in (self._fill, self._band):
+            if artist is not None:
+                artist.remove()
+        self._fill = self._band = None
+        if xs:
+            self._fill = self.ax.fill_between(xs, ya, ym, color=C["primary"],
+                                              alpha=0.1, animated=True)
+            # p10-p90 band: where most games land, unlike the tail-driven average
+            self._band = self.ax.fill_between(xs, q10, q90, color=C["yellow"],
+                                              alpha=0.08, linewidth=0, animated=True)
+
+    def _update_limits(self):
+        """Grow the axes limits with headroom; returns True if they changed."""
+        if len(self.eps) < 2:
+            return False
+        left, right = self.ax.get_xlim()
+        bottom, top = self.ax.get_ylim()
+        first, last = self.eps[0], self.eps[-1]
+        changed = False
+        if left != first or last > right:
+            span = max(last - first, 1)
+            self.ax.set_xlim(first, last + span * self.X_HEADROOM)
+            changed = True
+        if self._ymax > top or bottom != 0:
+            self.ax.set_ylim(0, max(self._ymax, 1) * self.Y_HEADROOM)
+            changed = True
+        return changed
+
+    def _draw_animated(self):
+        for artist in (self._band, self._fill, self._avg_line, self._max_line,
+                       self._p50_line, self._avg_dot, self._max_dot):
+            if artist is not None:
+                self.ax.draw_artist(artist)
+
+    def _on_draw(self, event):
+        # Cache the static background (axes, ticks, grid) after a full render
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _on_resize(self, event):
+        self._background = None
+        self._rebuild_view()
+        self._update_artists()
+
+    def _blit(self):
+        """Redraw only the animated artists over the cached background."""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+
     def _on_hover(self, event):
+        # Motion events arrive far faster than frames; draw the latest one per tick
+        CLOCK.defer((self, "hover"), lambda: self._show_hover(event))
+
+    def _show_hover(self, event):
         if not event.inaxes or event.xdata is None or not self.eps:
-            self._on_leave(event)
+            self._hide_hover()
             return
 
-        # Find closest data point
-        lines = self.ax.get_lines()
-        if len(lines) < 2 or self._avg_dot is None or self._max_dot is None:
-            return
-        line_avg, line_max = lines[:2]
-        x_data, y_data_avg = line_avg.get_data()
-        _, y_data_max = line_max.get_data()
-
-        # Find index of closest x_data based on mouse x-coordinate
-        idx = np.searchsorted(x_data, event.xdata)
-        if idx == len(x_data): idx -= 1
-        if idx > 0 and abs(x_data[idx-1] - event.xdata) < abs(x_data[idx] - event.xdata):
+        # Find the closest episode in the full history (eps is sorted)
+        idx = bisect.bisect_left(self.eps, event.xdata)
+        if idx == len(self.eps): idx -= 1
+        if idx > 0 and abs(self.eps[idx-1] - event.xdata) < abs(self.eps[idx] - event.xdata):
             idx = idx - 1
 
-        ep, avg, max_s = x_data[idx], y_data_avg[idx], y_data_max[idx]
+        ep, avg, max_s = self.eps[idx], self.avgs[idx], self.maxs[idx]
+        p50 = self.p50s[idx]
 
         # Update hover dots
         self._avg_dot.set_data([ep], [avg])
@@ -998,6 +1624,8 @@ class ScoreChartWidget(GlassCard):
 
         # Update and place tooltip at top center of graph
         tooltip_text = f"Ep {ep:,}:  Avg {avg:,.0f} | Max {max_s:,.0f}"
+        if p50 == p50:  # Not NaN
+            tooltip_text += f" | p50 {p50:,.0f}"
         self._tooltip_label.configure(text=tooltip_text)
 
         # Place tooltip at top center of graph (fixed position)
@@ -1010,66 +1638,81 @@ class ScoreChartWidget(GlassCard):
 
         self._tooltip_label.place(x=rel_x, y=rel_y, anchor="nw")
 
-        self.canvas.draw_idle()
+        self._blit()
 
     def _on_leave(self, event):
-        if self._avg_dot:
-            self._avg_dot.set_visible(False)
-        if self._max_dot:
-            self._max_dot.set_visible(False)
+        CLOCK.defer((self, "hover"), self._hide_hover)
+
+    def _hide_hover(self):
+        self._avg_dot.set_visible(False)
+        self._max_dot.set_visible(False)
         self._tooltip_label.place_forget()
-        self.canvas.draw_idle()
+        self._blit()
 
-    def load_data(self, eps, avgs, maxs):
-        self.eps.clear()
-        self.avgs.clear()
-        self.maxs.clear()
-        self.eps.extend(eps)
-        self.avgs.extend(avgs)
-        self.maxs.extend(maxs)
+    # ── Data ──
+
+    @staticmethod
+    def _q(value):
+        return float("nan") if value is None else value
+
+    def load_data(self, eps, avgs, maxs, p10s=None, p50s=None, p90s=None):
+        self.eps[:] = eps
+        self.avgs[:] = avgs
+        self.maxs[:] = maxs
+        for dst, src in ((self.p10s, p10s), (self.p50s, p50s), (self.p90s, p90s)):
+            dst[:] = [self._q(v) for v in (src or [None] * len(eps))]
         self.plot()
 
     def plot(self):
-        self.ax.clear()
-        self.setup_styles()
-        if len(self.eps) > 1:
-            self.ax.plot(self.eps, self.avgs, color=C["primary"], linewidth=2)
-            self.ax.plot(self.eps, self.maxs, color=C["accent"], linewidth=1.5,
-                         linestyle='--')
-            self.ax.fill_between(self.eps, self.avgs, self.maxs,
-                                 color=C["primary"], alpha=0.1)
-        self._avg_dot, = self.ax.plot([], [], 'o', ms=8, mfc=C["primary"], mec='white', mew=1.5, visible=False)
-        self._max_dot, = self.ax.plot([], [], 'o', ms=8, mfc=C["accent"], mec='white', mew=1.5, visible=False)
-        self.canvas.draw()
-
-    def add_data_point(self, ep, avg_score, max_score):
+        """Full refresh: rebuild the decimated view and re-render the figure."""
+        if self.fig is None:
+            return
+        self._rebuild_view()
+        self._update_artists()
+        self._update_limits()
+        self.canvas.draw_idle()
+
+    def add_data_point(self, ep, avg_score, max_score, p10=None, p50=None, p90=None):
+        series = (self.eps, self.avgs, self.maxs, self.p10s, self.p50s, self.p90s)
+        values = (ep, avg_score, max_score, self._q(p10), self._q(p50), self._q(p90))
         # If the new episode is less than or equal to the last one, we've restarted.
         if self.eps and ep <= self.eps[-1]:
-            # Find where the new episode would fit in the existing data
-            idx = np.searchsorted(self.eps, ep)
-            # Clear all data from that point forward
-            self.eps = deque(list(self.eps)[:idx])
-            self.avgs = deque(list(self.avgs)[:idx])
-            self.maxs = deque(list(self.maxs)[:idx])
-
-        self.eps.append(ep)
-        self.avgs.append(avg_score)
-        self.maxs.append(max_score)
-        self.plot()
+            # Clear all data from where the new episode fits onwards
+            idx = bisect.bisect_left(self.eps, ep)
+            for lst, value in zip(series, values):
+                del lst[idx:]
+                lst.append(value)
+            self.plot()
+            return
+
+        for lst, value in zip(series, values):
+            lst.append(value)
+        if self.fig is None:
+            return
+        self._ymax = max(self._ymax, max_score)
+        self._decimator.append(len(self.eps) - 1)
+        self._update_artists()
+        if self._update_limits():
+            # Ticks moved, so the cached background is stale
+            self.canvas.draw_idle()
+        else:
+            self._blit()
 
     def clear_plot(self):
-        self.eps.clear()
-        self.avgs.clear()
-        self.maxs.clear()
+        for lst in (self.eps, self.avgs, self.maxs, self.p10s, self.p50s, self.p90s):
+            lst.clear()
         self.plot()
 
 
 # ─── Generation List ─────────────────────────────────────────────────────────
 
 class GenerationListWidget(GlassCard):
+    MAX_ROWS = 20
+
     def __init__(self, master):
         super().__init__(master, hoverable=False)
-        self._gens = deque(maxlen=20)
+        self._gens = deque(maxlen=self.MAX_ROWS)
+        self._rows = []  # Recycled row widgets, created lazily up to MAX_ROWS
 
         inner = ctk.CTkFrame(self, fg_color="transparent")
         inner.pack(fill="both", expand=True, padx=22, pady=18)
@@ -1084,68 +1727,134 @@ class GenerationListWidget(GlassCard):
                      scrollbar_button_color=C["border"],
                      scrollbar_button_hover_color=C["text_dim"])
         self._list.pack(fill="both", expand=True)
+        self._empty = ctk.CTkLabel(self._list, text="No episodes completed yet",
+                     font=("Inter", 16), text_color=C["text_muted"])
         self._show_empty()
 
     def _show_empty(self):
-        for w in self._list.winfo_children():
-            w.destroy()
-        ctk.CTkLabel(self._list, text="No episodes completed yet",
-                     font=("Inter", 16), text_color=C["text_muted"]).pack(pady=40)
+        for row in self._rows:
+            if row["visible"]:
+                row["frame"].pack_forget()
+                row["visible"] = False
+        self._empty.pack(pady=40)
+
+    def _make_row(self):
+        """Create one reusable row; its text and colours are set in _fill_row."""
+        row = dict(normal_fg=C["surface"], hover_fg=C["surface_hover"],
+                   visible=False, shown=None)
+        frame = ctk.CTkFrame(self._list, fg_color=row["normal_fg"], corner_radius=14,
+                             border_width=0, border_color=C["card_border"])
+        # Hover colours change with the row's position, so read them at event time
+        def _enter(e, row=row):
+            try:
+                row["frame"].configure(fg_color=row["hover_fg"])
+            except Exception:
+                pass
+        def _leave(e, row=row):
+            try:
+                row["frame"].configure(fg_color=row["normal_fg"])
+            except Exception:
+                pass
+        frame.bind("<Enter>", _enter)
+        frame.bind("<Leave>", _leave)
+
+        ri = ctk.CTkFrame(frame, fg_color="transparent")
+        ri.pack(fill="x", padx=14, pady=10)
+
+        ef = ctk.CTkFrame(ri, fg_color=C["card"], corner_radius=10,
+                          width=78, height=50)
+        ef.pack(side="left", padx=(0, 12))
+        ef.pack_propagate(False)
+        rng = ctk.CTkLabel(ef, text="", font=("JetBrains Mono", 16, "bold"),
+                           text_color=C["text_muted"])
+        rng.pack(expand=True)
+
+        det = ctk.CTkFrame(ri, fg_color="transparent")
+        det.pack(side="left", fill="x", expand=True)
+        stats = ctk.CTkLabel(det, text="", font=("Inter", 36, "bold"),
+                             text_color=C["text"])
+        stats.pack(anchor="w", pady=(2, 0))
+
+        diff = ctk.CTkLabel(ri, text="", font=("Inter", 16, "bold"),
+                            text_color=C["text_muted"])
+        row.update(frame=frame, ef=ef, range=rng, stats=stats, diff=diff,
+                   diff_visible=False)
+        return row
+
+    def _fill_row(self, row, g, latest, nxt):
+        """Reconfigure a recycled row in place; unchanged rows are skipped."""
+        key = (g["range"], g["avg"], g["max"], latest,
+               nxt["avg"] if nxt else None)
+        if row["shown"] == key:
+            return
+        row["shown"] = key
+
+        row["normal_fg"] = C["surface"] if not latest else blend(C["primary"], C["card"], 0.88)
+        row["hover_fg"] = C["surface_hover"] if not latest else blend(C["primary"], C["card"], 0.78)
+        bw = 1 if latest else 0
+        bc = blend(C["primary"], C["card"], 0.5) if latest else C["card_border"]
+        row["frame"].configure(fg_color=row["normal_fg"], border_width=bw, border_color=bc)
+
+        ebg = blend(C["primary"], C["card"], 0.7) if latest else C["card"]
+        row["ef"].configure(fg_color=ebg)
+        row["range"].configure(text=f"{g['range']}",
+                               text_color=C["primary"] if latest else C["text_muted"])
+        row["stats"].configure(text=f"Avg {g['avg']:,} | Max {g['max']:,}")
+
+        if nxt:
+            diff = g['avg'] - nxt['avg']
+            if diff > 0:
+                txt, col = f"\u2191 +{diff:,}", C["green"]
+            elif diff < 0:
+                txt, col = f"\u2193 {diff:,}", C["red"]
+            else:
+                txt, col = "\u2014 0", C["text_muted"]
+            row["diff"].configure(text=txt, text_color=col)
+            if not row["diff_visible"]:
+                row["diff"].pack(side="right")
+                row["diff_visible"] = True
+        elif row["diff_visible"]:
+            row["diff"].pack_forget()
+            row["diff_visible"] = False
 
     def add(self, ep_range, avg_score, max_score):
         self._gens.appendleft(dict(range=ep_range, avg=avg_score, max=max_score))
         self._rebuild()
 
+    def set_rows(self, rows):
+        """Replace the whole list in one update.
+
+        ``rows`` are dicts with ``range``, ``avg`` and ``max`` keys in
+        chronological order (oldest first); the newest is shown on top.
+        """
+        gens = [dict(range=g["range"], avg=g["avg"], max=g["max"])
+                for g in reversed(list(rows)[-self.MAX_ROWS:])]
+        if gens == list(self._gens):
+            return
+        self._gens.clear()
+        self._gens.extend(gens)
+        self._rebuild()
+
     def _rebuild(self):
-        for w in self._list.winfo_children():
-            w.destroy()
         if not self._gens:
             self._show_empty()
             return
+        self._empty.pack_forget()
 
         items = list(self._gens)
-        for i, g in enumerate(items):
-            latest = (i == 0)
-            nxt = items[i+1] if i+1 < len(items) else None
-
-            normal_fg = C["surface"] if not latest else blend(C["primary"], C["card"], 0.88)
-            hover_fg = C["surface_hover"] if not latest else blend(C["primary"], C["card"], 0.78)
-            bw = 1 if latest else 0
-            bc = blend(C["primary"], C["card"], 0.5) if latest else C["card_border"]
-
-            row = ctk.CTkFrame(self._list, fg_color=normal_fg, corner_radius=14,
-                              border_width=bw, border_color=bc)
-            row.pack(fill="x", pady=3)
-            add_hover(row, normal_fg, hover_fg)
-
-            ri = ctk.CTkFrame(row, fg_color="transparent")
-            ri.pack(fill="x", padx=14, pady=10)
-
-            ebg = blend(C["primary"], C["card"], 0.7) if latest else C["card"]
-            ef = ctk.CTkFrame(ri, fg_color=ebg, corner_radius=10,
-                              width=78, height=50)
-            ef.pack(side="left", padx=(0, 12))
-            ef.pack_propagate(False)
-            ctk.CTkLabel(ef, text=f"{g['range']}", font=("JetBrains Mono", 16, "bold"),
-                        text_color=C["primary"] if latest else C["text_muted"]
-                        ).pack(expand=True)
-
-            det = ctk.CTkFrame(ri, fg_color="transparent")
-            det.pack(side="left", fill="x", expand=True)
-            ctk.CTkLabel(det, text=f"Avg {g['avg']:,} | Max {g['max']:,}",
-                        font=("Inter", 36, "bold"), text_color=C["text"],
-                        ).pack(anchor="w", pady=(2, 0))
-
-            if nxt:
-                diff = g['avg'] - nxt['avg']
-                if diff > 0:
-                    txt, col = f"\u2191 +{diff:,}", C["green"]
-                elif diff < 0:
-                    txt, col = f"\u2193 {diff:,}", C["red"]
-                else:
-                    txt, col = "\u2014 0", C["text_muted"]
-                ctk.CTkLabel(ri, text=txt, font=("Inter", 16, "bold"),
-                            text_color=col).pack(side="right")
+        while len(self._rows) < len(items):
+            self._rows.append(self._make_row())
+
+        for i, row in enumerate(self._rows):
+            if i < len(items):
+                nxt = items[i+1] if i+1 < len(items) else None
+                self._fill_row(row, items[i], i == 0, nxt)
+                if not row["visible"]:
+                    row["frame"].pack(fill="x", pady=3)
+                    row["visible"] = True
+            elif row["visible"]:
+                row["frame"].pack_forget()
+                row["visible"] = False
 
     def clear(self):
         self._gens.clear()
@@ -1157,6 +1866,10 @@ class GenerationListWidget(GlassCard):
 # =====================================================================
 
 class TetrisAIApp(ctk.CTk):
+    FRAME_MS = CLOCK.interval_ms  # Visualization frames are shown on the clock tick (~30 fps)
+    TRAIN_POLL_MS = 100  # Training-process message poll interval
+    BASE_PPS = 5.0   # Simulated pieces per second at 1.0x playback speed
+
     def toggle_pause_visualization(self):
         if self.is_visualizing:
             if not getattr(self, '_vis_paused', False):
@@ -1189,14 +1902,31 @@ class TetrisAIApp(ctk.CTk):
         self._stop_learn = threading.Event()
         self._stop_vis = threading.Event()
         self._learn_thread = None
+        self._learn_proc = None
+        self._train_queue = None
         self._vis_thread = None
+        self._export_proc = None
+        self._export_queue = None
+        self._weight_stream = None  # Shared memory name of the trainer's live weights
         self.current_episode = 0
         self.best_score = 0
         self._train_start_time = 0
+        self._model_count = 0
+        self._manifest_job = None   # "running" or "again" while a manifest refresh is off-thread
         self._recent_batches = []
+        self._frames = FrameSlot()
+        self._models = ModelCache(
+            lambda path: load_agent(path, Tetris().get_state_size(), VALUE_CACHE_SIZE),
+            capacity=MODEL_CACHE_SIZE)
 
         self._build()
+        CLOCK.on_report = self.header.set_clock_stats
+        CLOCK.attach(self)
+        self.monitor = UiMonitor(self, on_report=self.header.set_latency, clock=CLOCK)
+        self._instrument_widgets()
         self._load_existing_state()
+        # TensorFlow takes seconds to import; do it once the window is up
+        self.after(100, lambda: threading.Thread(target=self._warm_up, daemon=True).start())
 
     def _build(self):
         self.header = Header(self, self)
@@ -1248,8 +1978,32 @@ class TetrisAIApp(ctk.CTk):
         self.gen_list = GenerationListWidget(right)
         self.gen_list.grid(row=1, column=0, sticky="nsew")
 
+    # ── Deferred TensorFlow start-up ──────────────────────────────────────
+
+    def _warm_up(self):
+        """Import TensorFlow/Keras off the UI thread (callers importing later just wait)."""
+        try:
+            import dqn_agent  # noqa: F401 — configures TF threads, GPU and precision
+            self.monitor.post(self.header.set_engine_state, "\u25cf Engine ready", C["green"])
+        except Exception as e:
+            print(f"[ERROR] Could not load TensorFlow: {e}")
+            self.monitor.post(self.header.set_engine_state, "\u2716 TensorFlow unavailable", C["red"])
+
     # ── Load existing state ───────────────────────────────────────────────
 
+    def _instrument_widgets(self):
+        """Time the widget updates that run for every frame, chart point or batch."""
+        for obj, method, name in (
+                (self.board, "update_board", "board.update_board"),
+                (self.next_piece, "set", "next_piece.set"),
+                (self.stats, "set", "stats.set"),
+                (self.chart, "add_data_point", "chart.add_data_point"),
+                (self.chart, "plot", "chart.plot"),
+                (self.gen_list, "set_rows", "gen_list.set_rows"),
+                (self.train_status, "update", "train_status.update"),
+                (self, "_poll_train_queue", "app.poll_train_queue")):
+            self.monitor.instrument(obj, method, name)
+
     def _load_existing_state(self):
         saved = load_training_state()
         if saved:
@@ -1257,26 +2011,44 @@ class TetrisAIApp(ctk.CTk):
             self.current_episode = saved.get("last_episode", 0)
             chart = saved.get("chart_data", {})
             if chart.get("eps"):
-                self.chart.load_data(chart["eps"], chart["avgs"], chart["maxs"])
-            gens = saved.get("recent_episodes", [])
-            normalized = []
-            for g in gens:
-                if "range" in g:
-                    normalized.append(dict(range=g["range"],
-                                           avg=g.get("avg", 0),
-                                           max=g.get("max", 0),
-                                           steps=g.get("steps", 0)))
-                else:
-                    score = g.get("score", 0)
-                    normalized.append(dict(range=f"{g['ep']}-{g['ep']}",
-                                           avg=score, max=score, steps=0))
-
-            self._recent_batches = normalized[-20:]
-            # Add in reverse order so newest episodes appear first
-            for g in reversed(self._recent_batches):
-                self.gen_list.add(g["range"], g["avg"], g["max"])
-        model_count = len(glob.glob(os.path.join(MODELS_DIR, "episode_*.keras")))
-        self.header.update_stats(self.best_score, self.current_episode, model_count)
+                self.chart.load_data(chart["eps"], chart["avgs"], chart["maxs"],
+                                     chart.get("p10s"), chart.get("p50s"), chart.get("p90s"))
+            if saved.get("score_stats"):
+                self.train_status.set_distribution(
+                    ScoreStats.from_dict(saved["score_stats"]).summary())
+            self._recent_batches = normalize_recent(saved.get("recent_episodes", []))
+            self.gen_list.set_rows(self._recent_batches)
+        self.header.update_stats(self.best_score, self.current_episode, self._model_count)
+        self._refresh_checkpoints()
+
+    def _refresh_checkpoints(self):
+        """Re-read the checkpoint manifest (written by the trainer) off the Tk thread.
+
+        Building a missing manifest hashes every checkpoint, so the dropdown
+        and the saved count are updated when the reader thread is done."""
+        if self._manifest_job is not None:
+            self._manifest_job = "again"  # Re-read once the current read finishes
+            return
+        self._manifest_job = "running"
+
+        def read():
+            try:
+                episodes = checkpoint_manifest().episodes()
+            except Exception as e:
+                print(f"[WARN] Could not read the checkpoint manifest: {e}")
+                episodes = None
+            self.monitor.post(self._checkpoints_read, episodes)
+        threading.Thread(target=read, daemon=True).start()
+
+    def _checkpoints_read(self, episodes):
+        again = self._manifest_job == "again"
+        self._manifest_job = None
+        if episodes is not None:
+            self._model_count = len(episodes)
+            self.controls.set_checkpoints(episodes)
+            self.header.set_saved(self._model_count)
+        if again:
+            self._refresh_checkpoints()
 
     # ── Training (runs independently of visualization) ────────────────────
 
@@ -1284,7 +2056,9 @@ class TetrisAIApp(ctk.CTk):
         if self.is_learning:
             self._stop_learn.set()
             self.is_learning = False
-            self.controls.set_learning(False, self.current_episode)
+            # The run finishes its episode and saves first; _training_done()
+            # re-enables Start once the "done" message (or the exit) arrives
+            self.controls.set_stopping()
             self.train_status.update(False, self.current_episode)
         else:
             self._start_learning()
@@ -1300,240 +2074,109 @@ class TetrisAIApp(ctk.CTk):
         self.controls.save_params()
 
         self.is_learning = True
-        self._stop_learn.clear()
         self.controls.set_learning(True, 0)
+        self._train_start_time = time.time()
 
         # NOTE: We do NOT stop visualization — they run simultaneously
-        self._learn_thread = threading.Thread(target=self._learn_loop,
-                                              args=(params,), daemon=True)
-        self._learn_thread.start()
-
-    def _ui_interval(self, episode_num):
-        if episode_num <= 300:
-            return 1.0
-        if episode_num <= 800:
-            return 2.0
-        if episode_num <= 1300:
-            return 4.0
-        if episode_num <= 2000:
-            return 5.0
-        return 7.0
+        if self.controls.train_in_process:
+            # Own process, own GIL: the UI can't slow training down and vice versa
+            self._stop_learn = MP.Event()
+            self._train_queue = MP.Queue()
+            self._learn_proc = MP.Process(target=training_process, daemon=True,
+                                          args=(params, self._train_queue, self._stop_learn))
+            self._learn_proc.start()
+            self.after(self.TRAIN_POLL_MS, self._poll_train_queue)
+        else:
+            self._stop_learn = threading.Event()
+            self._learn_thread = threading.Thread(target=self._learn_loop,
+                                                  args=(params,), daemon=True)
+            self._learn_thread.start()
 
     def _learn_loop(self, params):
-        env = Tetris()
-        total_episodes = params["episodes"]
-        eps_stop = params["epsilon_stop_episode"]
-        mem_size = params["mem_size"]
-        discount = params["discount"]
-        batch_size = params["batch_size"]
-        epochs = params["epochs"]
-        train_every = params["train_every"]
-        piece_limit = params.get("piece_limit", 0)  # 0 means no limit
-        log_every = 10
-        save_model_every = 50  # Save .keras file every N episodes (not every one)
-        n_neurons = [32, 32, 32]
-        activations = ['relu', 'relu', 'relu', 'linear']
-        replay_start_size = min(mem_size, 1000)  # Original: 1000
-
-        # Resume from last saved episode
-        last_episode, last_saved_model = get_last_saved_episode()
-        # Use last_episode to determine where to start, last_saved_model to load the model
-        start_ep = last_episode
-        last_model = os.path.join(MODELS_DIR, f"episode_{last_saved_model}.keras") if last_saved_model > 0 else None
-
-        if last_saved_model > 0 and last_model and os.path.exists(last_model):
-            agent = DQNAgent(env.get_state_size(), modelFile=last_model,
-                             epsilon_stop_episode=eps_stop, mem_size=mem_size,
-                             discount=discount, replay_start_size=replay_start_size)
-            if eps_stop > 0 and start_ep < eps_stop:
-                agent.epsilon = max(agent.epsilon_min,
-                                   1.0 - (1.0 - agent.epsilon_min) * start_ep / eps_stop)
-            elif start_ep >= eps_stop:
-                agent.epsilon = agent.epsilon_min
-        else:
-            agent = DQNAgent(env.get_state_size(),
-                             n_neurons=n_neurons, activations=activations,
-                             epsilon_stop_episode=eps_stop, mem_size=mem_size,
-                             discount=discount, replay_start_size=replay_start_size)
-            start_ep = 0
-
-        if start_ep >= total_episodes:
-            self.after(0, lambda: messagebox.showinfo("Training Complete",
-                f"All {total_episodes} episodes already completed.\n"
-                f"Increase episode count or reset to retrain."))
-            self.after(0, self._training_done)
-            return
+        """In-process training thread; messages are handed to the Tk thread."""
+        try:
+            run_training(params, lambda kind, data: self.monitor.post(self._on_train_msg, kind, data),
+                         self._stop_learn)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.monitor.post(self._on_train_msg, "error", dict(message=str(e)))
 
-        scores = deque(maxlen=50) # Store last 50 scores for max/avg windows
-        self.scores = scores
-        chart_eps = list(self.chart.eps)
-        chart_avgs = list(self.chart.avgs)
-        chart_maxs = list(self.chart.maxs)
-        batch_scores = []
-        batch_steps = []
-        batch_window = 50  # For both graph and recent panel
-        recent_batches = list(getattr(self, "_recent_batches", []))
-        model_count = len(glob.glob(os.path.join(MODELS_DIR, "episode_*.keras")))
-        self._train_start_time = time.time()
-        last_ui_update = 0  # Throttle UI updates
-        last_best_save = 0  # Track when we last saved best model to reduce disk I/O
-        
-        # Consistency tracking for max score achievement
-        max_score_achievements = deque(maxlen=10)  # Track last 10 episodes that reached max score
-        consistency_threshold = 7  # Need 7 out of 10 to be considered consistent
-
-        for episode in range(start_ep, total_episodes):
-            if self._stop_learn.is_set():
-                break
-
-            ep_num = episode + 1
-            self.current_episode = ep_num
-            current_state = env.reset()
-            done = False
-            steps = 0
-
-            # Game loop — NO board rendering, NO sleep during training
-            while not done:
-                if self._stop_learn.is_set():
-                    break
-                # Check if score reaches or exceeds max score
-                if piece_limit > 0 and env.get_game_score() >= piece_limit:
-                    done = True
-                    break
-                nxt = {tuple(v): k for k, v in env.get_next_states().items()}
-                best = agent.best_state(nxt.keys())
-                act = nxt[best]
-                reward, done = env.play(act[0], act[1], render=False, piece_limit=piece_limit)
-                agent.add_to_memory(current_state, best, reward, done)
-                current_state = best
-                steps += 1
-
-            if self._stop_learn.is_set():
-                # Save current episode for proper resume
-                self.current_episode = ep_num
-                # Only save if it's a multiple of 50 or 1
-                if ep_num == 1 or ep_num % save_model_every == 0:
-                    agent.save_model(os.path.join(MODELS_DIR, f"episode_{ep_num}.keras"))
-                    model_count += 1
-                break
-
-            game_score = env.get_game_score()
-            scores.append(game_score)
-            batch_scores.append(game_score)
-            batch_steps.append(steps)
-            
-            # Track consistency for max score achievement
-            if piece_limit > 0 and game_score >= piece_limit:
-                max_score_achievements.append(1)
-                # Check if consistently reaching max score
-                if len(max_score_achievements) == 10 and sum(max_score_achievements) >= consistency_threshold:
-                    # Save consistency model
-                    consistency_model_path = os.path.join(MODELS_DIR, f"consistent_ep_{ep_num}.keras")
-                    agent.save_model(consistency_model_path)
-                    print(f"[INFO] Consistency achieved! Saved model at episode {ep_num}")
-                    # Also update best model if this score is higher
-                    if game_score > self.best_score:
-                        agent.save_model(os.path.join(_SCRIPT_DIR, "best.keras"))
-            else:
-                max_score_achievements.append(0)
-
-            if ep_num == 1 or ep_num % save_model_every == 0:
-                agent.save_model(os.path.join(MODELS_DIR, f"episode_{ep_num}.keras"))
-                model_count += 1
-
-            if game_score > self.best_score:
-                old_best = self.best_score
-                self.best_score = game_score
-                # Only save best model every 10 episodes or if it's a major improvement (>20% better)
-                # This reduces disk I/O which can slow down training
-                episodes_since_save = ep_num - last_best_save
-                is_major_improvement = old_best > 0 and game_score > old_best * 1.2
-                if episodes_since_save >= 10 or is_major_improvement or old_best == 0:
-                    agent.save_model(os.path.join(MODELS_DIR, "best.keras"))
-                    agent.save_model(os.path.join(_SCRIPT_DIR, "best.keras"))
-                    last_best_save = ep_num
-                    # Only save episode if it's a multiple of 50 or 1
-                    if (ep_num == 1 or ep_num % save_model_every == 0) and not (ep_num == 1 and save_model_every != 1):
-                        model_count += 1  # Already saved above
-
-            # Batch update for recent panel and graph
-            if ep_num % batch_window == 0:
-                avg_batch = int(round(mean(batch_scores))) if batch_scores else 0
-                max_batch = max(batch_scores) if batch_scores else 0
-                avg_steps = mean(batch_steps) if batch_steps else 0
-                start_ep = max(0, ep_num - batch_window)
-                recent_batches.append({
-                    "range": f"{start_ep}-{ep_num}",
-                    "avg": avg_batch,
-                    "max": max_batch,
-                    "steps": avg_steps
-                })
-                if len(recent_batches) > 10:
-                    recent_batches = recent_batches[-10:]
-                avg_50 = int(round(mean(scores))) if scores else 0
-                max_50 = max(scores) if scores else 0
-                chart_eps.append(ep_num)
-                chart_avgs.append(avg_50)
-                chart_maxs.append(max_50)
-                self.after(0, self.chart.add_data_point, ep_num, avg_50, max_50)
-                batch_scores.clear()
-                batch_steps.clear()
-
-            # Train the neural network
-            if episode % train_every == 0:
-                agent.train(batch_size=batch_size, epochs=epochs)
-
-            now = time.time()
-            interval = self._ui_interval(ep_num)
-            if now - last_ui_update >= interval:
-                last_ui_update = now
-                elapsed = now - self._train_start_time
-                epsilon_val = getattr(agent, 'epsilon', 0)
-                avg_50 = int(round(mean(scores))) if scores else 0
-                _ep, _mc, _bs = ep_num, model_count, self.best_score
-                # Show last 5 batches in recent panel
-                self.after(0, self._ui_batch_update, _ep, total_episodes,
-                          elapsed, epsilon_val, _mc, _bs, recent_batches[-5:], avg_50)
-                # Yield GIL very briefly so UI thread can process (reduced from 0.05)
-                time.sleep(0.001)
-
-            # Save training state periodically
-            if ep_num % 50 == 0:
-                save_training_state(dict(
-                    last_episode=ep_num,
-                    best_score=self.best_score,
-                    chart_data=dict(eps=chart_eps, avgs=chart_avgs, maxs=chart_maxs),
-                    recent_episodes=recent_batches[-20:],
-                ))
+    def _poll_train_queue(self, finished=False):
+        """Drain messages from the training process without blocking the UI.
 
-        # Save final state with current episode
-        self.current_episode = self.current_episode if self._stop_learn.is_set() else ep_num
-        save_training_state(dict(
-            last_episode=self.current_episode,
-            best_score=self.best_score,
-            chart_data=dict(eps=chart_eps, avgs=chart_avgs, maxs=chart_maxs),
-            recent_episodes=recent_batches[-20:],
-        ))
-        self._recent_batches = recent_batches[-20:]
-        self.after(0, self._training_done)
+        Keeps polling after the final message until the process has exited,
+        so Start stays disabled while the old run is still shutting down.
+        """
+        alive = self._learn_proc.is_alive()  # Checked first: nothing is sent after exit
+        try:
+            while True:
+                kind, data = self._train_queue.get_nowait()
+                self._on_train_msg(kind, data)
+                finished = finished or kind in ("done", "already_done", "error")
+        except queue.Empty:
+            pass
+        if not alive:
+            self._learn_proc.join()
+            self._learn_proc = None
+            if finished:
+                self.controls.set_learning(False, self.current_episode)
+            else:
+                # Exited without saying goodbye (e.g. killed); nothing more will arrive
+                self._training_done()
+            return
+        self.after(self.TRAIN_POLL_MS, self._poll_train_queue, finished)
+
+    def _on_train_msg(self, kind, data):
+        """Apply one training message to the UI — Tk thread only."""
+        if kind == "progress":
+            self.current_episode = data["ep"]
+            self.best_score = data["best_score"]
+            self._ui_batch_update(data["ep"], data["total"], data["elapsed"], data["epsilon"],
+                                  data["model_count"], data["best_score"], data["recent"],
+                                  data["avg_50"])
+            self.train_status.set_distribution(data.get("dist"))
+        elif kind == "chart":
+            self.chart.add_data_point(data["ep"], data["avg"], data["max"],
+                                      data.get("p10"), data.get("p50"), data.get("p90"))
+        elif kind == "stream":
+            self._weight_stream = data["name"]
+        elif kind == "already_done":
+            messagebox.showinfo("Training Complete",
+                f"All {data['total']} episodes already completed.\n"
+                f"Increase episode count or reset to retrain.")
+            self._training_done()
+        elif kind == "done":
+            self.current_episode = data["episode"]
+            self.best_score = data["best_score"]
+            self._recent_batches = data["recent"]
+            self._training_done(data["avg_50"])
+            self.train_status.set_distribution(data.get("dist"))
+        elif kind == "error":
+            messagebox.showerror("Training Failed", data["message"])
+            self._training_done()
 
     def _ui_batch_update(self, ep, total, elapsed, epsilon, model_count, best_score, recent, avg_50):
         """Single batched UI update — interval scales with episode count."""
-        self.controls.set_learning(True, ep)
+        if self.is_learning:
+            self.controls.set_learning(True, ep)
         self.train_status.update(True, ep, total, elapsed, epsilon, avg_50)
+        if model_count != self._model_count:
+            self._refresh_checkpoints()
         self.header.update_stats(best_score, ep, model_count)
         if recent:
-            self.gen_list.clear()
-            for g in recent:
-                self.gen_list.add(g["range"], g["avg"], g["max"])
+            self.gen_list.set_rows(recent)
 
-    def _training_done(self):
+    def _training_done(self, avg_50=0):
         self.is_learning = False
+        self._weight_stream = None
         elapsed = time.time() - self._train_start_time if self._train_start_time else 0
-        model_count = len([f for f in glob.glob(os.path.join(MODELS_DIR, "episode_*.keras")) if os.path.basename(f) == "episode_1.keras" or int(os.path.basename(f).replace("episode_", "").replace(".keras", "")) % 50 == 0])
-        avg_50 = int(round(mean(self.scores))) if getattr(self, "scores", None) else 0
-        self.header.update_stats(self.best_score, self.current_episode, model_count)
-        self.controls.set_learning(False, self.current_episode)
+        self.header.update_stats(self.best_score, self.current_episode, self._model_count)
+        self._refresh_checkpoints()
+        if self._learn_proc is not None:
+            self.controls.set_stopping()  # _poll_train_queue re-enables Start once it exits
+        else:
+            self.controls.set_learning(False, self.current_episode)
         self.train_status.update(False, self.current_episode, elapsed=elapsed, avg_50=avg_50)
 
     # ── Visualization (runs independently of training) ────────────────────
@@ -1551,28 +2194,26 @@ class TetrisAIApp(ctk.CTk):
         ep_num = self.controls.get_vis_episode()
         if ep_num is None:
             messagebox.showerror("No Episode Entered",
-                "Please enter an episode number to visualize.")
+                "Please pick a checkpoint or enter an episode number to visualize.")
             return
-
-        if ep_num is not None and ep_num > 0 and not (ep_num == 1 or ep_num % 50 == 0):
-            messagebox.showinfo("Invalid Episode",
-                "Please enter episode 1 or a multiple of 50.")
+        if ep_num == LIVE_EPISODE:
+            self._start_follow()
             return
 
-        if ep_num == -1:
-            model_path = os.path.join(MODELS_DIR, "best.keras")
-        else:
-            model_path = os.path.join(MODELS_DIR, f"episode_{ep_num}.keras")
-
-        if not os.path.exists(model_path):
-            root_path = f"episode_{ep_num}.keras" if ep_num > 0 else "best.keras"
-            if os.path.exists(root_path):
-                model_path = root_path
-            else:
+        manifest = checkpoint_manifest(build=False)
+        model_path = self._checkpoint_path(ep_num, manifest)
+        if model_path is None:
+            if ep_num > 0:
+                saved = manifest.episodes()
                 messagebox.showerror("Model Not Found",
-                    f"No model found for episode #{ep_num}.\n"
-                    f"Looked for: {model_path}")
-                return
+                    f"No checkpoint saved for episode #{ep_num}.\n"
+                    f"Saved episodes: {', '.join(map(str, saved[-12:])) if saved else 'none'}")
+            else:
+                messagebox.showerror("Model Not Found", "No best model has been saved yet.")
+            return
+        if not INFERENCE_SERVER:
+            self._models.prefetch([model_path])  # Queued ahead of its neighbors
+        self._prefetch_around(ep_num, manifest)
 
         # NOTE: We do NOT stop training — they run simultaneously
         self.is_visualizing = True
@@ -1582,21 +2223,95 @@ class TetrisAIApp(ctk.CTk):
         self._vis_thread = threading.Thread(target=self._vis_loop,
                                              args=(model_path, ep_num), daemon=True)
         self._vis_thread.start()
+        self._start_frame_poll()
+
+    def _start_follow(self):
+        """Visualize the network being trained, hot-swapping its weights between games."""
+        if not self._weight_stream:
+            messagebox.showerror("Training Not Running",
+                "Start training (with 'Live Every' above 0) to follow it live.")
+            return
+        self.is_visualizing = True
+        self._stop_vis.clear()
+        self.controls.set_visualizing(True, 0)
+        self._vis_thread = threading.Thread(target=self._vis_loop, daemon=True,
+                                             args=(None, LIVE_EPISODE, self._weight_stream))
+        self._vis_thread.start()
+        self._start_frame_poll()
+
+    def _checkpoint_path(self, ep_num, manifest):
+        """Path of the checkpoint for an episode (-1 = best model), or None."""
+        if ep_num > 0:
+            entry = manifest.find(ep_num)
+            return manifest.file_path(entry) if entry else None
+        for path in (os.path.join(MODELS_DIR, "best.keras"), os.path.join(_SCRIPT_DIR, "best.keras")):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _prefetch_around(self, ep_num, manifest):
+        """Load the checkpoints next to `ep_num` in the background for quick switching."""
+        if INFERENCE_SERVER:
+            return
+        episodes = manifest.episodes()
+        if ep_num in episodes:
+            i = episodes.index(ep_num)
+            neighbors = episodes[max(0, i - 1):i] + episodes[i + 1:i + 2]
+        else:
+            neighbors = episodes[-1:]  # From "Best", the latest checkpoint is the likely next pick
+        self._models.prefetch(manifest.file_path(manifest.find(ep)) for ep in neighbors)
 
-    def _vis_loop(self, model_path, ep_num):
+    def preview_checkpoint(self, choice):
+        """Dropdown selection: start loading the checkpoint before Visualize is pressed."""
+        if INFERENCE_SERVER or choice.lower() == "live":
+            return
+        ep_num = -1 if choice.lower() == "best" else int(choice)
+        manifest = checkpoint_manifest(build=False)
+        path = self._checkpoint_path(ep_num, manifest)
+        if path:
+            self._models.prefetch([path])
+            self._prefetch_around(ep_num, manifest)
+
+    def _vis_loop(self, model_path, ep_num, follow=None):
         self._vis_paused = False
+        agent = None
+        follower = None
+        label = f"Ep #{ep_num}" if ep_num > 0 else "Best Model"
+        shown_ep = ep_num if ep_num > 0 else 0
         try:
             env = Tetris()
-            agent = DQNAgent(env.get_state_size(), modelFile=model_path)
+            if follow:
+                # Weights come straight from the trainer's memory; a NumPy
+                # forward pass plays them, so swapping costs one array copy
+                follower = WeightFollower(follow)
+                snap = follower.poll()
+                while snap is None and not self._stop_vis.is_set():
+                    time.sleep(0.01)
+                    snap = follower.poll()
+                agent = NumpyValueNet(snap[3] if snap else [])
+                shown_ep = snap[1] if snap else 0
+                label = f"Live \u00b7 Ep #{shown_ep}"
+            elif INFERENCE_SERVER:
+                # Share one hosted copy of the checkpoint with other clients
+                agent = InferenceClient(parse_address(INFERENCE_SERVER),
+                                        model=os.path.abspath(model_path), authkey=INFERENCE_AUTHKEY)
+                agent.load(os.path.abspath(model_path))
+            else:
+                # Loaded and warmed up once, then reused; weights never change
+                # during playback, so repeated states are value-cache lookups
+                agent = self._models.get(model_path)
 
-            label = f"Ep #{ep_num}" if ep_num > 0 else "Best Model"
-            
             # Track visualization-specific stats
             vis_best_score = 0
-            frame_count = 0
-            update_every = 1  # Update UI every frame at 5fps
+            last_publish = 0
 
             while not self._stop_vis.is_set():
+                if follower is not None:
+                    snap = follower.poll()
+                    if snap:
+                        agent.layers = snap[3]
+                        shown_ep = snap[1]
+                        label = f"Live \u00b7 Ep #{shown_ep}"
                 env.reset()
                 done = False
                 steps = 0
@@ -1624,7 +2339,7 @@ class TetrisAIApp(ctk.CTk):
                             done = True
                             break
 
-                        # Place piece directly without animation (5fps = 0.2s per piece)
+                        # Place piece directly without animation
                         env.current_pos = [act[0], 0]
                         env.current_rotation = act[1]
                         piece = env._get_rotated_piece()
@@ -1677,23 +2392,17 @@ class TetrisAIApp(ctk.CTk):
                         if env.score > vis_best_score:
                             vis_best_score = env.score
 
-                        # Update UI at 5fps with frame skipping for efficiency
-                        frame_count += 1
-                        if frame_count % update_every == 0:
-                            elapsed = time.time() - game_start
+                        # Publish a snapshot; in turbo mode only as often as it can be shown
+                        delay = self._sim_delay()
+                        now = time.time()
+                        if delay or now - last_publish >= self.FRAME_MS / 1000:
+                            last_publish = now
+                            elapsed = now - game_start
                             pps = steps / elapsed if elapsed > 0 else 0
-                            
-                            # Use update_idletasks to prevent UI queue overflow
-                            try:
-                                self.after(0, self._ui_vis_board, env, label, True)
-                                self.after(0, self.stats.set, env.get_game_score(),
-                                          vis_best_score, steps,
-                                          ep_num if ep_num > 0 else 0, pps)
-                                self.after(0, self.next_piece.set, env.next_piece)
-                            except Exception as ui_err:
-                                print(f"[ERROR] UI update failed: {ui_err}")
-
-                        time.sleep(0.2)  # 5fps
+                            self._frames.publish(make_vis_frame(
+                                env, label, vis_best_score, steps, shown_ep, pps))
+                        if delay:
+                            time.sleep(delay)
                         
                     except Exception as e:
                         print(f"[ERROR] Visualization game loop error at step {steps}: {e}")
@@ -1702,14 +2411,14 @@ class TetrisAIApp(ctk.CTk):
                         done = True
                         break
 
+                if getattr(agent, "value_cache_size", 0):
+                    cs = agent.cache_stats()
+                    print(f"[INFO] Value cache: {cs['hit_rate']:.1%} hit rate, {cs['size']:,} entries")
+
                 if not self._stop_vis.is_set():
-                    # Final update with episode-specific stats
-                    try:
-                        self.after(0, self.stats.set, env.get_game_score(),
-                                  vis_best_score, steps,
-                                  ep_num if ep_num > 0 else 0, 0)
-                    except Exception as e:
-                        print(f"[ERROR] Final stats update failed: {e}")
+                    # Final frame with episode-specific stats
+                    self._frames.publish(make_vis_frame(
+                        env, label, vis_best_score, steps, shown_ep, 0))
                     time.sleep(2.0)
 
         except Exception as e:
@@ -1717,27 +2426,160 @@ class TetrisAIApp(ctk.CTk):
             import traceback
             traceback.print_exc()
         finally:
-            self.after(0, self._vis_done)
-
-    def _ui_vis_board(self, env, label, active):
-        """Update board — only called from visualization."""
+            if isinstance(agent, InferenceClient):
+                agent.close()
+            if follower is not None:
+                follower.close()
+            self.monitor.post(self._vis_done)
+
+    def _sim_delay(self):
+        """Seconds the simulation waits per piece; 0 runs at full engine speed."""
+        if self.controls.turbo:
+            return 0
+        return 1.0 / (self.BASE_PPS * max(self.controls.speed, 0.1))
+
+    def _start_frame_poll(self):
+        self._frames.take()  # Drop any frame left over from a previous run
+        CLOCK.animate(self._frames, self._poll_frames)
+
+    def _poll_frames(self, now):
+        """Render the latest published frame, at most once per clock tick."""
+        frame = self._frames.take()
+        if frame is not None:
+            self._render_frame(frame)
+        return self.is_visualizing
+
+    def _render_frame(self, frame):
+        """Update board and visualization widgets — Tk thread only."""
         try:
-            if env is None or env.board is None:
-                print("[WARN] Skipping board update - env or board is None")
-                return
-            self.board.update_board(env, label, active)
-            if hasattr(env, 'next_piece') and env.next_piece is not None:
-                self.next_piece.set(env.next_piece)
+            self.board.update_board(frame.board, frame.label, True)
+            if frame.next_piece is not None:
+                self.next_piece.set(frame.next_piece)
+            self.stats.set(frame.score, frame.high, frame.pieces,
+                           frame.episode, frame.pps)
+            if frame.replay_pos is not None:
+                self.controls.set_replay_position(frame.replay_pos, frame.replay_total)
         except Exception as e:
-            print(f"[ERROR] _ui_vis_board failed: {e}")
+            print(f"[ERROR] _render_frame failed: {e}")
             import traceback
             traceback.print_exc()
 
     def _vis_done(self):
         self.is_visualizing = False
         self.controls.set_visualizing(False)
+        # Show whatever the worker published last, then let the poll lapse
+        frame = self._frames.take()
+        if frame is not None:
+            self._render_frame(frame)
         # Do NOT clear the board here; leave as is until new visualization
 
+    # ── Replay of recorded games (no model needed) ────────────────────────
+
+    def toggle_replay(self):
+        if self.is_visualizing:
+            self.toggle_visualization()
+        else:
+            self._start_replay()
+
+    def _start_replay(self):
+        ep_num = self.controls.get_vis_episode()
+        info = find_game(RECORDINGS_FILE, ep_num if ep_num and ep_num > 0 else None)
+        if info is None:
+            messagebox.showerror("Recording Not Found",
+                f"No recorded game found{f' for episode #{ep_num}' if ep_num else ''}.\n"
+                "Set 'Record Every' above 0 before training to record games.")
+            return
+
+        self.is_visualizing = True
+        self._stop_vis.clear()
+        self._replay_seek = None
+        self.controls.set_visualizing(True, info["episode"] or 0)
+
+        self._vis_thread = threading.Thread(target=self._replay_loop,
+                                             args=(info,), daemon=True)
+        self._vis_thread.start()
+        self._start_frame_poll()
+
+    def seek_replay(self, index):
+        """Request a jump to piece `index`; applied by the replay thread."""
+        self._replay_seek = index
+
+    def _replay_loop(self, info):
+        self._vis_paused = False
+        try:
+            replay = GameReplay(load_game(RECORDINGS_FILE, info["offset"]))
+            total = len(replay)
+            ep_num = info["episode"] or 0
+            label = f"Replay Ep #{ep_num}" if ep_num else "Replay"
+            self.monitor.post(self.controls.set_replay_range, total)
+
+            last_publish = 0
+
+            while not self._stop_vis.is_set():
+                seek = self._replay_seek
+                if seek is not None:
+                    self._replay_seek = None
+                    replay.seek(seek)
+                elif self._vis_paused or replay.done:
+                    time.sleep(0.05)
+                    continue
+                else:
+                    replay.step()
+
+                delay = self._sim_delay()
+                now = time.time()
+                if delay or seek is not None or replay.done \
+                        or now - last_publish >= self.FRAME_MS / 1000:
+                    last_publish = now
+                    self._frames.publish(make_vis_frame(
+                        replay.env, label, replay.record.score or 0, replay.index,
+                        ep_num, 0, replay.index, total))
+                if delay:
+                    time.sleep(delay)
+
+        except Exception as e:
+            print(f"[FATAL] Replay loop crashed: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.monitor.post(self._vis_done)
+
+    # ── Video export ──────────────────────────────────────────────────────
+
+    def export_video(self):
+        """Encode the recorded game of the selected episode to MP4 in a background process."""
+        if self._export_proc is not None and self._export_proc.is_alive():
+            return
+        ep_num = self.controls.get_vis_episode()
+        info = find_game(RECORDINGS_FILE, ep_num if ep_num and ep_num > 0 else None)
+        if info is None:
+            messagebox.showerror("Recording Not Found",
+                f"No recorded game found{f' for episode #{ep_num}' if ep_num else ''}.\n"
+                "Set 'Record Every' above 0 before training to record games.")
+            return
+        name = f"episode_{info['episode']}.mp4" if info["episode"] else "latest_game.mp4"
+        self._export_queue = MP.Queue()
+        self._export_proc = start_export(
+            "recording", self._export_queue, recordings_file=RECORDINGS_FILE,
+            out=os.path.join(VIDEOS_DIR, name), episode=info["episode"])
+        self.controls.export_btn.configure(state="disabled", text="\u23f3  Exporting Video...")
+        self.after(500, self._poll_export)
+
+    def _poll_export(self):
+        try:
+            status, detail = self._export_queue.get_nowait()
+        except queue.Empty:
+            if self._export_proc.is_alive():
+                self.after(500, self._poll_export)
+                return
+            status, detail = "error", "The export process exited unexpectedly."
+        self._export_proc = None
+        self.controls.export_btn.configure(state="normal", text="\U0001f3ac  Export Game Video")
+        if status == "done":
+            messagebox.showinfo("Video Exported", f"Saved {detail}")
+        else:
+            messagebox.showerror("Export Failed", detail)
+
     # ── Reset ─────────────────────────────────────────────────────────────
 
     def reset_all(self):
@@ -1767,6 +2609,7 @@ class TetrisAIApp(ctk.CTk):
         self.controls.reset_params()
 
         self.header.update_stats(0, 0, 0)
+        self.controls.set_checkpoints([])
         self.chart.clear_plot()
         self.gen_list.clear()
         self.stats.set(0, 0, 0, 0)
@@ -1774,11 +2617,13 @@ class TetrisAIApp(ctk.CTk):
         self.next_piece.set(None)
         self.train_status.reset()
         self._train_start_time = 0
+        self._model_count = 0
         self._recent_batches = []
  
 
 # =====================================================================
 
 if __name__ == "__main__":
+    mp.freeze_support()  # Training process support in the PyInstaller build
     app = TetrisAIApp()
     app.mainloop()
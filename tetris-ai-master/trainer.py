@@ -0,0 +1,485 @@
+"""
+Training loop for the Tetris AI, independent of the GUI.
+
+`run_training` reports progress through an `emit(kind, data)` callback, so
+the same loop can run on a thread inside the GUI process or in a child
+process that forwards its messages over a multiprocessing queue
+(`training_process`). Messages:
+
+    ("already_done", {total})
+    ("chart",        {ep, avg, max, p10, p50, p90})
+    ("progress",     {ep, total, elapsed, epsilon, model_count, best_score, recent, avg_50, dist})
+    ("done",         {episode, best_score, recent, avg_50, elapsed, dist})
+                     dist: ScoreStats.summary() of recent score and episode-length quantiles
+    ("stream",       {name})   shared memory block with live weight snapshots
+    ("episode",      {ep, score, steps, pooled_start})   every episode, if params["emit_episodes"]
+    ("error",        {message})
+"""
+
+import os
+import json
+import random
+import time
+import traceback
+from statistics import mean
+from collections import deque
+
+from tetris import Tetris
+from checkpoints import CheckpointManifest
+from game_record import GameRecorder
+from heuristic_agent import prefill_memory
+from metrics import MetricsWriter
+from offline_dataset import DATASETS_DIR, TransitionWriter
+from value_net import model_layers
+from score_stats import ScoreStats
+from start_pool import StartPool
+from weight_stream import WeightPublisher
+
+# ─── DIRECTORIES (always relative to this script) ─────────────────────────────
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.environ.get("TETRIS_MODELS_DIR") or os.path.join(_SCRIPT_DIR, "models")
+STATE_FILE = os.path.join(MODELS_DIR, "_training_state.json")
+RECORDINGS_FILE = os.path.join(MODELS_DIR, "recordings.tgr")
+START_POOL_FILE = os.path.join(MODELS_DIR, "start_pool.npz")
+# TensorBoard event files, one subdirectory per training session
+RUNS_DIR = os.environ.get("TETRIS_RUNS_DIR") or os.path.join(_SCRIPT_DIR, "runs")
+# Copy of the best model next to the scripts, for the default models directory only
+# (runs with their own directory, such as sweep trials, keep everything in it)
+BEST_COPY_FILE = None if os.environ.get("TETRIS_MODELS_DIR") else os.path.join(_SCRIPT_DIR, "best.keras")
+
+POOL_SAMPLE_EVERY = 25  # Pieces between boards offered to the start pool
+
+# Checkpoint retention (see checkpoints.py); set in the control panel, passed in the params
+RETENTION = dict(keep_last=5, keep_every=500, keep_best=3)
+
+
+# ─── Training state ───────────────────────────────────────────────────────────
+
+def checkpoint_manifest(params=None, build=True):
+    """Manifest of the checkpoints in MODELS_DIR, with the retention policy from `params`.
+
+    With build=False a missing manifest is not built (no hashing), for the UI thread."""
+    params = params or {}
+    return CheckpointManifest(MODELS_DIR, build=build,
+                              **{k: params.get(k, v) for k, v in RETENTION.items()})
+
+def get_last_saved_episode(manifest=None):
+    """Get the last completed episode from state file, and the last saved model episode."""
+    # Check state file for the true last episode
+    state = load_training_state()
+    last_episode = state.get("last_episode", 0) if state else 0
+
+    # The last saved model (which might be earlier than last_episode)
+    latest = (manifest or checkpoint_manifest()).latest()
+    last_saved_model = latest["episode"] if latest else 0
+
+    # Return the true last episode (for resuming) and last saved model (for loading)
+    return last_episode, last_saved_model
+
+def load_training_state():
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, 'r') as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return None
+
+def save_training_state(state_dict):
+    try:
+        os.makedirs(MODELS_DIR, exist_ok=True)
+        with open(STATE_FILE, 'w') as f:
+            json.dump(state_dict, f)
+    except Exception:
+        pass
+
+def normalize_recent(gens):
+    """Convert saved recent-episode entries (old per-episode or batch format) to batches."""
+    normalized = []
+    for g in gens:
+        if "range" in g:
+            normalized.append(dict(range=g["range"],
+                                   avg=g.get("avg", 0),
+                                   max=g.get("max", 0),
+                                   steps=g.get("steps", 0)))
+        else:
+            score = g.get("score", 0)
+            normalized.append(dict(range=f"{g['ep']}-{g['ep']}",
+                                   avg=score, max=score, steps=0))
+    return normalized[-20:]
+
+class StepScheduler:
+    """Schedules gradient updates by placements instead of by episodes.
+
+    Every `every` placements it asks for as many train() calls as keep
+    (samples trained) / (placements played) at `replay_ratio`, so learning
+    keeps pace with data collection however long an episode runs.
+    """
+
+    def __init__(self, every, replay_ratio, batch_size, epochs):
+        self.every = every
+        self.updates_per_step = replay_ratio / (batch_size * epochs)
+        self.steps = 0
+        self._credit = 0.0
+
+    def step(self):
+        """Count one placement; returns the number of updates to run now."""
+        self.steps += 1
+        if self.steps % self.every:
+            return 0
+        self._credit += self.every * self.updates_per_step
+        updates = int(self._credit)
+        self._credit -= updates
+        return updates
+
+def ui_interval(episode_num):
+    """Seconds between progress reports — scales with episode count."""
+    if episode_num <= 300:
+        return 1.0
+    if episode_num <= 800:
+        return 2.0
+    if episode_num <= 1300:
+        return 4.0
+    if episode_num <= 2000:
+        return 5.0
+    return 7.0
+
+
+# ─── Training loop ────────────────────────────────────────────────────────────
+
+def run_training(params, emit, stop):
+    """Train with the GUI hyperparameters until done or `stop` is set.
+
+    `stop` is anything with is_set() (threading or multiprocessing Event).
+    """
+    from dqn_agent import DQNAgent
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    total_episodes = params["episodes"]
+    eps_stop = params["epsilon_stop_episode"]
+    mem_size = params["mem_size"]
+    discount = params["discount"]
+    batch_size = params["batch_size"]
+    epochs = params["epochs"]
+    train_every = params["train_every"]
+    piece_limit = params.get("piece_limit", 0)  # 0 means no limit
+    record_every = params.get("record_every", 0)  # 0 means no recordings
+    pool_percent = params.get("pool_percent", 0)  # % of episodes starting mid-game
+    train_every_steps = params.get("train_every_steps", 0)  # 0 means train between episodes
+    replay_ratio = params.get("replay_ratio", 8)  # Samples trained per placement (step mode)
+    follow_every = params.get("follow_every", 5)  # Episodes between live weight snapshots (0 = off)
+    emit_episodes = params.get("emit_episodes", False)  # Per-episode messages (for sweeps)
+    final_model = params.get("final_model")  # Where to save the weights at the end, if anywhere
+    save_model_every = 50  # Save .keras file every N episodes (not every one)
+    n_neurons = [32, 32, 32]
+    activations = ['relu', 'relu', 'relu', 'linear']
+    replay_start_size = min(mem_size, 1000)  # Original: 1000
+
+    pool = StartPool.load(START_POOL_FILE) if pool_percent > 0 else None
+    env = Tetris(start_pool=pool, pool_fraction=pool_percent / 100)
+
+    saved = load_training_state() or {}
+    best_score = saved.get("best_score", 0)
+    manifest = checkpoint_manifest(params)
+
+    # Resume from last saved episode
+    last_episode, last_saved_model = get_last_saved_episode(manifest)
+    # Use last_episode to determine where to start, last_saved_model to load the model
+    start_ep = last_episode
+    last_model = os.path.join(MODELS_DIR, f"episode_{last_saved_model}.keras") if last_saved_model > 0 else None
+
+    if last_saved_model > 0 and last_model and os.path.exists(last_model):
+        agent = DQNAgent(env.get_state_size(), modelFile=last_model,
+                         epsilon_stop_episode=eps_stop, mem_size=mem_size,
+                         discount=discount, replay_start_size=replay_start_size)
+        if eps_stop > 0 and start_ep < eps_stop:
+            agent.epsilon = max(agent.epsilon_min,
+                               1.0 - (1.0 - agent.epsilon_min) * start_ep / eps_stop)
+        elif start_ep >= eps_stop:
+            agent.epsilon = agent.epsilon_min
+    else:
+        agent = DQNAgent(env.get_state_size(),
+                         n_neurons=n_neurons, activations=activations,
+                         epsilon_stop_episode=eps_stop, mem_size=mem_size,
+                         discount=discount, replay_start_size=replay_start_size)
+        start_ep = 0
+
+    if start_ep >= total_episodes:
+        emit("already_done", dict(total=total_episodes))
+        return
+
+    # Replay memory isn't saved, so each session would otherwise start with
+    # random play that dies in ~20 pieces; seed it with heuristic games instead
+    if params.get("prefill", True) and len(agent.memory) < replay_start_size:
+        added, games, secs = prefill_memory(agent, int(replay_start_size) - len(agent.memory),
+                                            piece_limit=piece_limit)
+        print(f"[INFO] Prefilled replay memory with {added:,} heuristic transitions "
+              f"({games} games, {secs:.1f}s)")
+
+    scores = deque(maxlen=50) # Store last 50 scores for max/avg windows
+    pooled_scores = deque(maxlen=50)  # Same for episodes started from the start pool
+    chart = saved.get("chart_data", {})
+    chart_eps = list(chart.get("eps", []))
+    chart_avgs = list(chart.get("avgs", []))
+    chart_maxs = list(chart.get("maxs", []))
+    # Charts saved before quantiles were tracked have none for their points
+    chart_qs = {k: list(chart.get(k) or [None] * len(chart_eps)) for k in ("p10s", "p50s", "p90s")}
+    # Decaying quantiles and EW stats of scores and episode lengths (see score_stats.py)
+    score_stats = ScoreStats.from_dict(saved["score_stats"]) if saved.get("score_stats") else ScoreStats()
+    batch_scores = []
+    batch_steps = []
+    batch_window = 50  # For both graph and recent panel
+    recent_batches = normalize_recent(saved.get("recent_episodes", []))
+    train_start_time = time.time()
+    last_ui_update = 0  # Throttle UI updates
+    last_best_save = 0  # Track when we last saved best model to reduce disk I/O
+    current_episode = start_ep
+
+    def save_checkpoint(ep_num, kind="episode"):
+        name = f"episode_{ep_num}.keras" if kind == "episode" else f"consistent_ep_{ep_num}.keras"
+        path = os.path.join(MODELS_DIR, name)
+        agent.save_model(path)
+        manifest.add(ep_num, path, avg=mean(scores) if scores else None,
+                     max_score=max(scores) if scores else None, kind=kind)
+
+    # Consistency tracking for max score achievement
+    max_score_achievements = deque(maxlen=10)  # Track last 10 episodes that reached max score
+    consistency_threshold = 7  # Need 7 out of 10 to be considered consistent
+    recorder = GameRecorder(RECORDINGS_FILE) if record_every > 0 else None
+    exporter = metrics = stream = None
+    try:
+        # Optional copy of every transition for offline pretraining (see offline_dataset.py)
+        if params.get("export_transitions"):
+            exporter = TransitionWriter(os.path.join(DATASETS_DIR, "training"), env.get_state_size())
+        scheduler = None
+        if train_every_steps > 0:
+            scheduler = StepScheduler(train_every_steps, replay_ratio, batch_size, epochs)
+        if params.get("tensorboard", True):
+            metrics = MetricsWriter(os.path.join(RUNS_DIR, time.strftime("%Y%m%d-%H%M%S")))
+        # In-memory weight snapshots for the live-follow visualization (see weight_stream.py)
+        if follow_every > 0:
+            try:
+                stream = WeightPublisher(model_layers(agent.model), start_ep)
+                emit("stream", dict(name=stream.name))
+            except OSError as e:
+                print(f"[WARN] Live weight stream unavailable: {e}")
+
+        for episode in range(start_ep, total_episodes):
+            if stop.is_set():
+                break
+
+            ep_num = episode + 1
+            current_episode = ep_num
+            recording = recorder is not None and (ep_num == 1 or ep_num % record_every == 0)
+            if recording:
+                # Seeded games can be replayed exactly from their actions
+                current_state = env.reset(seed=random.randrange(2 ** 31))
+                recorder.start(env, episode=ep_num)
+            else:
+                current_state = env.reset()
+            done = False
+            steps = 0
+            train_stats = None  # Stats of the last update run during this episode (step mode)
+            play_start = time.perf_counter()
+
+            # Game loop — NO board rendering, NO sleep during training
+            while not done:
+                if stop.is_set():
+                    break
+                # Check if score reaches or exceeds max score
+                if piece_limit > 0 and env.get_game_score() >= piece_limit:
+                    done = True
+                    break
+                nxt = {tuple(v): k for k, v in env.get_next_states().items()}
+                best = agent.best_state(nxt.keys())
+                act = nxt[best]
+                reward, done = env.play(act[0], act[1], render=False, piece_limit=piece_limit)
+                if recording:
+                    recorder.record(act[0], act[1], env)
+                agent.add_to_memory(current_state, best, reward, done)
+                if exporter is not None:
+                    exporter.add(current_state, best, reward, done)
+                current_state = best
+                steps += 1
+                if scheduler is not None:
+                    for _ in range(scheduler.step()):
+                        train_stats = agent.train(batch_size=batch_size, epochs=epochs,
+                                                  decay_epsilon=False) or train_stats
+                if pool is not None and steps % POOL_SAMPLE_EVERY == 0 and not done:
+                    pool.add(env.board)
+
+            if recording:
+                recorder.finish(env)
+            play_seconds = time.perf_counter() - play_start
+
+            if stop.is_set():
+                # Only save if it's a multiple of 50 or 1
+                if ep_num == 1 or ep_num % save_model_every == 0:
+                    save_checkpoint(ep_num)
+                break
+
+            game_score = env.get_game_score()
+            # Episodes started from a pooled mid-game board begin with a head
+            # start and no score, so they are kept out of every statistic that is
+            # compared across episodes (averages, best score, checkpoint ranking)
+            if env.pooled_start:
+                pooled_scores.append(game_score)
+            else:
+                scores.append(game_score)
+                batch_scores.append(game_score)
+                batch_steps.append(steps)
+                score_stats.add(game_score, steps)
+            if emit_episodes:
+                emit("episode", dict(ep=ep_num, score=game_score, steps=steps,
+                                     pooled_start=env.pooled_start))
+
+            # Track consistency for max score achievement (fresh starts only)
+            if not env.pooled_start:
+                if piece_limit > 0 and game_score >= piece_limit:
+                    max_score_achievements.append(1)
+                    # Check if consistently reaching max score
+                    if len(max_score_achievements) == 10 and sum(max_score_achievements) >= consistency_threshold:
+                        # Save consistency model
+                        save_checkpoint(ep_num, kind="consistent")
+                        print(f"[INFO] Consistency achieved! Saved model at episode {ep_num}")
+                        # Also update best model if this score is higher
+                        if game_score > best_score and BEST_COPY_FILE:
+                            agent.save_model(BEST_COPY_FILE)
+                else:
+                    max_score_achievements.append(0)
+
+            if ep_num == 1 or ep_num % save_model_every == 0:
+                save_checkpoint(ep_num)
+
+            if game_score > best_score and not env.pooled_start:
+                old_best = best_score
+                best_score = game_score
+                # Only save best model every 10 episodes or if it's a major improvement (>20% better)
+                # This reduces disk I/O which can slow down training
+                episodes_since_save = ep_num - last_best_save
+                is_major_improvement = old_best > 0 and game_score > old_best * 1.2
+                if episodes_since_save >= 10 or is_major_improvement or old_best == 0:
+                    agent.save_model(os.path.join(MODELS_DIR, "best.keras"))
+                    if BEST_COPY_FILE:
+                        agent.save_model(BEST_COPY_FILE)
+                    last_best_save = ep_num
+
+            # Batch update for recent panel and graph
+            if ep_num % batch_window == 0:
+                avg_batch = int(round(mean(batch_scores))) if batch_scores else 0
+                max_batch = max(batch_scores) if batch_scores else 0
+                avg_steps = mean(batch_steps) if batch_steps else 0
+                batch_start = max(0, ep_num - batch_window)
+                recent_batches.append({
+                    "range": f"{batch_start}-{ep_num}",
+                    "avg": avg_batch,
+                    "max": max_batch,
+                    "steps": avg_steps
+                })
+                if len(recent_batches) > 10:
+                    recent_batches = recent_batches[-10:]
+                avg_50 = int(round(mean(scores))) if scores else 0
+                max_50 = max(scores) if scores else 0
+                chart_eps.append(ep_num)
+                chart_avgs.append(avg_50)
+                chart_maxs.append(max_50)
+                dist = score_stats.summary()["score"]
+                for k in ("p10", "p50", "p90"):
+                    chart_qs[k + "s"].append(dist[k])
+                emit("chart", dict(ep=ep_num, avg=avg_50, max=max_50,
+                                   p10=dist["p10"], p50=dist["p50"], p90=dist["p90"]))
+                if metrics is not None:
+                    for name, summary in score_stats.summary().items():
+                        metrics.scalars({k: v for k, v in summary.items() if k != "count"},
+                                        ep_num, prefix=f"dist/{name}_")
+                batch_scores.clear()
+                batch_steps.clear()
+
+            # Train the neural network
+            if scheduler is not None:
+                # Updates already ran during the episode (train_stats is None if
+                # none did); exploration still decays per episode
+                agent.decay_epsilon()
+            elif episode % train_every == 0:
+                train_stats = agent.train(batch_size=batch_size, epochs=epochs)
+            if stream is not None and ep_num % follow_every == 0:
+                stream.publish(model_layers(agent.model), ep_num)
+
+            if metrics is not None:
+                metrics.scalars(dict(steps=steps, epsilon=agent.epsilon,
+                                     replay_size=len(agent.memory), pooled_start=env.pooled_start,
+                                     pieces_per_second=steps / play_seconds if play_seconds else None),
+                                ep_num, prefix="episode/")
+                if env.pooled_start:
+                    metrics.scalars(dict(score=game_score, avg_50=mean(pooled_scores)),
+                                    ep_num, prefix="pooled/")
+                else:
+                    metrics.scalar("episode/score", game_score, ep_num)
+                metrics.scalar("time/play_seconds", play_seconds, ep_num)
+                if train_stats:
+                    metrics.scalars({k: v for k, v in train_stats.items() if not k.endswith("_seconds")},
+                                    ep_num, prefix="train/")
+                    metrics.scalars({k: v for k, v in train_stats.items() if k.endswith("_seconds")},
+                                    ep_num, prefix="time/train_")
+
+            now = time.time()
+            if now - last_ui_update >= ui_interval(ep_num):
+                last_ui_update = now
+                # Show last 5 batches in recent panel
+                emit("progress", dict(
+                    ep=ep_num, total=total_episodes, elapsed=now - train_start_time,
+                    epsilon=getattr(agent, 'epsilon', 0), model_count=len(manifest.episodes()),
+                    best_score=best_score, recent=recent_batches[-5:],
+                    avg_50=int(round(mean(scores))) if scores else 0,
+                    dist=score_stats.summary()))
+
+            # Save training state periodically
+            if ep_num % 50 == 0:
+                if pool is not None:
+                    pool.save(START_POOL_FILE)
+                save_training_state(dict(
+                    saved,
+                    last_episode=ep_num,
+                    best_score=best_score,
+                    chart_data=dict(eps=chart_eps, avgs=chart_avgs, maxs=chart_maxs, **chart_qs),
+                    recent_episodes=recent_batches[-20:],
+                    score_stats=score_stats.to_dict(),
+                ))
+
+        if final_model:
+            agent.save_model(final_model)
+    finally:
+        # Also on errors: flush the export, stop the TensorBoard writer thread
+        # and unlink the shared memory block
+        if metrics is not None:
+            metrics.close()
+        if exporter is not None:
+            exporter.close()
+        if stream is not None:
+            stream.close()
+
+    # Save final state with current episode
+    if pool is not None:
+        pool.save(START_POOL_FILE)
+    save_training_state(dict(
+        saved,
+        last_episode=current_episode,
+        best_score=best_score,
+        chart_data=dict(eps=chart_eps, avgs=chart_avgs, maxs=chart_maxs, **chart_qs),
+        recent_episodes=recent_batches[-20:],
+        score_stats=score_stats.to_dict(),
+    ))
+    emit("done", dict(episode=current_episode, best_score=best_score,
+                      recent=recent_batches[-20:],
+                      avg_50=int(round(mean(scores))) if scores else 0,
+                      elapsed=time.time() - train_start_time,
+                      dist=score_stats.summary()))
+
+
+def training_process(params, queue, stop):
+    """Child-process entry point: runs the loop and forwards messages to `queue`."""
+    try:
+        run_training(params, lambda kind, data: queue.put((kind, data)), stop)
+    except Exception as e:
+        traceback.print_exc()
+        queue.put(("error", dict(message=str(e))))
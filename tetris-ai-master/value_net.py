@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+
+# NumPy forward pass of the value network
+#
+# The dense layers of a DQNAgent model as plain arrays, for everything that
+# only needs to evaluate the network: remote actors, the live-follow
+# visualization (weight_stream.py) and the int8 exporter. Nothing here
+# imports TensorFlow; model_layers() only calls methods of the model it is
+# given.
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0),
+    'linear': lambda x: x,
+}
+
+
+def model_layers(model):
+    '''Dense layers of a Keras model as [(kernel, bias, activation), ...]'''
+    layers = []
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if weights:
+            kernel, bias = weights
+            layers.append((np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32),
+                           layer.get_config().get('activation', 'linear')))
+    return layers
+
+
+class NumpyValueNet:
+
+    '''Float32 forward pass of the value network from model_layers() output'''
+
+    def __init__(self, layers, epsilon=0):
+        self.layers = layers
+        self.epsilon = epsilon
+
+
+    def predict(self, states):
+        x = np.asarray(states, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        return x[:, 0]
+
+
+    def best_state(self, states):
+        '''Returns the best state for a given collection of states (epsilon-greedy)'''
+        states_list = list(states)
+        if random.random() <= self.epsilon:
+            return random.choice(states_list)
+        return states_list[int(np.argmax(self.predict(states_list)))]
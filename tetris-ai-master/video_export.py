@@ -0,0 +1,411 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from palette import C, PIECE_COLORS, PIECE_SHAPES, darken, lighten
+from tetris import Tetris
+
+# Offscreen rendering and video export of games
+#
+# Games are drawn straight into NumPy arrays instead of a Tk canvas, so a
+# game of thousands of pieces is rendered in seconds rather than played back
+# in real time. The look matches the visualization board (same palette,
+# cell glow and bevel, next piece in its PIECE_COLORS color).
+#
+# Every cell is one of a few pre-drawn tiles, and a frame is assembled by
+# indexing the tile stack with the board, so rendering is a single gather.
+# Frames hold palette indices rather than RGB: MP4 frames are expanded with
+# a lookup table, GIF frames are written as paletted images directly.
+#
+# Encoding (OpenCV for .mp4, Pillow for .gif) runs on a writer thread of
+# the export process, overlapping the game simulation. Pillow only writes a
+# GIF once it has every frame, so GIFs are capped at GIF_MAX_FRAMES frames
+# and the stride is doubled as often as needed to stay under it. The GUI starts
+# exports with start_export, which runs everything in a separate process.
+#
+# Usage:
+#   python video_export.py --episode 500 --out videos/ep500.mp4
+#   python video_export.py --model models/best.keras --seed 7 --max-pieces 5000 --stride 5 --out best.gif
+
+VIDEOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "videos")
+
+GIF_MAX_FPS = 50  # GIF delays are in 1/100 s; most viewers clamp faster rates
+GIF_MAX_FRAMES = 1500  # Pillow needs every GIF frame in memory until the file is written
+
+
+def hex_rgb(hex_color):
+    h = hex_color.lstrip('#')
+    return int(h[:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+
+
+class BoardRenderer:
+
+    '''Renders Tetris boards to paletted NumPy frames
+
+    Args:
+        cell (int): Cell size in pixels
+        gap (int): Gap between cells in pixels
+        panel (bool): Draw the next piece and a score line beside the board
+    '''
+
+    def __init__(self, cell=16, gap=2, panel=True):
+        self.cell = cell
+        self.gap = gap
+        self.panel = panel
+        self.rows, self.cols = Tetris.BOARD_HEIGHT, Tetris.BOARD_WIDTH
+        self._colors = []
+        self._color_index = {}
+
+        self.bg = self._index(C["card"])
+        self.text = self._index(C["text_sec"])
+        # Tile 0 is an empty cell, 1 a locked block, 2 + p piece p in its own color
+        self._tiles = np.stack([self._empty_tile(), self._block_tile(C["primary"])]
+                               + [self._block_tile(PIECE_COLORS[p]) for p in sorted(PIECE_COLORS)])
+        self._piece_masks = {p: np.asarray(s, dtype=bool) for p, s in PIECE_SHAPES.items()}
+
+        pitch = cell + gap
+        self.board_width = self.cols * pitch + gap
+        self.board_height = self.rows * pitch + gap
+        self.panel_width = 4 * pitch + 3 * gap if panel else 0
+        # Even dimensions keep H.264/MPEG-4 encoders happy
+        self.width = (self.board_width + self.panel_width + 1) // 2 * 2
+        self.height = (self.board_height + 1) // 2 * 2
+        self.lut = np.asarray(self._colors, dtype=np.uint8)
+
+
+    def _index(self, hex_color):
+        rgb = hex_rgb(hex_color)
+        if rgb not in self._color_index:
+            self._color_index[rgb] = len(self._colors)
+            self._colors.append(rgb)
+        return self._color_index[rgb]
+
+
+    def _tile(self):
+        '''Blank tile covering a cell plus its top/left gap'''
+        pitch = self.cell + self.gap
+        return np.full((pitch, pitch), self.bg, dtype=np.uint8)
+
+
+    def _empty_tile(self):
+        t = self._tile()
+        g, n = self.gap, self.cell
+        t[g:g + n, g:g + n] = self._index(C["cell_border"])
+        t[g + 1:g + n - 1, g + 1:g + n - 1] = self._index(C["cell_empty"])
+        return t
+
+
+    def _block_tile(self, color):
+        '''A block as the board widget draws it: glow outline, bevel lines, dark edge'''
+        t = self._tile()
+        g, n = self.gap, self.cell
+        x1, x2 = g, g + n - 1
+        if g:
+            t[g - 1:x2 + 2, g - 1:x2 + 2] = self._index(lighten(color, 0.2))
+        t[x1:x2 + 1, x1:x2 + 1] = self._index(darken(color, 0.55))
+        t[x1 + 1:x2, x1 + 1:x2] = self._index(color)
+        if n >= 8:
+            t[x1 + 2:x1 + 4, x1 + 2:x2 - 1] = self._index(lighten(color, 0.35))
+            t[x1 + 2:x2 - 1, x1 + 2] = self._index(lighten(color, 0.1))
+            t[x2 - 2, x1 + 2:x2 - 1] = self._index(darken(color, 0.55))
+        return t
+
+
+    def _grid(self, tile_ids):
+        '''Assembles a (rows, cols) array of tile ids into pixels'''
+        rows, cols = tile_ids.shape
+        pitch = self.cell + self.gap
+        return self._tiles[tile_ids].transpose(0, 2, 1, 3).reshape(rows * pitch, cols * pitch)
+
+
+    def render(self, board, next_piece=None, score=None, pieces=None):
+        '''Paletted (height, width) uint8 frame of a board (lists or array of 0/1)'''
+        frame = np.full((self.height, self.width), self.bg, dtype=np.uint8)
+        cells = (np.asarray(board) == Tetris.MAP_BLOCK).astype(np.uint8)
+        grid = self._grid(cells)
+        frame[:grid.shape[0], :grid.shape[1]] = grid
+        if self.panel:
+            x0 = self.board_width + self.gap
+            if next_piece is not None:
+                mask = self._piece_masks[next_piece]
+                piece = self._grid(np.where(mask, 2 + next_piece, 0).astype(np.uint8))
+                frame[:piece.shape[0], x0:x0 + piece.shape[1]] = piece
+            if score is not None or pieces is not None:
+                self._text(frame, x0, 4 * (self.cell + self.gap) + 18, score, pieces)
+        return frame
+
+
+    def _text(self, frame, x, y, score, pieces):
+        try:
+            import cv2
+        except ImportError:
+            return  # Text is optional; boards render without OpenCV
+        scale = self.cell / 40
+        for label, value in (("SCORE", score), ("PIECES", pieces)):
+            if value is None:
+                continue
+            cv2.putText(frame, label, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale * 0.9,
+                        int(self.text), 1, cv2.LINE_8)  # No anti-aliasing: frames are paletted
+            cv2.putText(frame, f"{value:,}", (x, y + int(self.cell * 1.2)),
+                        cv2.FONT_HERSHEY_SIMPLEX, scale, int(self.text), 1, cv2.LINE_8)
+            y += int(self.cell * 3)
+
+
+    def rgb(self, frame):
+        '''RGB (height, width, 3) image of a paletted frame'''
+        return self.lut[frame]
+
+
+# ─── Frame sources ───────────────────────────────────────────────────────────
+# Each yields (board, next piece, score, pieces placed) every `stride` pieces
+# plus the final position.
+
+def recorded_states(record, stride=1, start=0, end=None):
+    '''States of a recorded game (game_record.GameRecord)'''
+    from game_record import GameReplay
+    replay = GameReplay(record)
+    replay.seek(start)
+    end = len(replay) if end is None else min(end, len(replay))
+    env = replay.env
+    yield env.board, env.next_piece, env.score, replay.index
+    while replay.index < end and not env.game_over:
+        replay.step()
+        if (replay.index - start) % stride == 0 or replay.index >= end or env.game_over:
+            yield env.board, env.next_piece, env.score, replay.index
+
+
+def played_states(agent, seed=0, max_pieces=10_000, stride=1):
+    '''States of a fresh game played greedily by `agent` (DQNAgent or HeuristicAgent)'''
+    env = Tetris()
+    env.reset(seed=seed)
+    pieces = 0
+    yield env.board, env.next_piece, env.score, pieces
+    while not env.game_over and pieces < max_pieces:
+        nxt = {tuple(v): k for k, v in env.get_next_states().items()}
+        act = nxt[agent.best_state(nxt.keys())]
+        env.play(act[0], act[1])
+        pieces += 1
+        if pieces % stride == 0 or env.game_over or pieces >= max_pieces:
+            yield env.board, env.next_piece, env.score, pieces
+
+
+# ─── Encoding ────────────────────────────────────────────────────────────────
+
+class _Mp4Writer:
+
+    def __init__(self, path, renderer, fps):
+        import cv2
+        self._cv2 = cv2
+        # OpenCV expects BGR
+        self._lut = renderer.lut[:, ::-1].copy()
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps,
+                                       (renderer.width, renderer.height))
+        if not self._writer.isOpened():
+            raise IOError(f"OpenCV could not open {path} for writing")
+
+
+    def write(self, frame):
+        self._writer.write(self._lut[frame])
+
+
+    def hold(self, frame, count):
+        for _ in range(count):
+            self.write(frame)
+
+
+    def close(self):
+        self._writer.release()
+
+
+class _GifWriter:
+
+    '''Collects paletted frames and writes the GIF on close.
+
+    At most `max_frames` frames are kept: when the limit is reached every
+    other kept frame is dropped and only every 2nd (4th, ...) new frame is
+    kept from then on, which doubles the stride of the export.'''
+
+    def __init__(self, path, renderer, fps, max_frames=GIF_MAX_FRAMES):
+        from PIL import Image
+        self._image = Image
+        self.path = path
+        self.palette = renderer.lut.flatten().tolist()
+        self.duration = int(round(1000 / min(fps, GIF_MAX_FPS)))
+        self.max_frames = max_frames
+        self.keep_every = 1
+        self.frames = []
+        self._seen = 0
+        self._last = None
+        self._hold_ms = 0
+
+
+    def write(self, frame):
+        index = self._seen
+        self._seen += 1
+        self._last = frame
+        if index % self.keep_every:
+            return
+        if len(self.frames) >= self.max_frames:
+            self.frames = self.frames[::2]
+            self.keep_every *= 2
+            if index % self.keep_every:
+                return
+        self.frames.append(self._image_of(frame))
+
+
+    def _image_of(self, frame):
+        im = self._image.fromarray(frame, mode="P")
+        im.putpalette(self.palette)
+        return im
+
+
+    def hold(self, frame, count):
+        '''Shows `frame` for `count` frame durations (one GIF frame with a long delay)'''
+        if frame is not self._last or (self._seen - 1) % self.keep_every:
+            self.frames.append(self._image_of(frame))
+        self._hold_ms = count * self.duration
+
+
+    def close(self):
+        if not self.frames:
+            return
+        if self._last is not None and (self._seen - 1) % self.keep_every and not self._hold_ms:
+            self.frames.append(self._image_of(self._last))  # Always end on the final position
+        durations = [self.duration] * len(self.frames)
+        durations[-1] += self._hold_ms
+        self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:],
+                            duration=durations, loop=0, optimize=False)
+        if self.keep_every > 1:
+            print(f"[WARN] GIF limited to {self.max_frames:,} frames: kept one in {self.keep_every} "
+                  f"of {self._seen:,} frames (use a larger --stride or .mp4 for all of them)")
+
+
+def encode(states, path, fps=30, renderer=None, hold_last=2.0, progress=None):
+    '''Renders `states` (a frame source) and encodes them to `path` (.mp4 or .gif).
+
+    The last frame is held for `hold_last` seconds. `progress(frames, pieces)`
+    is called now and then. Returns (frames rendered, seconds); GIFs keep at
+    most GIF_MAX_FRAMES of them and say so when they drop frames.'''
+    renderer = renderer or BoardRenderer()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    writer_cls = _GifWriter if path.lower().endswith(".gif") else _Mp4Writer
+    writer = writer_cls(path, renderer, fps)
+
+    frames = queue.Queue(maxsize=256)
+    failed = []
+
+    def write_loop():
+        try:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    break
+                writer.write(frame)
+        except Exception as e:
+            failed.append(e)
+            while frames.get() is not None:  # Unblock the producer
+                pass
+
+    thread = threading.Thread(target=write_loop, daemon=True, name="video-writer")
+    thread.start()
+    start = time.perf_counter()
+    count = 0
+    frame = None
+    try:
+        for board, next_piece, score, pieces in states:
+            if failed:
+                break
+            frame = renderer.render(board, next_piece, score, pieces)
+            frames.put(frame)
+            count += 1
+            if progress and count % 250 == 0:
+                progress(count, pieces)
+    finally:
+        frames.put(None)
+        thread.join()
+        try:
+            if frame is not None and not failed:
+                writer.hold(frame, int(hold_last * fps))
+                count += int(hold_last * fps)
+        finally:
+            writer.close()
+    if failed:
+        raise failed[0]
+    return count, time.perf_counter() - start
+
+
+def export_recording(recordings_file, out, episode=None, fps=30, stride=1, cell=16):
+    '''Encodes the recorded game of `episode` (latest game if None). Returns the output path.'''
+    from game_record import find_game, load_game
+    info = find_game(recordings_file, episode)
+    if info is None:
+        raise ValueError(f"no recorded game{f' for episode {episode}' if episode else ''} "
+                         f"in {recordings_file}")
+    record = load_game(recordings_file, info["offset"])
+    count, secs = encode(recorded_states(record, stride), out, fps, BoardRenderer(cell))
+    print(f"[INFO] Episode {info['episode']}: {len(record):,} pieces -> {count:,} frames "
+          f"in {secs:.1f}s ({out})")
+    return out
+
+
+def export_played(out, model=None, seed=0, max_pieces=10_000, fps=30, stride=1, cell=16):
+    '''Plays a fresh game (a checkpoint, or the heuristic agent without one) and encodes it'''
+    if model:
+        from model_cache import load_agent
+        agent = load_agent(model, Tetris().get_state_size())
+    else:
+        from heuristic_agent import HeuristicAgent
+        agent = HeuristicAgent()
+    count, secs = encode(played_states(agent, seed, max_pieces, stride), out, fps, BoardRenderer(cell))
+    print(f"[INFO] {model or 'heuristic'} (seed {seed}): {count:,} frames in {secs:.1f}s ({out})")
+    return out
+
+
+def _export_job(kind, kwargs, done_queue):
+    try:
+        fn = export_recording if kind == "recording" else export_played
+        done_queue.put(("done", fn(**kwargs)))
+    except Exception as e:
+        done_queue.put(("error", str(e)))
+
+
+def start_export(kind, done_queue, **kwargs):
+    '''Runs export_recording ("recording") or export_played ("played") in a
+    background process. ("done", path) or ("error", message) is put on
+    `done_queue` when it finishes. Returns the started process.
+
+    The process is spawned rather than forked, so `done_queue` must come from
+    multiprocessing.get_context("spawn") too.'''
+    import multiprocessing as mp
+    proc = mp.get_context("spawn").Process(target=_export_job, args=(kind, kwargs, done_queue),
+                      daemon=True, name="video-export")
+    proc.start()
+    return proc
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render Tetris games to MP4 or GIF")
+    parser.add_argument("--out", required=True, help="output file (.mp4 or .gif)")
+    parser.add_argument("--recordings", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "models", "recordings.tgr"))
+    parser.add_argument("--episode", type=int, help="recorded episode (default: latest game)")
+    parser.add_argument("--model", help="play a fresh game with this checkpoint instead")
+    parser.add_argument("--heuristic", action="store_true",
+                        help="play a fresh game with the heuristic agent instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=10_000)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--stride", type=int, default=1, help="pieces per frame")
+    parser.add_argument("--cell", type=int, default=16, help="cell size in pixels")
+    args = parser.parse_args()
+
+    if args.model or args.heuristic:
+        export_played(args.out, args.model, args.seed, args.max_pieces, args.fps,
+                      args.stride, args.cell)
+    else:
+        export_recording(args.recordings, args.out, args.episode, args.fps, args.stride, args.cell)
@@ -0,0 +1,158 @@
+import json
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Live weight snapshots over shared memory
+#
+# The trainer publishes the dense layers of its network into a shared memory
+# block every few episodes, and the visualization follows training by
+# copying them out between games: no checkpoint files, no model reloads,
+# and it works the same whether training runs on a thread or in its own
+# process. The block holds a fixed header, the layer layout as JSON and the
+# float32 kernels and biases back to back:
+#
+#   magic | sequence | version | episode | published time | layout length
+#   layout JSON (padded to LAYOUT_BYTES) | weights
+#
+# Writes are guarded by a sequence counter (a seqlock): the writer makes it
+# odd before copying and even afterwards, and readers retry a copy if the
+# counter was odd or changed while they read. The trainer never waits for a
+# reader.
+#
+# The layout is fixed when the block is created; both sides use
+# value_net.model_layers() output, and followers play with its
+# NumpyValueNet, so the visualization needs no TensorFlow model at all.
+
+MAGIC = b'TWS1'
+_HEADER = struct.Struct('<4sQQQdI')
+LAYOUT_BYTES = 4096
+
+
+def _layout(layers):
+    return [dict(kernel=list(k.shape), bias=list(b.shape), activation=a) for k, b, a in layers]
+
+
+def _floats(layout):
+    return sum(int(np.prod(e["kernel"])) + int(np.prod(e["bias"])) for e in layout)
+
+
+class WeightPublisher:
+
+    '''Owns the shared block and publishes snapshots into it (trainer side)
+
+    Args:
+        layers (list): [(kernel, bias, activation), ...] fixing the layout; published as version 1
+        episode (int): Training episode of the initial snapshot
+    '''
+
+    def __init__(self, layers, episode=0):
+        self.layout = _layout(layers)
+        meta = json.dumps(self.layout).encode()
+        if len(meta) > LAYOUT_BYTES:
+            raise ValueError("network layout too large for the weight stream header")
+        self._data_offset = _HEADER.size + LAYOUT_BYTES
+        size = self._data_offset + 4 * _floats(self.layout)
+        self.shm = shared_memory.SharedMemory(
+            name=f"tetris-weights-{os.getpid()}-{int(time.time())}", create=True, size=size)
+        self.name = self.shm.name
+        self.version = 0
+        self._seq = 0
+        self._meta_len = len(meta)
+        self.shm.buf[_HEADER.size:_HEADER.size + len(meta)] = meta
+        self._write_header(0, 0.0)
+        self._weights = np.ndarray((_floats(self.layout),), dtype=np.float32,
+                                   buffer=self.shm.buf, offset=self._data_offset)
+        self.publish(layers, episode)
+
+
+    def _write_header(self, episode, published):
+        _HEADER.pack_into(self.shm.buf, 0, MAGIC, self._seq, self.version, episode, published,
+                          self._meta_len)
+
+
+    def publish(self, layers, episode):
+        '''Copies a snapshot of `layers` (same layout as at creation) into the block'''
+        self._seq += 1   # Odd: readers retry
+        struct.pack_into('<Q', self.shm.buf, 4, self._seq)
+        off = 0
+        for kernel, bias, _ in layers:
+            for arr in (kernel, bias):
+                n = arr.size
+                self._weights[off:off + n] = np.asarray(arr, dtype=np.float32).ravel()
+                off += n
+        self.version += 1
+        self._seq += 1   # Even: consistent
+        self._write_header(episode, time.time())
+
+
+    def close(self):
+        '''Releases and removes the block; attached followers keep their last copy'''
+        self._weights = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class WeightFollower:
+
+    '''Reads snapshots from a WeightPublisher's block (visualization side)
+
+    Args:
+        name (str): Shared memory name (WeightPublisher.name)
+    '''
+
+    def __init__(self, name):
+        try:
+            # The publisher owns the block; don't let this process's exit remove it
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            self.shm = shared_memory.SharedMemory(name=name)
+        magic, _, _, _, _, meta_len = _HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC:
+            self.shm.close()
+            raise ValueError(f"{name} is not a weight stream")
+        self.layout = json.loads(bytes(self.shm.buf[_HEADER.size:_HEADER.size + meta_len]))
+        self._weights = np.ndarray((_floats(self.layout),), dtype=np.float32,
+                                   buffer=self.shm.buf, offset=_HEADER.size + LAYOUT_BYTES)
+        self.version = 0
+
+
+    def poll(self, retries=5):
+        '''Returns (version, episode, published time, layers) if a newer
+        snapshot than the last one returned is available, else None'''
+        for _ in range(retries):
+            _, seq, version, episode, published, _ = _HEADER.unpack_from(self.shm.buf, 0)
+            if seq % 2:
+                time.sleep(0.001)  # Mid-publish
+                continue
+            if version <= self.version:
+                return None
+            flat = self._weights.copy()
+            if _HEADER.unpack_from(self.shm.buf, 0)[1] != seq:
+                continue  # Torn read; the trainer published meanwhile
+            self.version = version
+            return version, episode, published, self._unflatten(flat)
+        return None
+
+
+    def _unflatten(self, flat):
+        layers, off = [], 0
+        for e in self.layout:
+            arrays = []
+            for shape in (e["kernel"], e["bias"]):
+                n = int(np.prod(shape))
+                arrays.append(flat[off:off + n].reshape(shape))
+                off += n
+            layers.append((arrays[0], arrays[1], e["activation"]))
+        return layers
+
+
+    def close(self):
+        self._weights = None
+        self.shm.close()
@@ -0,0 +1,83 @@
+import json
+import secrets
+import struct
+
+import numpy as np
+
+# Pickle-free messages over multiprocessing.connection
+#
+# Connection.send() and recv() pickle their argument, so any peer that
+# passes the authkey check could run code in the receiving process. The
+# inference server and the remote actor protocol send bytes instead
+# (send_bytes/recv_bytes): a JSON header holding the message kind and its
+# plain fields, followed by the raw contents of any NumPy arrays.
+#
+#   header length (uint32) | JSON header | array data, back to back
+#
+# The header lists each array's name, dtype and shape under "_arrays".
+# Only numeric and bool dtypes are accepted, and arrays are rebuilt with
+# np.frombuffer, so a message can only ever decode to JSON values and
+# plain arrays.
+
+MAX_MESSAGE_BYTES = 256 << 20  # Larger messages are refused unread
+_LEN = struct.Struct('<I')
+_ARRAY_KINDS = 'biuf'  # bool, signed, unsigned, float
+
+
+def new_authkey():
+    '''Random authkey for one run (printable, so it can be passed on a command line)'''
+    return secrets.token_hex(16).encode()
+
+
+def encode_msg(header, arrays=None):
+    '''Message bytes of a JSON-serializable dict plus named arrays'''
+    header = dict(header)
+    chunks = []
+    if arrays:
+        specs = []
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            if arr.dtype.kind not in _ARRAY_KINDS:
+                raise TypeError(f"array '{name}' has unsupported dtype {arr.dtype}")
+            specs.append([name, arr.dtype.str, list(arr.shape)])
+            chunks.append(arr.tobytes())
+        header["_arrays"] = specs
+    head = json.dumps(header).encode()
+    return b''.join([_LEN.pack(len(head)), head, *chunks])
+
+
+def decode_msg(data):
+    '''(header dict, {name: array}) of encode_msg() bytes; ValueError if malformed'''
+    data = memoryview(data)
+    if len(data) < _LEN.size:
+        raise ValueError("truncated message")
+    (n,) = _LEN.unpack_from(data)
+    offset = _LEN.size + n
+    if offset > len(data):
+        raise ValueError("truncated message header")
+    header = json.loads(bytes(data[_LEN.size:offset]))
+    if not isinstance(header, dict) or not isinstance(header.get("kind"), str):
+        raise ValueError("message header is not a dict with a 'kind'")
+    arrays = {}
+    for name, dtype, shape in header.pop("_arrays", []):
+        dtype = np.dtype(dtype)
+        if dtype.kind not in _ARRAY_KINDS or any(not isinstance(d, int) or d < 0 for d in shape):
+            raise ValueError(f"bad array spec for '{name}'")
+        count = int(np.prod(shape))
+        size = count * dtype.itemsize
+        if offset + size > len(data):
+            raise ValueError(f"truncated array '{name}'")
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += size
+    if offset != len(data):
+        raise ValueError("trailing bytes after the last array")
+    return header, arrays
+
+
+def send_msg(conn, kind, arrays=None, **fields):
+    conn.send_bytes(encode_msg(dict(fields, kind=kind), arrays))
+
+
+def recv_msg(conn):
+    '''Next message on `conn` as (header, arrays); ValueError if malformed'''
+    return decode_msg(conn.recv_bytes(MAX_MESSAGE_BYTES))